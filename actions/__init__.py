@@ -1,17 +1,14 @@
-from .action_search_product_api import ActionSearchProductAPI
-from .action_search_shop_api import ActionSearchShopAPI
-from .action_recommend_products import ActionRecommendProducts
-from .action_show_product_detail import ActionShowProductDetail
-from .action_default_fallback import ActionDefaultFallback
-from .action_list_products_api import ActionListProductsAPI
-from .action_check_order_status import ActionCheckOrderStatus
+from .action_registry import action_class_names, load_action_class, start_background_warm_up
 
-__all__ = [
-    "ActionSearchProductAPI",
-    "ActionSearchShopAPI",
-    "ActionRecommendProducts",
-    "ActionShowProductDetail",
-    "ActionDefaultFallback",
-    "ActionListProductsAPI",
-    "ActionCheckOrderStatus"
-]
+# Kelas action dimuat saat pertama kali diakses (PEP 562); rasa_sdk tetap
+# menemukan semua action karena ia meng-import setiap submodul paket ini.
+__all__ = action_class_names()
+
+
+def __getattr__(name):
+    if name in __all__:
+        return load_action_class(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+start_background_warm_up()
@@ -0,0 +1,80 @@
+import asyncio
+import hmac
+from typing import Awaitable, Callable, List, Text, Tuple
+
+from .action_constants import ACTION_ADMIN_HOST, ACTION_ADMIN_PORT, ACTION_ADMIN_TOKEN
+
+# Server HTTP kecil di samping action server (port terpisah dari 5055)
+# untuk endpoint operasional seperti /metrics. Endpoint selain /metrics
+# memuat data percakapan atau menulis file, jadi memerlukan ACTION_ADMIN_TOKEN.
+
+_routes: List[Tuple[Text, Text, Callable[..., Awaitable]]] = []
+_started = False
+_runner = None
+
+
+def bearer_authorized(header: Text, token: Text) -> bool:
+    return bool(token) and hmac.compare_digest(header.encode("utf-8"), f"Bearer {token}".encode("utf-8"))
+
+
+def _require_admin_token(handler: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+    async def guarded(request):
+        from aiohttp import web
+        if not ACTION_ADMIN_TOKEN:
+            return web.json_response({"error": "ACTION_ADMIN_TOKEN belum diatur"}, status=404)
+        if not bearer_authorized(request.headers.get("Authorization", ""), ACTION_ADMIN_TOKEN):
+            return web.json_response({"error": "token tidak valid"}, status=401)
+        return await handler(request)
+    return guarded
+
+
+def register_route(method: Text, path: Text, handler: Callable[..., Awaitable],
+                   protected: bool = True) -> None:
+    """Mendaftarkan handler aiohttp.web; harus dipanggil sebelum server berjalan.
+
+    Route `protected` hanya bisa diakses dengan header `Authorization: Bearer <ACTION_ADMIN_TOKEN>`.
+    """
+    _routes.append((method.upper(), path, _require_admin_token(handler) if protected else handler))
+
+
+def ensure_started() -> None:
+    """Menjadwalkan start server di event loop yang sedang berjalan (idempoten)."""
+    global _started
+    if _started or ACTION_ADMIN_PORT <= 0:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    _started = True
+    loop.create_task(_start())
+
+
+async def _start() -> None:
+    global _runner
+    from aiohttp import web
+
+    app = web.Application()
+    for method, path, handler in _routes:
+        app.router.add_route(method, path, handler)
+    runner = web.AppRunner(app, access_log=None)
+    try:
+        await runner.setup()
+        site = web.TCPSite(runner, ACTION_ADMIN_HOST, ACTION_ADMIN_PORT)
+        await site.start()
+    except OSError as e:
+        print(
+            f"Admin server: gagal membuka port {ACTION_ADMIN_HOST}:{ACTION_ADMIN_PORT}: {e}")
+        await runner.cleanup()
+        return
+    _runner = runner
+    print(
+        f"Admin server berjalan di http://{ACTION_ADMIN_HOST}:{ACTION_ADMIN_PORT}")
+
+
+async def stop() -> None:
+    global _runner, _started
+    if _runner is not None:
+        await _runner.cleanup()
+    _runner = None
+    _started = False
@@ -0,0 +1,208 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Text, Tuple
+
+from rasa_sdk.executor import CollectingDispatcher
+
+from .action_cache import LAST_REPLY_CACHE
+from .action_constants import (
+    ACTION_PRIORITIES,
+    ADMISSION_MAX_CONCURRENCY,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_MAX_WAIT_SECONDS,
+    ADMISSION_ROUTE_LIMITS,
+)
+from .action_metrics import METRICS
+
+OVERLOADED_REPLY = "Maaf, layanan sedang sibuk. Coba lagi sebentar ya."
+
+# Lookup pesanan milik pengguna yang sudah login didahulukan daripada
+# browsing daftar lengkap.
+DEFAULT_ACTION_PRIORITIES: Dict[Text, int] = {
+    "action_check_order_status": 0,
+    "action_check_payment_status": 0,
+    "action_show_product_detail": 1,
+    "action_search_product_api": 1,
+    "action_search_shop_api": 1,
+    "action_search_product_filtered": 1,
+    "action_list_shop_products": 1,
+    "action_recommend_products": 2,
+    "action_list_products_api": 3,
+    "action_list_shops_api": 3,
+    "catalog_refresh": 3,
+    "prefetch": 3,
+    "invalidation": 1,
+}
+DEFAULT_PRIORITY = 2
+
+
+def _parse_pairs(raw: Text) -> Dict[Text, Text]:
+    pairs = {}
+    for item in raw.split(","):
+        if "=" in item:
+            key, value = item.split("=", 1)
+            pairs[key.strip()] = value.strip()
+    return pairs
+
+
+def _load_priorities() -> Dict[Text, int]:
+    priorities = dict(DEFAULT_ACTION_PRIORITIES)
+    for action_name, value in _parse_pairs(ACTION_PRIORITIES).items():
+        try:
+            priorities[action_name] = int(value)
+        except ValueError:
+            print(f"Admission: prioritas tidak valid untuk {action_name}: {value!r}")
+    return priorities
+
+
+def _load_route_limits() -> Dict[Text, Tuple[int, int]]:
+    limits = {}
+    for route, value in _parse_pairs(ADMISSION_ROUTE_LIMITS).items():
+        try:
+            concurrency, queue = value.split(":", 1)
+            limits[route] = (int(concurrency), int(queue))
+        except ValueError:
+            print(f"Admission: batas route tidak valid untuk {route}: {value!r}")
+    return limits
+
+
+class BackendOverloaded(Exception):
+    def __init__(self, route: Text, reason: Text) -> None:
+        super().__init__(f"route '{route}' overloaded ({reason})")
+        self.route = route
+        self.reason = reason
+
+
+class RouteLimiter:
+    """Membatasi request bersamaan ke satu route backend.
+
+    Request yang tidak kebagian slot menunggu di antrean berprioritas yang
+    panjangnya dibatasi; jika antrean penuh atau menunggu terlalu lama,
+    request langsung ditolak dengan `BackendOverloaded`.
+    """
+
+    def __init__(self, route: Text, max_concurrency: int, max_queue: int, max_wait: float) -> None:
+        self.route = route
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.max_wait = max_wait
+        self.active = 0
+        self.queued = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    async def acquire(self, priority: int) -> None:
+        started = time.monotonic()
+        if self.active < self.max_concurrency and self.queued == 0:
+            self.active += 1
+            self._record_wait(started, priority)
+            return
+
+        if self.queued >= self.max_queue:
+            worst = self._worst_waiter()
+            if worst is None or worst[0] <= priority:
+                self._shed("queue_full", priority)
+            self._reject_waiter(worst, "displaced")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        entry = (priority, next(self._seq), future)
+        heapq.heappush(self._waiters, entry)
+        self.queued += 1
+        timer = loop.call_later(self.max_wait, self._reject_waiter, entry, "timeout")
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                self.queued -= 1
+            elif future.done() and future.exception() is None:
+                self.release()
+            raise
+        finally:
+            timer.cancel()
+        self._record_wait(started, priority)
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.queued -= 1
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def _worst_waiter(self) -> Optional[Tuple[int, int, asyncio.Future]]:
+        live = [w for w in self._waiters if not w[2].done()]
+        return max(live) if live else None
+
+    def _reject_waiter(self, entry: Tuple[int, int, asyncio.Future], reason: Text) -> None:
+        future = entry[2]
+        if future.done():
+            return
+        self.queued -= 1
+        future.set_exception(BackendOverloaded(self.route, reason))
+        METRICS.inc("admission_shed_total", route=self.route,
+                    reason=reason, priority=entry[0])
+
+    def _shed(self, reason: Text, priority: int) -> None:
+        METRICS.inc("admission_shed_total", route=self.route,
+                    reason=reason, priority=priority)
+        raise BackendOverloaded(self.route, reason)
+
+    def _record_wait(self, started: float, priority: int) -> None:
+        METRICS.observe("admission_queue_seconds", time.monotonic() - started,
+                        route=self.route, priority=priority)
+
+
+class AdmissionController:
+    def __init__(self) -> None:
+        self.priorities = _load_priorities()
+        self.route_limits = _load_route_limits()
+        self.limiters: Dict[Text, RouteLimiter] = {}
+
+    def limiter(self, route: Text) -> RouteLimiter:
+        limiter = self.limiters.get(route)
+        if limiter is None:
+            concurrency, queue = self.route_limits.get(
+                route, (ADMISSION_MAX_CONCURRENCY, ADMISSION_MAX_QUEUE))
+            limiter = RouteLimiter(route, concurrency, queue, ADMISSION_MAX_WAIT_SECONDS)
+            self.limiters[route] = limiter
+        return limiter
+
+    def priority_for(self, action_name: Text) -> int:
+        return self.priorities.get(action_name, DEFAULT_PRIORITY)
+
+
+ADMISSION = AdmissionController()
+
+
+@asynccontextmanager
+async def admission_slot(route: Text, action_name: Text):
+    """Menahan satu slot konkurensi route backend selama blok berjalan."""
+    limiter = ADMISSION.limiter(route)
+    await limiter.acquire(ADMISSION.priority_for(action_name))
+    try:
+        yield
+    finally:
+        limiter.release()
+
+
+def reply_overloaded(dispatcher: CollectingDispatcher, action_name: Text, cache_key: Text = "") -> None:
+    """Balasan cepat saat request ditolak: jawaban terakhir jika ada, jika tidak minta coba lagi."""
+    cached_text = LAST_REPLY_CACHE.recall(action_name, cache_key)
+    if cached_text:
+        dispatcher.utter_message(text=cached_text)
+    else:
+        dispatcher.utter_message(text=OVERLOADED_REPLY)
+
+
+def _collect_admission_stats():
+    for route, limiter in ADMISSION.limiters.items():
+        yield "admission_active_requests", {"route": route}, limiter.active
+        yield "admission_queued_requests", {"route": route}, limiter.queued
+
+
+METRICS.register_collector(_collect_admission_stats)
@@ -0,0 +1,421 @@
+import copy
+import hashlib
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Text, Tuple
+
+from .action_constants import (
+    LAST_REPLY_MAX_AGE_SECONDS,
+    LAST_REPLY_MAX_BYTES,
+    NEGATIVE_CACHE_MAX_BYTES,
+    NEGATIVE_CACHE_MAX_ENTRIES,
+    NEGATIVE_CACHE_TTL_SECONDS,
+    PRODUCT_DETAIL_CACHE_MAX_BYTES,
+    PRODUCT_DETAIL_CACHE_TTL_SECONDS,
+    RESPONSE_CACHE_MAX_BYTES,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_TTL_SECONDS,
+)
+from .action_memory import ByteBudget, register_cache
+from .action_metrics import METRICS
+from .action_tracing import span
+
+
+def normalize_search_term(term: Text) -> Text:
+    """Menyamakan bentuk kata kunci: NFKC, huruf kecil, spasi dirapikan."""
+    return " ".join(unicodedata.normalize("NFKC", term).casefold().split())
+
+
+# Versi katalog per jenis ("product", "shop"). Naik setiap kali daftar lengkap
+# dari backend berbeda dari yang terakhir dilihat.
+_catalog_versions: Dict[Text, int] = {}
+_catalog_fingerprints: Dict[Text, Text] = {}
+_catalog_listeners: List[Callable[[Text, int], None]] = []
+
+
+def catalog_version(kind: Text) -> int:
+    return _catalog_versions.get(kind, 0)
+
+
+def on_catalog_refresh(listener: Callable[[Text, int], None]) -> None:
+    _catalog_listeners.append(listener)
+
+
+def bump_catalog_version(kind: Text) -> int:
+    version = _catalog_versions.get(kind, 0) + 1
+    _catalog_versions[kind] = version
+    for listener in _catalog_listeners:
+        listener(kind, version)
+    return version
+
+
+def catalog_fingerprint(records: Iterable[Dict[Text, Any]]) -> Text:
+    digest = hashlib.sha1()
+    for record in records:
+        digest.update(repr(sorted(record.items())).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def note_catalog_fingerprint(kind: Text, fingerprint: Text) -> bool:
+    """Mengembalikan True jika isi katalog berubah dan versinya dinaikkan."""
+    previous = _catalog_fingerprints.get(kind)
+    _catalog_fingerprints[kind] = fingerprint
+    if previous is None or previous == fingerprint:
+        return False
+    bump_catalog_version(kind)
+    return True
+
+
+def note_catalog_listing(kind: Text, records: Iterable[Dict[Text, Any]]) -> bool:
+    """Dipanggil setelah daftar lengkap (mis. /product, /shop) berhasil diambil."""
+    return note_catalog_fingerprint(kind, catalog_fingerprint(records))
+
+
+class NegativeSearchCache:
+    """Cache terbatas untuk kata kunci pencarian yang hasilnya kosong.
+
+    Setiap hit berarti satu panggilan backend yang tidak perlu dilakukan.
+    """
+
+    def __init__(self, name: Text, max_entries: int, ttl_seconds: float, max_bytes: int = 0) -> None:
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.budget = ByteBudget(max_bytes)
+        self._entries: "OrderedDict[Tuple[Text, Text], float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def contains(self, kind: Text, term: Text) -> bool:
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return False
+        with span("cache.lookup", cache=self.name, kind=kind) as lookup:
+            key = (kind, normalize_search_term(term))
+            expires_at = self._entries.get(key)
+            if expires_at is not None and expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                METRICS.inc("negative_cache_hits_total", cache=self.name, kind=kind)
+                lookup.set(hit=True)
+                return True
+            if expires_at is not None:
+                del self._entries[key]
+                self.budget.release(key)
+            self.misses += 1
+            METRICS.inc("negative_cache_misses_total", cache=self.name, kind=kind)
+            lookup.set(hit=False)
+            return False
+
+    def add(self, kind: Text, term: Text) -> None:
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        key = (kind, normalize_search_term(term))
+        self._entries[key] = time.monotonic() + self.ttl_seconds
+        self._entries.move_to_end(key)
+        self.budget.charge(key, self._entries[key])
+        while len(self._entries) > self.max_entries or self.budget.exceeded():
+            evicted, _ = self._entries.popitem(last=False)
+            self.budget.release(evicted)
+            self.evictions += 1
+
+    def invalidate(self, kind: Optional[Text] = None) -> None:
+        if kind is None:
+            self._entries.clear()
+            self.budget.clear()
+            return
+        for key in [k for k in self._entries if k[0] == kind]:
+            del self._entries[key]
+            self.budget.release(key)
+
+    def evict_matching(self, kind: Text, names: Iterable[Text]) -> int:
+        """Buang kata kunci kosong yang kini cocok dengan nama record yang berubah."""
+        names = [normalize_search_term(name) for name in names]
+        stale = [k for k in self._entries if k[0] == kind and any(k[1] in name for name in names)]
+        for key in stale:
+            del self._entries[key]
+            self.budget.release(key)
+        return len(stale)
+
+    def stats(self) -> Dict[Text, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.budget.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "absorbed_backend_calls": self.hits,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+NEGATIVE_SEARCH_CACHE = NegativeSearchCache(
+    "negative_search", NEGATIVE_CACHE_MAX_ENTRIES, NEGATIVE_CACHE_TTL_SECONDS, NEGATIVE_CACHE_MAX_BYTES)
+
+register_cache(NEGATIVE_SEARCH_CACHE.name, NEGATIVE_SEARCH_CACHE.stats)
+
+on_catalog_refresh(lambda kind, version: NEGATIVE_SEARCH_CACHE.invalidate(kind))
+
+
+class LastReplyCache:
+    """Menyimpan balasan sukses terakhir per (action, kata kunci).
+
+    Dipakai sebagai jawaban cadangan ketika request ke backend ditolak
+    karena beban penuh; boleh sedikit basi selama masih di bawah `max_age`.
+    """
+
+    def __init__(self, max_entries: int, max_age_seconds: float, max_bytes: int = 0) -> None:
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.budget = ByteBudget(max_bytes)
+        self.evictions = 0
+        self._entries: "OrderedDict[Tuple[Text, Text], Tuple[float, Text]]" = OrderedDict()
+
+    def remember(self, action_name: Text, key: Text, text: Text) -> None:
+        cache_key = (action_name, normalize_search_term(key))
+        self._entries[cache_key] = (time.monotonic(), text)
+        self._entries.move_to_end(cache_key)
+        self.budget.charge(cache_key, self._entries[cache_key])
+        while len(self._entries) > self.max_entries or self.budget.exceeded():
+            evicted, _ = self._entries.popitem(last=False)
+            self.budget.release(evicted)
+            self.evictions += 1
+
+    def recall(self, action_name: Text, key: Text) -> Optional[Text]:
+        entry = self._entries.get((action_name, normalize_search_term(key)))
+        if entry is None or time.monotonic() - entry[0] > self.max_age_seconds:
+            return None
+        return entry[1]
+
+    def stats(self) -> Dict[Text, int]:
+        return {"entries": len(self._entries), "bytes": self.budget.bytes, "evictions": self.evictions}
+
+
+LAST_REPLY_CACHE = LastReplyCache(256, LAST_REPLY_MAX_AGE_SECONDS, LAST_REPLY_MAX_BYTES)
+
+register_cache("last_reply", LAST_REPLY_CACHE.stats)
+
+
+class CachedResponse:
+    def __init__(self, messages: List[Dict[Text, Any]], events: List[Dict[Text, Any]], items: Any) -> None:
+        self.messages = messages
+        self.events = events
+        self.items = items
+
+
+class ResponseCache:
+    """Cache balasan akhir (pesan dispatcher + events) action katalog anonim.
+
+    Kunci: (action, input yang dinormalisasi, kind, versi katalog kind).
+    Versi naik saat isi katalog berubah sehingga entri lama tidak pernah
+    terpakai lagi; entri kind tersebut juga langsung dibuang.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, max_bytes: int = 0) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.budget = ByteBudget(max_bytes)
+        self._entries: "OrderedDict[Tuple[Text, Text, Text, int], Tuple[float, CachedResponse]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def key(self, action_name: Text, kind: Text, query: Optional[Text]) -> Tuple[Text, Text, Text, int]:
+        return (action_name, normalize_search_term(query or ""), kind, catalog_version(kind))
+
+    def get(self, key: Tuple[Text, Text, Text, int]) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            METRICS.inc("response_cache_hits_total", action=key[0])
+            # Salinan agar pemanggil bebas mengubah pesan/event yang dikirim.
+            return CachedResponse(copy.deepcopy(entry[1].messages),
+                                  copy.deepcopy(entry[1].events), entry[1].items)
+        if entry is not None:
+            del self._entries[key]
+            self.budget.release(key)
+        self.misses += 1
+        METRICS.inc("response_cache_misses_total", action=key[0])
+        return None
+
+    def put(self, key: Tuple[Text, Text, Text, int], response: CachedResponse) -> None:
+        if key[3] != catalog_version(key[2]):
+            # Katalog berubah selama action berjalan.
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, CachedResponse(
+            copy.deepcopy(response.messages), copy.deepcopy(response.events), response.items))
+        self._entries.move_to_end(key)
+        # `items` dipakai bersama dengan pemanggil, jadi ikut dihitung.
+        self.budget.charge(key, self._entries[key])
+        while len(self._entries) > self.max_entries or self.budget.exceeded():
+            evicted, _ = self._entries.popitem(last=False)
+            self.budget.release(evicted)
+            self.evictions += 1
+
+    def invalidate(self, kind: Optional[Text] = None) -> None:
+        if kind is None:
+            self._entries.clear()
+            self.budget.clear()
+            return
+        for key in [k for k in self._entries if k[2] == kind]:
+            del self._entries[key]
+            self.budget.release(key)
+
+    def evict_records(self, kind: Text, record_ids: Iterable[Text], names: Iterable[Text],
+                      field: Text = "id") -> int:
+        """Buang balasan `kind` yang item-nya merujuk salah satu record lewat `field`, atau
+        yang query-nya cocok dengan nama baru record (record baru/berganti nama bisa ikut muncul)."""
+        record_ids = {str(record_id) for record_id in record_ids}
+        names = [normalize_search_term(name) for name in names]
+        stale = []
+        for key, (_, response) in self._entries.items():
+            if key[2] != kind:
+                continue
+            items = response.items or []
+            if any(key[1] in name for name in names) \
+                    or any(isinstance(item, dict) and str(item.get(field)) in record_ids for item in items):
+                stale.append(key)
+        for key in stale:
+            del self._entries[key]
+            self.budget.release(key)
+        return len(stale)
+
+    def stats(self) -> Dict[Text, int]:
+        return {"entries": len(self._entries), "bytes": self.budget.bytes, "evictions": self.evictions}
+
+
+RESPONSE_CACHE = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_BYTES)
+
+register_cache("response", RESPONSE_CACHE.stats)
+
+def _invalidate_responses(kind: Text, version: int) -> None:
+    RESPONSE_CACHE.invalidate(kind)
+    if kind == "shop":
+        # Balasan produk ikut menampilkan nama/alamat toko penjual.
+        RESPONSE_CACHE.invalidate("product")
+
+
+on_catalog_refresh(_invalidate_responses)
+
+
+# Field yang dipakai balasan detail produk; record dari daftar/pencarian baru
+# dianggap lengkap jika memuat semuanya.
+DETAIL_FIELDS = ("_id", "name", "price", "description", "category", "stock")
+# Dari satu daftar hanya sekian record pertama yang disimpan, agar daftar
+# katalog penuh tidak menggusur seluruh isi cache.
+DETAIL_FILL_LIMIT = 50
+
+
+class ProductDetailCache:
+    """Cache LRU record detail produk per id, dibatasi byte dan berumur TTL.
+
+    Diisi dari GET /product/{id} dan dari record lengkap di respons daftar/
+    pencarian produk. Umur entri dihitung dari waktu data diambil dari
+    backend, jadi record dari snapshot katalog bisa langsung dianggap basi.
+    """
+
+    def __init__(self, ttl_seconds: float, max_bytes: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.budget = ByteBudget(max_bytes)
+        self._entries: "OrderedDict[Text, Tuple[float, Dict[Text, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get(self, product_id: Text) -> Optional[Dict[Text, Any]]:
+        """Record yang masih segar; dipakai bersama, pemanggil tidak boleh mengubahnya."""
+        if not self.enabled:
+            return None
+        key = str(product_id)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] + self.ttl_seconds > time.time():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            METRICS.inc("product_detail_cache_hits_total")
+            return entry[1]
+        if entry is not None:
+            del self._entries[key]
+            self.budget.release(key)
+        self.misses += 1
+        METRICS.inc("product_detail_cache_misses_total")
+        return None
+
+    def peek(self, product_id: Text) -> Optional[Dict[Text, Any]]:
+        """Seperti `get` tetapi tanpa mengubah urutan LRU maupun counter."""
+        entry = self._entries.get(str(product_id))
+        if entry is None or entry[0] + self.ttl_seconds <= time.time():
+            return None
+        return entry[1]
+
+    def contains(self, product_id: Text) -> bool:
+        return self.peek(product_id) is not None
+
+    def put(self, record: Dict[Text, Any], fetched_at: Optional[float] = None) -> bool:
+        if not self.enabled or record.get("_id") is None:
+            return False
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        if fetched_at + self.ttl_seconds <= time.time():
+            return False
+        key = str(record["_id"])
+        existing = self._entries.get(key)
+        if existing is not None and existing[0] > fetched_at:
+            # Jangan timpa data yang lebih baru dengan data snapshot yang lebih lama.
+            return False
+        self._entries[key] = (fetched_at, record)
+        self._entries.move_to_end(key)
+        self.budget.charge(key, record)
+        while self.budget.exceeded() and len(self._entries) > 1:
+            evicted, _ = self._entries.popitem(last=False)
+            self.budget.release(evicted)
+            self.evictions += 1
+            METRICS.inc("product_detail_cache_evictions_total")
+        return True
+
+    def put_many(self, records: Any, fetched_at: Optional[float] = None) -> int:
+        """Menyimpan record lengkap dari respons daftar/pencarian produk."""
+        if not self.enabled or not isinstance(records, list):
+            return 0
+        stored = 0
+        for record in records[:DETAIL_FILL_LIMIT]:
+            if isinstance(record, dict) and all(field in record for field in DETAIL_FIELDS):
+                stored += self.put(record, fetched_at)
+        return stored
+
+    def evict(self, product_ids: Iterable[Text]) -> int:
+        evicted = 0
+        for product_id in product_ids:
+            if self._entries.pop(str(product_id), None) is not None:
+                self.budget.release(str(product_id))
+                evicted += 1
+        return evicted
+
+    def stats(self) -> Dict[Text, Any]:
+        return {"entries": len(self._entries), "bytes": self.budget.bytes, "evictions": self.evictions,
+                "hits": self.hits, "misses": self.misses}
+
+
+PRODUCT_DETAIL_CACHE = ProductDetailCache(PRODUCT_DETAIL_CACHE_TTL_SECONDS, PRODUCT_DETAIL_CACHE_MAX_BYTES)
+
+register_cache("product_detail", PRODUCT_DETAIL_CACHE.stats)
+
+
+def _collect_negative_cache_stats():
+    stats = NEGATIVE_SEARCH_CACHE.stats()
+    labels = {"cache": NEGATIVE_SEARCH_CACHE.name}
+    yield "negative_cache_entries", labels, stats["entries"]
+    yield "negative_cache_evictions", labels, stats["evictions"]
+    yield "negative_cache_absorbed_backend_calls", labels, stats["absorbed_backend_calls"]
+
+
+METRICS.register_collector(_collect_negative_cache_stats)
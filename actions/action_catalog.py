@@ -0,0 +1,598 @@
+import asyncio
+import contextlib
+import functools
+import json
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Text, Tuple
+
+from .action_cache import bump_catalog_version, normalize_search_term, note_catalog_fingerprint
+from .action_catalog_snapshot import MappedSnapshot, product_shop_id, write_snapshot_from_bodies
+from .action_constants import (
+    CATALOG_POLL_SECONDS,
+    CATALOG_REFRESH_SECONDS,
+    CATALOG_ROLE,
+    CATALOG_SNAPSHOT_DIR,
+)
+from .action_http import get_body
+from .action_memory import register_cache
+from .action_metrics import METRICS
+from .action_tracing import detach_context
+from .action_workers import run_in_worker
+
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = "refresher.lock"
+KEEP_SNAPSHOTS = 3
+PATCH_OVERLAP_SECONDS = 60.0
+# Log patch bersama: worker yang menerima POST /invalidate menulis, semua worker membaca.
+PATCH_LOG_FILE = "patches.jsonl"
+PATCH_LOG_LOCK_FILE = "patches.lock"
+PATCH_LOG_MAX_BYTES = 1024 * 1024
+
+
+def _default_snapshot_dir() -> Text:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "ayambakarnusantara-catalog")
+
+
+class CatalogStore:
+    """Snapshot katalog bersama untuk semua proses action server di satu host.
+
+    Satu proses (pemegang lock file) menjadi refresher: mengambil /product
+    dan /shop secara berkala lalu menerbitkan snapshot berversi ke
+    CATALOG_SNAPSHOT_DIR (default di /dev/shm). Proses lain hanya memetakan
+    file tersebut dan berpindah ke versi baru saat CURRENT berubah.
+
+    Patch per record (POST /invalidate) diterima satu worker saja, jadi
+    ditulis ke PATCH_LOG_FILE di direktori yang sama; setiap worker membaca
+    entri baru di siklus poll dan menerapkannya lewat `on_remote_patches`.
+    """
+
+    def __init__(self, directory: Text, role: Text, refresh_seconds: float, poll_seconds: float) -> None:
+        self.directory = directory
+        self.role = role
+        self.refresh_seconds = refresh_seconds
+        self.poll_seconds = poll_seconds
+        self.is_refresher = False
+        self._snapshot: Optional[MappedSnapshot] = None
+        self._current_name: Optional[Text] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock_fd: Optional[int] = None
+        self._last_refresh = 0.0
+        # Perubahan per record dari POST /invalidate yang belum masuk snapshot:
+        # (kind, id) -> (waktu, record baru atau None jika dihapus).
+        self._patches: Dict[Tuple[Text, Text], Tuple[float, Optional[Dict[Text, Any]]]] = {}
+        self._patch_generation = 0
+        # (generasi patch, (kind, id)) sejak snapshot dimuat; dipakai CatalogView
+        # untuk memperbarui struktur turunan hanya pada record yang berubah.
+        self._patch_keys: List[Tuple[int, Tuple[Text, Text]]] = []
+        self._listeners: List[Callable[[], None]] = []
+        # Posisi baca log patch bersama; entri tulisan proses ini dilewati.
+        self._origin = os.urandom(8).hex()
+        self._log_position: Tuple[Optional[int], int] = (None, 0)
+        self._log_handlers: List[Callable[[List[Dict[Text, Any]]], None]] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.refresh_seconds > 0 and self.role != "off"
+
+    def current(self) -> Optional[MappedSnapshot]:
+        """Snapshot terbaru, atau None jika belum ada atau sudah terlalu basi."""
+        self.ensure_running()
+        snapshot = self._snapshot
+        if snapshot is None or time.time() - snapshot.created_at > 3 * self.refresh_seconds:
+            return None
+        return snapshot
+
+    def patch(self, kind: Text, record_id: Text, record: Optional[Dict[Text, Any]],
+              at: Optional[float] = None) -> None:
+        """Timpa satu record snapshot (None = dihapus) tanpa memuat ulang katalog."""
+        at = time.time() if at is None else at
+        snapshot = self._snapshot
+        if snapshot is not None and at <= snapshot.created_at - PATCH_OVERLAP_SECONDS:
+            # Entri log lama yang sudah tercakup snapshot.
+            return
+        self._patches[(kind, str(record_id))] = (at, record)
+        self._patch_generation += 1
+        self._patch_keys.append((self._patch_generation, (kind, str(record_id))))
+        self._notify()
+
+    def on_change(self, listener: Callable[[], None]) -> None:
+        """`listener()` dipanggil setiap snapshot baru dimuat atau record di-patch."""
+        self._listeners.append(listener)
+
+    def on_remote_patches(self, handler: Callable[[List[Dict[Text, Any]]], None]) -> None:
+        """`handler(entries)` dipanggil untuk entri log patch yang ditulis proses lain."""
+        self._log_handlers.append(handler)
+
+    def publish_patches(self, entries: List[Dict[Text, Any]]) -> None:
+        """Menambahkan entri (dict JSON) ke log patch bersama untuk worker lain."""
+        if not entries:
+            return
+        now = time.time()
+        data = "".join(
+            json.dumps(dict(entry, time=now, origin=self._origin), ensure_ascii=False) + "\n"
+            for entry in entries).encode("utf-8")
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, PATCH_LOG_FILE)
+        with self._patch_log_lock():
+            try:
+                if os.path.getsize(path) > PATCH_LOG_MAX_BYTES:
+                    self._compact_patch_log(path, now)
+            except FileNotFoundError:
+                pass
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+
+    def _patch_log_lock(self):
+        try:
+            import fcntl
+        except ImportError:
+            return contextlib.nullcontext()
+
+        @contextlib.contextmanager
+        def locked():
+            fd = os.open(os.path.join(self.directory, PATCH_LOG_LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                os.close(fd)
+        return locked()
+
+    def _compact_patch_log(self, path: Text, now: float) -> None:
+        # Snapshot yang lebih tua dari 3x interval refresh tidak dipakai lagi,
+        # jadi entri sebelum itu tidak dibutuhkan worker mana pun.
+        cutoff = now - 3 * max(self.refresh_seconds, 0.0) - PATCH_OVERLAP_SECONDS
+        with open(path, "rb") as f:
+            lines = [line for line in f if line.endswith(b"\n") and _entry_time(line) > cutoff]
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            f.writelines(lines)
+        # File baru punya inode lain: pembaca mulai lagi dari awal (entri idempoten).
+        os.replace(tmp_path, path)
+
+    def sync_patch_log(self) -> int:
+        """Menerapkan entri log patch baru dari proses lain; mengembalikan jumlahnya."""
+        try:
+            f = open(os.path.join(self.directory, PATCH_LOG_FILE), "rb")
+        except FileNotFoundError:
+            return 0
+        with f:
+            inode = os.fstat(f.fileno()).st_ino
+            known_inode, offset = self._log_position
+            if inode != known_inode or os.fstat(f.fileno()).st_size < offset:
+                offset = 0
+            f.seek(offset)
+            data = f.read()
+        # Baris terakhir yang belum lengkap dibaca lagi di siklus berikutnya.
+        complete = data[:data.rfind(b"\n") + 1]
+        self._log_position = (inode, offset + len(complete))
+        entries = []
+        for line in complete.splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict) and entry.get("origin") != self._origin:
+                entries.append(entry)
+        if entries:
+            for handler in self._log_handlers:
+                try:
+                    handler(entries)
+                except Exception as e:
+                    print(f"Catalog: handler log patch {handler!r} gagal: {e!r}")
+            METRICS.inc("catalog_patch_log_entries_total", len(entries))
+        return len(entries)
+
+    def _notify(self) -> None:
+        for listener in self._listeners:
+            try:
+                listener()
+            except Exception as e:
+                print(f"Catalog: listener {listener!r} gagal: {e!r}")
+
+    def generation(self) -> Optional[Tuple[int, int]]:
+        """Identitas isi katalog saat ini (versi snapshot, jumlah patch); None jika tidak ada snapshot."""
+        snapshot = self.current()
+        if snapshot is None:
+            return None
+        return snapshot.version, self._patch_generation
+
+    def changes_since(self, generation: Optional[Tuple[int, int]]
+                      ) -> Optional[Dict[Tuple[Text, Text], Optional[Dict[Text, Any]]]]:
+        """Record yang di-patch sejak `generation`: (kind, id) -> record (None = dihapus).
+
+        None jika snapshot sudah berganti, sehingga struktur turunan harus dibangun ulang.
+        """
+        current = self.generation()
+        if current is None or generation is None or generation[0] != current[0]:
+            return None
+        keys = {key for patch_generation, key in self._patch_keys if patch_generation > generation[1]}
+        return {key: self._patches[key][1] for key in keys if key in self._patches}
+
+    def records(self, kind: Text) -> Optional[List[Dict[Text, Any]]]:
+        """Semua record `kind` dari snapshot terbaru beserta patch; None jika tidak ada."""
+        snapshot = self.current()
+        if snapshot is None or not getattr(snapshot, f"{kind}_count"):
+            return None
+        records = snapshot.products() if kind == "product" else snapshot.shops()
+        # Bisa dipanggil dari thread worker: salin dulu item patch yang ada.
+        patches = {record_id: record for (k, record_id), (_, record) in list(self._patches.items())
+                   if k == kind}
+        if not patches:
+            return records
+        patched = []
+        for record in records:
+            record_id = str(record.get("_id"))
+            if record_id in patches:
+                replacement = patches.pop(record_id)
+                if replacement is not None:
+                    patched.append(replacement)
+            else:
+                patched.append(record)
+        # Record baru yang belum ada di snapshot.
+        patched.extend(record for record in patches.values() if record is not None)
+        return patched
+
+    def _patched(self, kind: Text, record_id: Optional[Text],
+                 record: Optional[Dict[Text, Any]]) -> Optional[Dict[Text, Any]]:
+        patch = self._patches.get((kind, str(record_id)))
+        return record if patch is None else patch[1]
+
+    def record(self, kind: Text, record_id: Text) -> Optional[Dict[Text, Any]]:
+        """Record `kind` dengan id tersebut dari snapshot beserta patch; None jika tidak ada."""
+        snapshot = self.current()
+        if snapshot is None:
+            return None
+        lookup = snapshot.product_by_id if kind == "product" else snapshot.shop_by_id
+        return self._patched(kind, record_id, lookup(record_id))
+
+    def shop(self, shop_id: Optional[Text]) -> Optional[Dict[Text, Any]]:
+        snapshot = self.current()
+        if snapshot is None or shop_id is None:
+            return None
+        return self._patched("shop", shop_id, snapshot.shop_by_id(shop_id))
+
+    def shop_for_product(self, product: Dict[Text, Any]) -> Optional[Dict[Text, Any]]:
+        """Toko penjual produk dari join index snapshot (tanpa request ke backend)."""
+        return self.shop(product_shop_id(product))
+
+    def find_shop(self, name: Text) -> Optional[Dict[Text, Any]]:
+        """Toko dengan nama persis (index), atau yang namanya memuat `name`."""
+        snapshot = self.current()
+        if snapshot is None:
+            return None
+        exact = snapshot.shop_by_name(name)
+        if exact is not None:
+            exact = self._patched("shop", exact.get("_id"), exact)
+            if exact is not None:
+                return exact
+        wanted = normalize_search_term(name)
+        for shop in self.records("shop") or []:
+            if wanted in normalize_search_term(shop.get("shopName") or ""):
+                return shop
+        return None
+
+    def products_of_shop(self, shop_id: Text) -> Optional[List[Dict[Text, Any]]]:
+        snapshot = self.current()
+        if snapshot is None:
+            return None
+        shop_id = str(shop_id)
+        products = []
+        for product in snapshot.products_of_shop(shop_id):
+            product_id = str(product.get("_id"))
+            if ("product", product_id) not in self._patches:
+                products.append(product)
+        # Produk yang di-patch (baru, pindah toko, atau berubah) diambil dari patch.
+        for (kind, _), (_, record) in self._patches.items():
+            if kind == "product" and record is not None and product_shop_id(record) == shop_id:
+                products.append(record)
+        return products
+
+    def memory_stats(self) -> Dict[Text, int]:
+        # Snapshot di-mmap dari file bersama: halaman dibagi antar worker, bukan heap.
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {"entries": 0, "bytes": 0, "evictions": 0}
+        return {"entries": snapshot.product_count + snapshot.shop_count,
+                "bytes": os.path.getsize(snapshot.path), "evictions": 0}
+
+    def ensure_running(self) -> None:
+        # Tanpa snapshot (CATALOG_ROLE=off) loop tetap membaca log patch.
+        if self._task is not None or not (self.enabled or self._log_handlers):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        # Task ini dibuat dari dalam Action.run; refresh katalog bukan bagian
+        # dari trace percakapan tersebut.
+        detach_context()
+        os.makedirs(self.directory, exist_ok=True)
+        while True:
+            if self.enabled:
+                try:
+                    if self._try_become_refresher() and \
+                            time.monotonic() - self._last_refresh >= self.refresh_seconds:
+                        await self.refresh()
+                    await self.load_current()
+                except Exception as e:
+                    print(f"Catalog: siklus refresh/poll gagal: {e}")
+                    METRICS.inc("catalog_errors_total")
+            try:
+                self.sync_patch_log()
+            except Exception as e:
+                print(f"Catalog: membaca log patch gagal: {e!r}")
+                METRICS.inc("catalog_errors_total")
+            await asyncio.sleep(self.poll_seconds)
+
+    def _try_become_refresher(self) -> bool:
+        if self.is_refresher or self.role == "reader":
+            return self.is_refresher
+        if self.role == "refresher":
+            self.is_refresher = True
+            return True
+        try:
+            import fcntl
+        except ImportError:
+            self.is_refresher = True
+            return True
+        fd = os.open(os.path.join(self.directory, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        self.is_refresher = True
+        print(f"Catalog: proses {os.getpid()} menjadi refresher snapshot katalog.")
+        return True
+
+    async def _fetch_body(self, path: Text, route: Text) -> bytes:
+        status, body = await get_body(route, path, "catalog_refresh")
+        if status != 200:
+            raise RuntimeError(f"GET {path} status {status}")
+        return body
+
+    async def refresh(self) -> None:
+        started = time.monotonic()
+        product_body = await self._fetch_body("/product", "product_list")
+        shop_body = await self._fetch_body("/shop", "shop_list")
+        version = self._published_version() + 1
+        name = f"catalog-v{version}.snap"
+        # Decode JSON, build index dan tulis file berjalan di proses worker: yang
+        # dikirim hanya body mentah, hasilnya file yang langsung di-mmap.
+        await run_in_worker("catalog_snapshot", write_snapshot_from_bodies,
+                            os.path.join(self.directory, name), version, product_body, shop_body,
+                            process=True)
+        self._publish(name)
+        self._last_refresh = time.monotonic()
+        METRICS.inc("catalog_refresh_total")
+        METRICS.observe("catalog_refresh_seconds", self._last_refresh - started)
+        self._cleanup()
+
+    def _published_version(self) -> int:
+        name = self._read_current()
+        if not name:
+            return 0
+        try:
+            return int(name[len("catalog-v"):-len(".snap")])
+        except ValueError:
+            return 0
+
+    def _read_current(self) -> Optional[Text]:
+        try:
+            with open(os.path.join(self.directory, CURRENT_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _publish(self, name: Text) -> None:
+        current_path = os.path.join(self.directory, CURRENT_FILE)
+        tmp_path = f"{current_path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            f.write(name)
+        os.replace(tmp_path, current_path)
+
+    async def load_current(self) -> None:
+        name = self._read_current()
+        if not name or name == self._current_name:
+            return
+        # Parse footer dan index snapshot di thread worker.
+        snapshot = await run_in_worker("catalog_load", MappedSnapshot, os.path.join(self.directory, name))
+        first = self._snapshot is None
+        # Pergantian versi cukup satu assignment; pembaca lama tetap memegang
+        # snapshot sebelumnya sampai selesai.
+        self._snapshot = snapshot
+        self._current_name = name
+        # Patch yang jauh lebih lama dari snapshot sudah tercakup di dalamnya;
+        # margin menutup jeda antara pengambilan /product dan penulisan snapshot.
+        self._patches = {key: patch for key, patch in self._patches.items()
+                         if patch[0] > snapshot.created_at - PATCH_OVERLAP_SECONDS}
+        self._patch_keys = []
+        for kind, fingerprint in snapshot.fingerprints.items():
+            # Balasan yang di-cache sebelum ada snapshot dirender tanpa join toko
+            # ("Toko: ..."), jadi snapshot pertama selalu menaikkan versi.
+            if not note_catalog_fingerprint(kind, fingerprint) and first:
+                bump_catalog_version(kind)
+        self._notify()
+        METRICS.set_gauge("catalog_snapshot_version", snapshot.version)
+        METRICS.set_gauge("catalog_snapshot_bytes", os.path.getsize(snapshot.path))
+        print(
+            f"Catalog: memakai snapshot v{snapshot.version} "
+            f"({snapshot.product_count} produk, {snapshot.shop_count} toko).")
+
+    def _cleanup(self) -> None:
+        snapshots = sorted(
+            (f for f in os.listdir(self.directory)
+             if f.startswith("catalog-v") and f.endswith(".snap")),
+            key=lambda f: int(f[len("catalog-v"):-len(".snap")]))
+        for stale in snapshots[:-KEEP_SNAPSHOTS]:
+            try:
+                os.remove(os.path.join(self.directory, stale))
+            except OSError:
+                pass
+
+
+def _entry_time(line: bytes) -> float:
+    try:
+        return float(json.loads(line).get("time") or 0.0)
+    except (ValueError, AttributeError):
+        return 0.0
+
+
+CATALOG = CatalogStore(
+    CATALOG_SNAPSHOT_DIR or _default_snapshot_dir(),
+    CATALOG_ROLE,
+    CATALOG_REFRESH_SECONDS,
+    CATALOG_POLL_SECONDS,
+)
+
+register_cache("catalog_snapshot", CATALOG.memory_stats)
+
+
+_views: List["CatalogView"] = []
+
+
+async def catalog_patches_applied() -> None:
+    """Menunggu update per record CatalogView yang sedang berjalan; build penuh tidak ditunggu."""
+    while True:
+        pending = [view._task for view in _views if view._task is not None and view._task_mode == "patch"]
+        if not pending:
+            return
+        await asyncio.wait(pending)
+
+
+class CatalogView:
+    """Struktur turunan katalog (daftar record, index) yang dibangun di pool worker.
+
+    Setiap kali katalog berubah, versi baru dibangun di luar event loop lalu
+    menggantikan versi lama dengan satu assignment; selama build berjalan
+    pembaca tetap memakai versi lama. Hasil `build` dipakai bersama oleh
+    semua request sehingga tidak boleh diubah.
+
+    Jika `update(value, changes)` diberikan, patch per record (POST /invalidate)
+    diterapkan ke salinan versi terakhir tanpa decode ulang seluruh snapshot;
+    `changes` berisi (kind, id) -> record dari `CATALOG.changes_since`. Build
+    penuh hanya dilakukan saat snapshot berganti.
+    """
+
+    def __init__(self, name: Text, build: Callable[[], Any],
+                 update: Optional[Callable[[Any, Dict[Tuple[Text, Text], Any]], Any]] = None) -> None:
+        self.name = name
+        self._build = build
+        self._update = update
+        self._generation: Optional[Tuple[int, int]] = None
+        self._value: Any = None
+        self._task: Optional[asyncio.Task] = None
+        self._task_mode: Optional[Text] = None
+        _views.append(self)
+        CATALOG.on_change(self.refresh)
+
+    async def current(self) -> Any:
+        """Versi terbaru yang sudah jadi; hanya menunggu build jika belum ada versi sama sekali."""
+        generation = CATALOG.generation()
+        if generation is None:
+            return None
+        if generation != self._generation:
+            task = self.refresh()
+            if self._generation is None and task is not None:
+                await asyncio.shield(task)
+        return self._value
+
+    def stale(self) -> bool:
+        return self._generation != CATALOG.generation()
+
+    def refresh(self) -> Optional[asyncio.Task]:
+        if self._task is not None:
+            # Setelah selesai, build yang berjalan memeriksa ulang generasi katalog.
+            return self._task
+        generation = CATALOG.generation()
+        if generation is None:
+            self._generation, self._value = None, None
+            return None
+        if generation == self._generation:
+            return None
+        changes = None
+        if self._update is not None and self._value is not None:
+            changes = CATALOG.changes_since(self._generation)
+        if changes is not None:
+            mode, job = "patch", functools.partial(self._update, self._value, changes)
+        else:
+            mode, job = "build", self._build
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._value, self._generation = job(), generation
+            return None
+        self._task = loop.create_task(self._rebuild(generation, mode, job))
+        self._task_mode = mode
+        return self._task
+
+    async def _rebuild(self, generation: Tuple[int, int], mode: Text, job: Callable[[], Any]) -> None:
+        try:
+            value = await run_in_worker(self.name if mode == "build" else f"{self.name}_{mode}", job)
+            self._value, self._generation = value, generation
+            METRICS.inc("catalog_view_updates_total", view=self.name, mode=mode)
+        except Exception as e:
+            print(f"Catalog: {mode} {self.name} gagal: {e!r}")
+            METRICS.inc("catalog_errors_total")
+            if mode == "build":
+                return
+            # Patch gagal: bangun ulang penuh pada refresh berikutnya.
+            self._value = None
+        finally:
+            self._task = None
+        if CATALOG.generation() != self._generation:
+            self.refresh()
+
+
+def _sorted_records(kind: Text, key: Callable[[Dict[Text, Any]], Any],
+                    reverse: bool) -> Optional[List[Dict[Text, Any]]]:
+    records = CATALOG.records(kind)
+    if records is None:
+        return None
+    try:
+        return sorted(records, key=key, reverse=reverse)
+    except TypeError:
+        return records
+
+
+def _patch_sorted(kind: Text, key: Callable[[Dict[Text, Any]], Any], reverse: bool,
+                  records: List[Dict[Text, Any]],
+                  changes: Dict[Tuple[Text, Text], Optional[Dict[Text, Any]]]) -> List[Dict[Text, Any]]:
+    changed = {record_id: record for (k, record_id), record in changes.items() if k == kind}
+    if not changed:
+        return records
+    patched = [record for record in records if str(record.get("_id")) not in changed]
+    patched.extend(record for record in changed.values() if record is not None)
+    try:
+        # Sisa daftar masih terurut: sort ulang hanya O(n).
+        patched.sort(key=key, reverse=reverse)
+    except TypeError:
+        pass
+    return patched
+
+
+# Daftar record lengkap untuk list_products/list_shop, di-decode sekali per
+# generasi katalog. Urutannya sama dengan rank kedua action tersebut (rating
+# tertinggi, nama toko) sehingga sort per request pada data yang sudah
+# terurut hanya O(n).
+CATALOG_LISTINGS = {
+    kind: CatalogView(
+        f"{kind}_listing",
+        functools.partial(_sorted_records, kind, key, reverse),
+        functools.partial(_patch_sorted, kind, key, reverse))
+    for kind, key, reverse in (
+        ("product", lambda p: (p.get("averageRating", 0.0), p.get("ratingCount", 0)), True),
+        ("shop", lambda s: s.get("shopName", "").lower(), False),
+    )
+}
@@ -0,0 +1,240 @@
+import bisect
+import heapq
+import itertools
+import re
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Text, Tuple
+
+from .action_cache import normalize_search_term
+from .action_catalog import CATALOG, CatalogView
+from .action_metrics import METRICS
+
+# Index faset in-memory atas katalog produk: posting list per kategori yang
+# terurut harga (range query dengan bisect) dan top-k berdasarkan rating.
+# Dibangun ulang (di luar event loop) setiap snapshot katalog berganti; record
+# yang di-patch lewat POST /invalidate diperbarui per posting list.
+
+PRICE_ASC = "price_asc"
+PRICE_DESC = "price_desc"
+RATING = "rating"
+
+_PRICE_UNITS = {"rb": 1e3, "ribu": 1e3, "ribuan": 1e3, "k": 1e3, "jt": 1e6, "juta": 1e6}
+_PRICE_PATTERN = re.compile(r"^(?:rp\.?\s*)?([\d.,]+)\s*([a-z]*)$")
+
+
+def parse_price(value: Any) -> Optional[float]:
+    """"15 ribu", "15rb", "15k", "Rp15.000", "1,5 juta" -> angka rupiah."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    match = _PRICE_PATTERN.match(normalize_search_term(value))
+    if not match:
+        return None
+    number, unit = match.groups()
+    if unit and unit not in _PRICE_UNITS:
+        return None
+    if unit:
+        # Dengan satuan, koma/titik adalah desimal ("1,5 juta").
+        number = number.replace(",", ".")
+        multiplier = _PRICE_UNITS[unit]
+    else:
+        # Tanpa satuan, koma/titik adalah pemisah ribuan ("15.000").
+        number = number.replace(".", "").replace(",", "")
+        multiplier = 1.0
+    try:
+        return float(number) * multiplier
+    except ValueError:
+        return None
+
+
+def _rating_key(product: Dict[Text, Any]) -> Tuple[float, int]:
+    try:
+        return float(product.get("averageRating") or 0.0), int(product.get("ratingCount") or 0)
+    except (TypeError, ValueError):
+        return 0.0, 0
+
+
+class _Posting:
+    """Ordinal produk terurut harga, dengan array harga paralel untuk bisect."""
+
+    __slots__ = ("prices", "ordinals", "unpriced")
+
+    def __init__(self, priced: List[Tuple[float, int]], unpriced: List[int]) -> None:
+        priced.sort()
+        self.prices = array("d", (price for price, _ in priced))
+        self.ordinals = array("I", (ordinal for _, ordinal in priced))
+        self.unpriced = array("I", unpriced)
+
+    def range(self, low: Optional[float], high: Optional[float]) -> Sequence[int]:
+        start = 0 if low is None else bisect.bisect_left(self.prices, low)
+        end = len(self.prices) if high is None else bisect.bisect_right(self.prices, high)
+        return self.ordinals[start:end]
+
+    def __len__(self) -> int:
+        return len(self.prices) + len(self.unpriced)
+
+    def copy(self) -> "_Posting":
+        posting = _Posting.__new__(_Posting)
+        posting.prices = array("d", self.prices)
+        posting.ordinals = array("I", self.ordinals)
+        posting.unpriced = array("I", self.unpriced)
+        return posting
+
+    def add(self, ordinal: int, price: Optional[float]) -> None:
+        if price is None:
+            self.unpriced.append(ordinal)
+            return
+        position = bisect.bisect_right(self.prices, price)
+        self.prices.insert(position, price)
+        self.ordinals.insert(position, ordinal)
+
+    def remove(self, ordinal: int, price: Optional[float]) -> None:
+        if price is None:
+            if ordinal in self.unpriced:
+                self.unpriced.remove(ordinal)
+            return
+        for position in range(bisect.bisect_left(self.prices, price), bisect.bisect_right(self.prices, price)):
+            if self.ordinals[position] == ordinal:
+                del self.prices[position]
+                del self.ordinals[position]
+                return
+
+
+def _category(product: Dict[Text, Any]) -> Text:
+    return normalize_search_term(str(product.get("category") or ""))
+
+
+class ProductFacetIndex:
+    def __init__(self, products: List[Dict[Text, Any]]) -> None:
+        self.products = products
+        self.ratings = [_rating_key(p) for p in products]
+        self.prices = [parse_price(p.get("price")) for p in products]
+        self._ordinals: Dict[Text, int] = {}
+        for ordinal, product in enumerate(products):
+            self._ordinals.setdefault(str(product.get("_id")), ordinal)
+        groups: Dict[Text, Tuple[List[Tuple[float, int]], List[int]]] = {}
+        everything: Tuple[List[Tuple[float, int]], List[int]] = ([], [])
+        for ordinal, product in enumerate(products):
+            category = _category(product)
+            price = self.prices[ordinal]
+            for priced, unpriced in (everything, groups.setdefault(category, ([], []))):
+                if price is None:
+                    unpriced.append(ordinal)
+                else:
+                    priced.append((price, ordinal))
+        self._all = _Posting(*everything)
+        self._categories = {category: _Posting(*group) for category, group in groups.items() if category}
+
+    def with_changes(self, changes: Dict[Text, Optional[Dict[Text, Any]]]) -> "ProductFacetIndex":
+        """Salinan index dengan produk `changes` (id -> record, None = dihapus) diperbarui.
+
+        Index ini tidak diubah (masih dipakai request lain); hanya posting list
+        yang terdampak yang disalin. Produk yang dihapus meninggalkan slot
+        kosong yang tidak lagi dirujuk posting list mana pun.
+        """
+        index = ProductFacetIndex.__new__(ProductFacetIndex)
+        index.products = list(self.products)
+        index.ratings = list(self.ratings)
+        index.prices = list(self.prices)
+        index._ordinals = dict(self._ordinals)
+        index._all = self._all.copy()
+        index._categories = dict(self._categories)
+        copied = set()
+
+        def posting(category: Text) -> _Posting:
+            if category not in copied:
+                existing = index._categories.get(category)
+                index._categories[category] = existing.copy() if existing is not None else _Posting([], [])
+                copied.add(category)
+            return index._categories[category]
+
+        for product_id, record in changes.items():
+            ordinal = index._ordinals.get(product_id)
+            if ordinal is not None:
+                price = index.prices[ordinal]
+                index._all.remove(ordinal, price)
+                category = _category(index.products[ordinal])
+                if category:
+                    posting(category).remove(ordinal, price)
+            if record is None:
+                if ordinal is not None:
+                    del index._ordinals[product_id]
+                    index.products[ordinal] = None
+                continue
+            if ordinal is None:
+                ordinal = len(index.products)
+                index._ordinals[product_id] = ordinal
+                index.products.append(record)
+                index.ratings.append(None)
+                index.prices.append(None)
+            price = parse_price(record.get("price"))
+            index.products[ordinal] = record
+            index.ratings[ordinal] = _rating_key(record)
+            index.prices[ordinal] = price
+            index._all.add(ordinal, price)
+            category = _category(record)
+            if category:
+                posting(category).add(ordinal, price)
+        for category in copied:
+            if not len(index._categories[category]):
+                del index._categories[category]
+        return index
+
+    def categories(self) -> List[Text]:
+        return sorted(self._categories)
+
+    def match_categories(self, category: Text) -> List[Text]:
+        """Kategori yang persis sama, atau yang memuat/dimuat kata kunci ("paket ayam" -> "paket")."""
+        wanted = normalize_search_term(category)
+        if wanted in self._categories:
+            return [wanted]
+        return [c for c in self._categories if c in wanted or wanted in c]
+
+    def query(self, categories: Optional[Iterable[Text]] = None, min_price: Optional[float] = None,
+              max_price: Optional[float] = None, order: Text = RATING,
+              k: int = 5) -> Tuple[int, List[Dict[Text, Any]]]:
+        """Mengembalikan (jumlah produk yang cocok, k produk teratas menurut `order`)."""
+        postings = [self._all] if categories is None else \
+            [self._categories[c] for c in categories if c in self._categories]
+        slices = [posting.range(min_price, max_price) for posting in postings]
+        # Produk tanpa harga angka hanya ikut jika tidak ada batas harga.
+        unpriced = [] if min_price is not None or max_price is not None or order != RATING else \
+            [posting.unpriced for posting in postings]
+        total = sum(len(s) for s in slices) + sum(len(u) for u in unpriced)
+        if order == PRICE_ASC:
+            merged = heapq.merge(*slices, key=self.prices.__getitem__)
+            top = list(itertools.islice(merged, k))
+        elif order == PRICE_DESC:
+            merged = heapq.merge(*(reversed(s) for s in slices),
+                                 key=self.prices.__getitem__, reverse=True)
+            top = list(itertools.islice(merged, k))
+        else:
+            top = heapq.nlargest(k, itertools.chain(*slices, *unpriced), key=self.ratings.__getitem__)
+        return total, [self.products[ordinal] for ordinal in top]
+
+
+def build_facet_index(products: List[Dict[Text, Any]]) -> ProductFacetIndex:
+    index = ProductFacetIndex(products)
+    METRICS.set_gauge("facet_index_products", len(products))
+    METRICS.set_gauge("facet_index_categories", len(index.categories()))
+    return index
+
+
+def _build_from_catalog() -> Optional[ProductFacetIndex]:
+    records = CATALOG.records("product")
+    return build_facet_index(records) if records is not None else None
+
+
+def _update_from_catalog(index: ProductFacetIndex, changes: Dict[Tuple[Text, Text], Any]) -> ProductFacetIndex:
+    products = {record_id: record for (kind, record_id), record in changes.items() if kind == "product"}
+    if not products:
+        return index
+    index = index.with_changes(products)
+    METRICS.set_gauge("facet_index_products", len(index._ordinals))
+    METRICS.set_gauge("facet_index_categories", len(index.categories()))
+    return index
+
+
+# Dibangun ulang di pool worker setiap snapshot berganti; patch diterapkan per record.
+FACET_INDEX = CatalogView("facet_index", _build_from_catalog, _update_from_catalog)
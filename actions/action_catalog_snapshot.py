@@ -0,0 +1,194 @@
+import json
+import mmap
+import os
+import struct
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Text
+
+from .action_cache import catalog_fingerprint, normalize_search_term
+
+# Format file snapshot (read-only, di-mmap oleh semua worker):
+#   prefix  : magic, offset footer, panjang footer
+#   section : blob record JSON, tabel offset uint32, index
+#   footer  : JSON metadata (versi, jumlah record, fingerprint, letak section)
+# Record tetap berada di file yang di-mmap dan baru di-decode saat diakses.
+MAGIC = b"ABNCAT01"
+_PREFIX = struct.Struct("<8sQQ")
+
+
+def _encode_records(records: List[Dict[Text, Any]]):
+    blobs = [json.dumps(r, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+             for r in records]
+    offsets = array("I", [0])
+    total = 0
+    for blob in blobs:
+        total += len(blob)
+        offsets.append(total)
+    return b"".join(blobs), offsets.tobytes()
+
+
+def product_shop_id(product: Dict[Text, Any]) -> Optional[Text]:
+    """Id toko penjual produk: field `shopId`, atau `shop` berupa id/objek."""
+    shop = product.get("shopId") or product.get("shop")
+    if isinstance(shop, dict):
+        shop = shop.get("_id")
+    return None if shop is None else str(shop)
+
+
+def build_index(products: List[Dict[Text, Any]], shops: List[Dict[Text, Any]]) -> Dict[Text, Any]:
+    index: Dict[Text, Any] = {
+        "product_ids": {}, "product_names": {}, "shop_ids": {}, "shop_names": {},
+        "shop_products": {}}
+    for i, product in enumerate(products):
+        if product.get("_id") is not None:
+            index["product_ids"][str(product["_id"])] = i
+        if product.get("name"):
+            index["product_names"].setdefault(normalize_search_term(product["name"]), i)
+        shop_id = product_shop_id(product)
+        if shop_id is not None:
+            # Join toko -> produk; arah produk -> toko cukup lewat shop_ids.
+            index["shop_products"].setdefault(shop_id, []).append(i)
+    for i, shop in enumerate(shops):
+        if shop.get("_id") is not None:
+            index["shop_ids"][str(shop["_id"])] = i
+        if shop.get("shopName"):
+            index["shop_names"].setdefault(normalize_search_term(shop["shopName"]), i)
+    return index
+
+
+def write_snapshot(path: Text, version: int, products: List[Dict[Text, Any]],
+                   shops: List[Dict[Text, Any]]) -> None:
+    """Menulis snapshot ke `path` secara atomik (tulis file sementara lalu rename)."""
+    sections = []
+    product_blob, product_offsets = _encode_records(products)
+    shop_blob, shop_offsets = _encode_records(shops)
+    sections.append(("product.offsets", product_offsets))
+    sections.append(("shop.offsets", shop_offsets))
+    sections.append(("product.records", product_blob))
+    sections.append(("shop.records", shop_blob))
+    sections.append(("index", json.dumps(
+        build_index(products, shops), ensure_ascii=False).encode("utf-8")))
+
+    layout = {}
+    position = _PREFIX.size
+    for name, data in sections:
+        position += (-position) % 8
+        layout[name] = [position, len(data)]
+        position += len(data)
+    position += (-position) % 8
+    footer = json.dumps({
+        "version": version,
+        "created_at": time.time(),
+        "product_count": len(products),
+        "shop_count": len(shops),
+        "fingerprints": {
+            "product": catalog_fingerprint(products),
+            "shop": catalog_fingerprint(shops),
+        },
+        "sections": layout,
+    }).encode("utf-8")
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, position, len(footer)))
+        for name, data in sections:
+            f.seek(layout[name][0])
+            f.write(data)
+        f.seek(position)
+        f.write(footer)
+    os.replace(tmp_path, path)
+
+
+def _listing(body: bytes, key: Text) -> List[Dict[Text, Any]]:
+    data = json.loads(body)
+    if not (isinstance(data, dict) and data.get("success") and key in (data.get("data") or {})):
+        raise ValueError(f"respons daftar {key} tidak sesuai format")
+    return data["data"][key]
+
+
+def write_snapshot_from_bodies(path: Text, version: int, product_body: bytes, shop_body: bytes) -> None:
+    """Seperti `write_snapshot`, dari body mentah GET /product dan GET /shop.
+
+    Dipakai di proses worker: yang dikirim hanya bytes, dan decode JSON
+    katalog penuh tidak terjadi di event loop.
+    """
+    write_snapshot(path, version, _listing(product_body, "products"), _listing(shop_body, "shops"))
+
+
+class MappedSnapshot:
+    """Snapshot katalog immutable yang dibaca langsung dari file ter-mmap."""
+
+    def __init__(self, path: Text) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, footer_offset, footer_length = _PREFIX.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} bukan file snapshot katalog")
+        meta = json.loads(self._mmap[footer_offset:footer_offset + footer_length])
+        self.version: int = meta["version"]
+        self.created_at: float = meta["created_at"]
+        self.product_count: int = meta["product_count"]
+        self.shop_count: int = meta["shop_count"]
+        self.fingerprints: Dict[Text, Text] = meta["fingerprints"]
+        self._sections: Dict[Text, List[int]] = meta["sections"]
+        self._view = memoryview(self._mmap)
+        self._offsets = {
+            "product": self.section_array("product.offsets"),
+            "shop": self.section_array("shop.offsets"),
+        }
+        self.index: Dict[Text, Any] = json.loads(self.section_bytes("index"))
+
+    def section_bytes(self, name: Text) -> bytes:
+        offset, length = self._sections[name]
+        return self._mmap[offset:offset + length]
+
+    def section_array(self, name: Text) -> memoryview:
+        offset, length = self._sections[name]
+        return self._view[offset:offset + length].cast("I")
+
+    def _record(self, kind: Text, ordinal: int) -> Dict[Text, Any]:
+        offsets = self._offsets[kind]
+        base = self._sections[f"{kind}.records"][0]
+        return json.loads(self._mmap[base + offsets[ordinal]:base + offsets[ordinal + 1]])
+
+    def product(self, ordinal: int) -> Dict[Text, Any]:
+        return self._record("product", ordinal)
+
+    def shop(self, ordinal: int) -> Dict[Text, Any]:
+        return self._record("shop", ordinal)
+
+    def products(self) -> List[Dict[Text, Any]]:
+        return [self.product(i) for i in range(self.product_count)]
+
+    def shops(self) -> List[Dict[Text, Any]]:
+        return [self.shop(i) for i in range(self.shop_count)]
+
+    def product_by_id(self, product_id: Text) -> Optional[Dict[Text, Any]]:
+        ordinal = self.index["product_ids"].get(str(product_id))
+        return None if ordinal is None else self.product(ordinal)
+
+    def product_by_name(self, name: Text) -> Optional[Dict[Text, Any]]:
+        ordinal = self.index["product_names"].get(normalize_search_term(name))
+        return None if ordinal is None else self.product(ordinal)
+
+    def shop_by_id(self, shop_id: Text) -> Optional[Dict[Text, Any]]:
+        ordinal = self.index["shop_ids"].get(str(shop_id))
+        return None if ordinal is None else self.shop(ordinal)
+
+    def shop_by_name(self, name: Text) -> Optional[Dict[Text, Any]]:
+        ordinal = self.index["shop_names"].get(normalize_search_term(name))
+        return None if ordinal is None else self.shop(ordinal)
+
+    def products_of_shop(self, shop_id: Text) -> List[Dict[Text, Any]]:
+        # Snapshot lama (sebelum ada join index) tidak memuat shop_products.
+        ordinals = self.index.get("shop_products", {}).get(str(shop_id), [])
+        return [self.product(ordinal) for ordinal in ordinals]
+
+    def close(self) -> None:
+        for offsets in self._offsets.values():
+            offsets.release()
+        self._view.release()
+        self._mmap.close()
@@ -1,15 +1,155 @@
 import os
-from dotenv import load_dotenv
 project_root = os.path.join(os.path.dirname(
     __file__), '..')
 dotenv_path = os.path.join(project_root, '.env')
-load_dotenv(dotenv_path=dotenv_path) 
+
+
+def load_environment():
+    """Memuat .env jika ada; variabel yang sudah diatur environment tidak ditimpa.
+
+    python-dotenv cukup mahal saat di-import, jadi hanya di-import jika file .env ada.
+    """
+    if not os.path.exists(dotenv_path):
+        return
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path=dotenv_path)
+
+
+load_environment()
 
 API_ROOT_URL = os.getenv("API_ROOT_URL")
+# Beberapa replica backend dipisah koma; jika kosong hanya API_ROOT_URL yang dipakai.
+API_ROOT_URLS = [
+    url.strip().rstrip("/")
+    for url in (os.getenv("API_ROOT_URLS") or API_ROOT_URL or "").split(",")
+    if url.strip()
+]
+
+
+def check_environment():
+    if not API_ROOT_URLS:
+        error_message = (
+            "ERROR: API_ROOT_URL tidak ditemukan di environment variables. "
+            "Pastikan variabel ini sudah diatur di file .env Anda dan file .env sudah dimuat dengan benar."
+        )
+        print(error_message)
+        return False
+    return True
+
+
+check_environment()
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    try:
+        return int(value) if value not in (None, "") else default
+    except ValueError:
+        print(f"WARNING: {name}={value!r} bukan angka, memakai default {default}.")
+        return default
+
+
+def _env_float(name, default):
+    value = os.getenv(name)
+    try:
+        return float(value) if value not in (None, "") else default
+    except ValueError:
+        print(f"WARNING: {name}={value!r} bukan angka, memakai default {default}.")
+        return default
+
+
+NEGATIVE_CACHE_TTL_SECONDS = _env_float("NEGATIVE_CACHE_TTL_SECONDS", 60.0)
+NEGATIVE_CACHE_MAX_ENTRIES = _env_int("NEGATIVE_CACHE_MAX_ENTRIES", 1024)
+NEGATIVE_CACHE_MAX_BYTES = _env_int("NEGATIVE_CACHE_MAX_BYTES", 1024 * 1024)
+# Cache balasan utuh untuk action katalog anonim; kunci ikut versi katalog.
+RESPONSE_CACHE_TTL_SECONDS = _env_float("RESPONSE_CACHE_TTL_SECONDS", 300.0)
+RESPONSE_CACHE_MAX_ENTRIES = _env_int("RESPONSE_CACHE_MAX_ENTRIES", 512)
+RESPONSE_CACHE_MAX_BYTES = _env_int("RESPONSE_CACHE_MAX_BYTES", 16 * 1024 * 1024)
+
+# Cache detail produk per id (LRU dibatasi byte); TTL 0 mematikan.
+PRODUCT_DETAIL_CACHE_TTL_SECONDS = _env_float("PRODUCT_DETAIL_CACHE_TTL_SECONDS", 60.0)
+PRODUCT_DETAIL_CACHE_MAX_BYTES = _env_int("PRODUCT_DETAIL_CACHE_MAX_BYTES", 4 * 1024 * 1024)
+
+# Admin server hanya di localhost secara default; di container atur ACTION_ADMIN_HOST=0.0.0.0.
+ACTION_ADMIN_HOST = os.getenv("ACTION_ADMIN_HOST", "127.0.0.1")
+ACTION_ADMIN_PORT = _env_int("ACTION_ADMIN_PORT", 5056)
+# Token Bearer untuk endpoint admin selain /metrics (mis. /traces, /memory, /profile);
+# kosong = endpoint tersebut nonaktif (404).
+ACTION_ADMIN_TOKEN = os.getenv("ACTION_ADMIN_TOKEN", "")
+
+ADMISSION_MAX_CONCURRENCY = _env_int("ADMISSION_MAX_CONCURRENCY", 8)
+ADMISSION_MAX_QUEUE = _env_int("ADMISSION_MAX_QUEUE", 16)
+ADMISSION_MAX_WAIT_SECONDS = _env_float("ADMISSION_MAX_WAIT_SECONDS", 2.0)
+# Format: "route=konkurensi:antrean,..." mis. "product_list=2:4,order=16:32"
+ADMISSION_ROUTE_LIMITS = os.getenv("ADMISSION_ROUTE_LIMITS", "")
+# Format: "nama_action=prioritas,..."; angka lebih kecil dilayani lebih dulu.
+ACTION_PRIORITIES = os.getenv("ACTION_PRIORITIES", "")
+LAST_REPLY_MAX_AGE_SECONDS = _env_float("LAST_REPLY_MAX_AGE_SECONDS", 600.0)
+LAST_REPLY_MAX_BYTES = _env_int("LAST_REPLY_MAX_BYTES", 4 * 1024 * 1024)
+
+ACTION_WARMUP = os.getenv("ACTION_WARMUP", "1") not in ("0", "false", "False", "")
+
+# Nama query param "updated since" di /order/all jika backend mendukungnya
+# (mis. "updatedSince"); kosong berarti selalu ambil penuh lalu di-diff.
+ORDER_SYNC_UPDATED_SINCE_PARAM = os.getenv("ORDER_SYNC_UPDATED_SINCE_PARAM", "")
+ORDER_SYNC_FULL_RESYNC_SECONDS = _env_float("ORDER_SYNC_FULL_RESYNC_SECONDS", 3600.0)
+ORDER_SYNC_MAX_USERS = _env_int("ORDER_SYNC_MAX_USERS", 1000)
+ORDER_SYNC_MAX_BYTES = _env_int("ORDER_SYNC_MAX_BYTES", 32 * 1024 * 1024)
+
+# Snapshot katalog (produk + toko + index) yang dibagi antar proses worker.
+CATALOG_REFRESH_SECONDS = _env_float("CATALOG_REFRESH_SECONDS", 300.0)
+CATALOG_POLL_SECONDS = _env_float("CATALOG_POLL_SECONDS", 2.0)
+# "auto": proses yang mendapat lock file menjadi refresher, sisanya reader.
+CATALOG_ROLE = os.getenv("CATALOG_ROLE", "auto")
+CATALOG_SNAPSHOT_DIR = os.getenv("CATALOG_SNAPSHOT_DIR", "")
+
+# Tracing ringan per Action.run; 0 mematikan, 1 merekam semua percakapan.
+TRACE_SAMPLE_RATE = _env_float("TRACE_SAMPLE_RATE", 0.1)
+TRACE_BUFFER_SIZE = _env_int("TRACE_BUFFER_SIZE", 2000)
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+
+# Profiler sampling on-demand (POST /profile, ACTION_PROFILE_ON_START=1, atau SIGUSR1
+# bila ACTION_PROFILE_SIGNAL=1; tanpanya handler SIGUSR1 tidak dipasang).
+ACTION_PROFILE_ON_START = os.getenv("ACTION_PROFILE_ON_START", "0") not in ("0", "false", "False", "")
+ACTION_PROFILE_SIGNAL = os.getenv("ACTION_PROFILE_SIGNAL", "0") not in ("0", "false", "False", "")
+ACTION_PROFILE_SECONDS = _env_float("ACTION_PROFILE_SECONDS", 30.0)
+ACTION_PROFILE_INTERVAL_MS = _env_float("ACTION_PROFILE_INTERVAL_MS", 5.0)
+ACTION_PROFILE_DIR = os.getenv("ACTION_PROFILE_DIR", "")
+
+# Batas waktu satu GET ke backend (termasuk membaca body), dalam detik.
+BACKEND_TIMEOUT_SECONDS = _env_float("BACKEND_TIMEOUT_SECONDS", 10.0)
+
+# Prefetch spekulatif data lanjutan (detail produk teratas, riwayat pesanan).
+PREFETCH_TOP_N = _env_int("PREFETCH_TOP_N", 3)
+PREFETCH_TTL_SECONDS = _env_float("PREFETCH_TTL_SECONDS", 60.0)
+PREFETCH_MAX_INFLIGHT = _env_int("PREFETCH_MAX_INFLIGHT", 4)
+PREFETCH_MAX_ENTRIES = _env_int("PREFETCH_MAX_ENTRIES", 256)
+PREFETCH_MAX_BYTES = _env_int("PREFETCH_MAX_BYTES", 8 * 1024 * 1024)
+
+# Load balancing antar replica (EWMA + power-of-two-choices) dan hedged GET.
+REPLICA_EWMA_ALPHA = _env_float("REPLICA_EWMA_ALPHA", 0.3)
+REPLICA_COOLDOWN_SECONDS = _env_float("REPLICA_COOLDOWN_SECONDS", 5.0)
+# Half-life peluruhan EWMA replica yang tidak menerima request (0 = tanpa peluruhan).
+REPLICA_DECAY_SECONDS = _env_float("REPLICA_DECAY_SECONDS", 10.0)
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "1") not in ("0", "false", "False", "")
+HEDGE_MIN_DELAY_MS = _env_float("HEDGE_MIN_DELAY_MS", 50.0)
+# Maksimal proporsi request yang boleh di-hedge agar beban backend tidak berlipat.
+HEDGE_MAX_RATIO = _env_float("HEDGE_MAX_RATIO", 0.1)
+
+# Atribusi alokasi per Action.run dengan tracemalloc (mahal; hanya untuk investigasi).
+ACTION_TRACEMALLOC = os.getenv("ACTION_TRACEMALLOC", "0") not in ("0", "false", "False", "")
+ACTION_TRACEMALLOC_FRAMES = _env_int("ACTION_TRACEMALLOC_FRAMES", 1)
+
+# Monitor lag event loop: stack dicatat jika loop macet melebihi ambang (interval 0 mematikan).
+LOOP_LAG_INTERVAL_MS = _env_float("LOOP_LAG_INTERVAL_MS", 100.0)
+LOOP_LAG_THRESHOLD_MS = _env_float("LOOP_LAG_THRESHOLD_MS", 250.0)
+LOOP_LAG_STALL_REPORTS = _env_int("LOOP_LAG_STALL_REPORTS", 20)
+LOOP_LAG_STACK_LIMIT = _env_int("LOOP_LAG_STACK_LIMIT", 30)
+
+# Pool worker untuk kerja CPU katalog (tulis snapshot, decode record, build index).
+# WORKER_PROCESSES=0 menjalankan semuanya di pool thread.
+WORKER_THREADS = _env_int("WORKER_THREADS", 2)
+WORKER_PROCESSES = _env_int("WORKER_PROCESSES", 1)
 
-if not API_ROOT_URL:
-    error_message = (
-        "ERROR: API_ROOT_URL tidak ditemukan di environment variables. "
-        "Pastikan variabel ini sudah diatur di file .env Anda dan file .env sudah dimuat dengan benar."
-    )
-    print(error_message)
+# Token Bearer untuk POST /invalidate di admin server; kosong = endpoint nonaktif.
+INVALIDATION_TOKEN = os.getenv("INVALIDATION_TOKEN", "")
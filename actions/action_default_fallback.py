@@ -2,12 +2,14 @@ from typing import Any, Text, Dict, List
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
 from rasa_sdk.types import DomainDict
+from .action_tracing import traced_run
 
 
 class ActionDefaultFallback(Action):
     def name(self) -> Text:
         return "action_default_fallback"
 
+    @traced_run
     async def run(
         self,
         dispatcher: CollectingDispatcher,
@@ -0,0 +1,109 @@
+from typing import Any, Callable, Dict, Text
+
+from .action_catalog import CATALOG
+from .action_catalog_snapshot import product_shop_id
+from .action_pipeline import Replies
+
+# Proyeksi record backend dan baris balasan yang dipakai bersama oleh
+# action produk dan toko.
+
+
+def product_summary(product: Dict[Text, Any]) -> Dict[Text, Any]:
+    return {
+        "id": product.get("_id"),
+        "name": product.get("name", "Nama tidak tersedia"),
+        "price": product.get("price", "Harga tidak tersedia"),
+        "description": product.get("description", ""),
+        "stock": product.get("stock", "Tidak diketahui"),
+        "category": product.get("category", "Tidak diketahui"),
+        "image_url": product.get("productImageURL"),
+        "average_rating": product.get("averageRating", 0.0),
+        "rating_count": product.get("ratingCount", 0),
+        "shop_id": product_shop_id(product),
+    }
+
+
+def shop_fields(product: Dict[Text, Any]) -> Dict[Text, Any]:
+    """Nama dan alamat toko penjual dari join index katalog; kosong jika tidak diketahui."""
+    shop = CATALOG.shop_for_product(product)
+    if not shop:
+        return {"shop_name": None, "shop_address": None}
+    return {"shop_name": shop.get("shopName"), "shop_address": shop.get("shopAddress")}
+
+
+def product_with_shop(product: Dict[Text, Any]) -> Dict[Text, Any]:
+    return dict(product_summary(product), **shop_fields(product))
+
+
+def shop_summary(shop: Dict[Text, Any]) -> Dict[Text, Any]:
+    return {
+        "id": shop.get("_id"),
+        "name": shop.get("shopName", "Nama toko tidak tersedia"),
+        "address": shop.get("shopAddress", "Alamat tidak tersedia"),
+        "description": shop.get("description", "Tidak ada deskripsi"),
+        "banner_image_url": shop.get("bannerImageURL"),
+        "owner_name": shop.get("ownerName", "Nama pemilik tidak diketahui")
+    }
+
+
+def by_rating(product: Dict[Text, Any]):
+    return (product.get('average_rating', 0.0), product.get('rating_count', 0))
+
+
+def by_shop_name(shop: Dict[Text, Any]):
+    return shop.get('name', '').lower()
+
+
+def product_line(show_stock: bool = False, noun: Text = "Menu") -> Callable[[Dict[Text, Any]], Text]:
+    def line(product: Dict[Text, Any]) -> Text:
+        part = f"\n- **{product['name']}**"
+        avg_rating = product.get('average_rating', 0.0)
+        rating_count = product.get('rating_count', 0)
+        if rating_count > 0:
+            part += f" (⭐ {avg_rating:.1f}/5 dari {rating_count} ulasan)"
+        part += "\n"
+        part += f"  Harga: Rp {product['price']}\n"
+        part += f"  Kategori: {product['category']}\n"
+        if product.get('shop_name'):
+            part += f"  Toko: {product['shop_name']}"
+            if product.get('shop_address'):
+                part += f" ({product['shop_address']})"
+            part += "\n"
+        if show_stock:
+            part += f"  Stok: {product['stock']}\n"
+        if product.get('image_url'):
+            part += f"  Foto: {product['image_url']}\n"
+        if avg_rating >= 4.5 and rating_count >= 3:
+            part += f"  ✨ *{noun} ini sangat direkomendasikan!*\n"
+        elif avg_rating >= 4.0 and rating_count >= 1:
+            part += f"  👍 *Rating {noun.lower()} ini bagus!*\n"
+        return part
+    return line
+
+
+def shop_line(show_description: bool = False) -> Callable[[Dict[Text, Any]], Text]:
+    def line(shop: Dict[Text, Any]) -> Text:
+        part = f"\n- **{shop['name']}**\n"
+        if shop['address'] and shop['address'].lower() != "alamat tidak tersedia":
+            part += f"  Alamat: {shop['address']}\n"
+        if shop['owner_name'] and shop['owner_name'].lower() != "nama pemilik tidak diketahui":
+            part += f"  Pemilik: {shop['owner_name']}\n"
+        if show_description and shop['description'] and shop['description'].lower() != "tidak ada deskripsi":
+            part += f"  Deskripsi: {shop['description']}\n"
+        if shop['banner_image_url']:
+            part += f"  Banner: {shop['banner_image_url']}\n"
+        return part
+    return line
+
+
+PRODUCT_REPLIES = Replies(
+    server_error="Info dari server: {message}",
+    connection_error="Maaf, tidak dapat terhubung ke layanan produk. Periksa koneksi Anda.",
+    content_error="Maaf, ada masalah dengan format data dari layanan produk.",
+)
+
+SHOP_REPLIES = Replies(
+    server_error="Info dari server: {message}",
+    connection_error="Maaf, tidak dapat terhubung ke layanan toko. Periksa koneksi Anda.",
+    content_error="Maaf, ada masalah dengan format data dari layanan toko.",
+)
@@ -0,0 +1,148 @@
+import asyncio
+import json
+from typing import TYPE_CHECKING, Any, Dict, Optional, Text, Tuple
+
+from . import action_replicas, action_tracing
+from .action_admission import admission_slot
+from .action_constants import BACKEND_TIMEOUT_SECONDS
+from .action_metrics import METRICS
+
+if TYPE_CHECKING:
+    import aiohttp
+
+# aiohttp baru di-import saat dipakai pertama kali (atau saat warm-up),
+# bukan ketika rasa_sdk memuat semua modul action.
+_AIOHTTP_EXCEPTIONS = ("ClientError", "ClientConnectorError", "ContentTypeError")
+
+_session = None
+_session_loop = None
+
+
+def __getattr__(name):
+    if name in _AIOHTTP_EXCEPTIONS:
+        import aiohttp
+        return getattr(aiohttp, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def shared_session() -> "aiohttp.ClientSession":
+    """Satu ClientSession per event loop agar koneksi ke backend dipakai ulang."""
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        import aiohttp
+        _session = aiohttp.ClientSession(
+            trace_configs=[action_tracing.http_trace_config()])
+        _session_loop = loop
+    return _session
+
+
+async def close_shared_session() -> None:
+    global _session, _session_loop
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _session_loop = None
+
+
+class BadPayload(Exception):
+    """Body respons 200 dari backend bukan JSON yang valid."""
+
+
+class BackendResponse:
+    """Respons backend yang sudah dibaca penuh: status, JSON (jika 200) dan teks mentah."""
+
+    def __init__(self, status: int, data: Optional[Dict[Text, Any]], text: Text) -> None:
+        self.status = status
+        self.data = data
+        self.text = text
+
+
+_inflight: Dict[Tuple[Text, Text], asyncio.Future] = {}
+
+
+async def get_json(route: Text, path: Text, action_name: Text,
+                   headers: Optional[Dict[Text, Text]] = None) -> BackendResponse:
+    """GET `path` (relatif terhadap replica backend) lewat admission control.
+
+    GET tanpa header (data publik) yang identik dan sedang berjalan digabung
+    menjadi satu request ke backend; pemanggil berikutnya menunggu hasil yang
+    sama. Seluruh request dibatasi BACKEND_TIMEOUT_SECONDS.
+    """
+    key = (route, path)
+    if headers is None:
+        pending = _inflight.get(key)
+        if pending is not None:
+            METRICS.inc("backend_coalesced_total", route=route)
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # Request pemimpin dibatalkan; lanjut dengan request sendiri.
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        _inflight[key] = future
+    try:
+        response = await asyncio.wait_for(
+            _get(route, path, action_name, headers), BACKEND_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        METRICS.inc("backend_timeouts_total", route=route)
+        if headers is None:
+            _finish(key, future, exception=asyncio.TimeoutError())
+        raise
+    except asyncio.CancelledError:
+        if headers is None:
+            _finish(key, future, cancel=True)
+        raise
+    except BaseException as e:
+        if headers is None:
+            _finish(key, future, exception=e)
+        raise
+    if headers is None:
+        _finish(key, future, result=response)
+    return response
+
+
+def _finish(key, future: asyncio.Future, result=None, exception=None, cancel=False) -> None:
+    if _inflight.get(key) is future:
+        del _inflight[key]
+    if cancel:
+        future.cancel()
+    elif exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
+
+
+async def get_body(route: Text, path: Text, action_name: Text) -> Tuple[int, bytes]:
+    """GET tanpa decode JSON: untuk body besar yang di-decode di luar event loop."""
+    try:
+        return await asyncio.wait_for(_get_body(route, path, action_name, None), BACKEND_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        METRICS.inc("backend_timeouts_total", route=route)
+        raise
+
+
+async def _get_body(route: Text, path: Text, action_name: Text,
+                    headers: Optional[Dict[Text, Text]]) -> Tuple[int, bytes]:
+    # Hedged request ke replica kedua memakai slot admission yang sama:
+    # secara logis tetap satu request dari sisi action.
+    async with admission_slot(route, action_name):
+        return await action_replicas.REPLICAS.get(route, path, headers)
+
+
+async def _get(route: Text, path: Text, action_name: Text,
+               headers: Optional[Dict[Text, Text]]) -> BackendResponse:
+    status, body = await _get_body(route, path, action_name, headers)
+    if status != 200:
+        return BackendResponse(status, None, body.decode("utf-8", errors="replace"))
+    # Body dibaca sekali sebagai bytes lalu langsung di-decode json,
+    # tanpa salinan str perantara seperti response.json().
+    try:
+        data = json.loads(body)
+    except ValueError as e:
+        raise BadPayload(f"GET {path}: {e}") from e
+    if not isinstance(data, dict):
+        raise BadPayload(f"GET {path}: respons bukan objek JSON")
+    return BackendResponse(status, data, "")
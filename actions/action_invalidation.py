@@ -0,0 +1,207 @@
+import json
+import urllib.parse
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+from . import action_admin_server
+from .action_cache import DETAIL_FIELDS, NEGATIVE_SEARCH_CACHE, PRODUCT_DETAIL_CACHE, RESPONSE_CACHE
+from .action_catalog import CATALOG, catalog_patches_applied
+from .action_constants import INVALIDATION_TOKEN
+from .action_http import get_json
+from .action_metrics import METRICS
+from .action_order_sync import ORDER_SYNC
+from .action_prefetch import PREFETCH
+
+# Invalidasi berbasis push: backend memanggil POST /invalidate dengan id
+# produk, toko atau pesanan yang berubah, mis.
+#
+#   {"products": ["p1", {"_id": "p2", "name": "...", "stock": 0}],
+#    "shops": [{"_id": "s1", "deleted": true}],
+#    "orders": ["o1"]}
+#
+# Item berupa record (lengkap atau hanya field yang berubah) digabung ke
+# record yang sudah diketahui (snapshot katalog/cache detail); item berupa
+# id saja, atau record parsial yang belum diketahui, diambil ulang dari
+# backend per record. Hanya record dan entri cache yang terkait
+# yang diperbarui/dibuang, tanpa memuat ulang katalog. Untuk pengujian lokal
+# lihat `python -m scripts.invalidation_publisher --help`.
+#
+# Hanya satu worker yang memegang port admin, jadi hasil resolve ditulis ke
+# log patch katalog (CATALOG_SNAPSHOT_DIR); worker lain menerapkan patch dan
+# eviction cache yang sama di siklus poll katalog berikutnya.
+
+NAME_FIELDS = {"product": "name", "shop": "shopName"}
+# Record push yang memuat semua field ini bisa dipakai tanpa record lama.
+COMPLETE_FIELDS = {"product": DETAIL_FIELDS, "shop": ("_id", "shopName")}
+
+Resolved = Tuple[Text, Optional[Dict[Text, Any]], bool]
+
+
+class Invalidator:
+    async def apply(self, payload: Dict[Text, Any]) -> Dict[Text, Any]:
+        entries = []
+        for kind, field in (("product", "products"), ("shop", "shops")):
+            for item in payload.get(field) or []:
+                record_id, record, resolved = await self._resolve(kind, item)
+                if record_id is None:
+                    continue
+                entries.append({"kind": kind, "id": record_id, "record": record, "resolved": resolved})
+        order_ids = [str(o) for o in payload.get("orders") or []]
+        if order_ids:
+            entries.append({"kind": "order", "ids": order_ids})
+        summary = self.apply_entries(entries)
+        try:
+            CATALOG.publish_patches(entries)
+        except OSError as e:
+            print(f"Invalidation: gagal menulis log patch, worker lain tidak ikut diperbarui: {e}")
+        # Balas setelah patch per record masuk ke daftar/index katalog; build
+        # penuh (snapshot baru) yang kebetulan berjalan tidak ditunggu.
+        await catalog_patches_applied()
+        return summary
+
+    def apply_entries(self, entries: List[Dict[Text, Any]]) -> Dict[Text, Any]:
+        """Menerapkan entri yang sudah di-resolve (dari request ini atau log patch worker lain)."""
+        summary: Dict[Text, Any] = {"updated": [], "deleted": [], "unresolved": [], "evicted": {}}
+        for entry in entries:
+            if entry.get("kind") == "order":
+                self._evicted(summary, "order_sync", ORDER_SYNC.invalidate_orders(entry.get("ids") or []))
+            elif entry.get("kind") in NAME_FIELDS and entry.get("id") is not None:
+                self._apply_record(entry["kind"], str(entry["id"]), entry.get("record"),
+                                   bool(entry.get("resolved")), summary, entry.get("time"))
+        return summary
+
+    async def _resolve(self, kind: Text, item: Any) -> Resolved:
+        if isinstance(item, dict):
+            record_id = item.get("_id") or item.get("id")
+            if record_id is None:
+                return None, None, False
+            record_id = str(record_id)
+            if item.get("deleted"):
+                return record_id, None, True
+            base = self._known_record(kind, record_id)
+            if base is None and not all(field in item for field in COMPLETE_FIELDS[kind]):
+                _, base, resolved = await self._resolve(kind, record_id)
+                # Record baru yang belum dikenal backend tetap dipakai jika bernama.
+                if base is None and not item.get(NAME_FIELDS[kind]):
+                    return record_id, None, resolved
+            # Field yang tidak dikirim tetap dari record lama.
+            merged = dict(base or {}, **item)
+            merged.setdefault("_id", record_id)
+            return record_id, merged, True
+        record_id = str(item)
+        try:
+            if kind == "product":
+                return (record_id,) + await self._fetch_product(record_id)
+            return (record_id,) + await self._fetch_shop(record_id)
+        except Exception as e:
+            print(f"Invalidation: gagal mengambil {kind} {record_id}: {e!r}")
+            return record_id, None, False
+
+    @staticmethod
+    def _known_record(kind: Text, record_id: Text) -> Optional[Dict[Text, Any]]:
+        if kind == "product":
+            cached = PRODUCT_DETAIL_CACHE.peek(record_id)
+            if cached is not None:
+                return cached
+        return CATALOG.record(kind, record_id)
+
+    async def _fetch_product(self, product_id: Text) -> Tuple[Optional[Dict[Text, Any]], bool]:
+        response = await get_json(
+            "product_detail", f"/product/{urllib.parse.quote(product_id)}", "invalidation")
+        if response.status == 404:
+            return None, True
+        if response.status == 200 and response.data.get("success") \
+                and isinstance(response.data.get("data"), dict):
+            return response.data["data"], True
+        return None, False
+
+    async def _fetch_shop(self, shop_id: Text) -> Tuple[Optional[Dict[Text, Any]], bool]:
+        # Backend tidak punya GET /shop/{id}; cari dengan nama toko di snapshot.
+        snapshot = CATALOG.current()
+        known = snapshot.shop_by_id(shop_id) if snapshot is not None else None
+        if not known or not known.get("shopName"):
+            return None, False
+        path = f"/shop?searchByShopName={urllib.parse.quote_plus(known['shopName'])}"
+        response = await get_json("shop_search", path, "invalidation")
+        if response.status != 200 or not response.data.get("success"):
+            return None, False
+        for shop in (response.data.get("data") or {}).get("shops") or []:
+            if str(shop.get("_id")) == shop_id:
+                return shop, True
+        # Bisa jadi nama toko berubah; tidak dianggap terhapus.
+        return None, False
+
+    def _apply_record(self, kind: Text, record_id: Text, record: Optional[Dict[Text, Any]],
+                      resolved: bool, summary: Dict[Text, Any], at: Optional[float] = None) -> None:
+        names = []
+        if record is not None and record.get(NAME_FIELDS[kind]):
+            names.append(record[NAME_FIELDS[kind]])
+        if resolved:
+            CATALOG.patch(kind, record_id, record, at)
+            outcome = "updated" if record is not None else "deleted"
+        else:
+            outcome = "unresolved"
+        summary[outcome].append(f"{kind}:{record_id}")
+        METRICS.inc("invalidated_records_total", kind=kind, outcome=outcome)
+
+        self._evicted(summary, "response", RESPONSE_CACHE.evict_records(kind, [record_id], names))
+        if names:
+            self._evicted(summary, "negative_search", NEGATIVE_SEARCH_CACHE.evict_matching(kind, names))
+        elif outcome == "unresolved":
+            # Nama baru tidak diketahui: kata kunci kosong mana pun bisa jadi kini cocok.
+            NEGATIVE_SEARCH_CACHE.invalidate(kind)
+        if kind == "product":
+            self._evicted(summary, "prefetch", int(PREFETCH.discard("product_detail", f"/product/{record_id}")))
+            # Nama lama bisa merujuk ke produk yang sudah diganti namanya atau dihapus.
+            self._evicted(summary, "prefetch_product_ids", PREFETCH.forget_products([record_id]))
+            self._evicted(summary, "product_detail", PRODUCT_DETAIL_CACHE.evict([record_id]))
+            if record is not None and all(field in record for field in DETAIL_FIELDS):
+                PRODUCT_DETAIL_CACHE.put(record)
+        else:
+            # Balasan produk menampilkan nama/alamat toko penjualnya.
+            self._evicted(summary, "response", RESPONSE_CACHE.evict_records("product", [record_id], [], field="shop_id"))
+
+    @staticmethod
+    def _evicted(summary: Dict[Text, Any], cache: Text, count: int) -> None:
+        if count:
+            summary["evicted"][cache] = summary["evicted"].get(cache, 0) + count
+            METRICS.inc("invalidated_entries_total", count, cache=cache)
+
+
+INVALIDATOR = Invalidator()
+
+
+def _apply_remote(entries: List[Dict[Text, Any]]) -> None:
+    summary = INVALIDATOR.apply_entries(entries)
+    print(f"Invalidation (dari worker lain): {json.dumps(summary)}")
+
+
+CATALOG.on_remote_patches(_apply_remote)
+
+
+def _authorized(header: Text) -> bool:
+    return action_admin_server.bearer_authorized(header, INVALIDATION_TOKEN)
+
+
+async def _handle_invalidate(request):
+    from aiohttp import web
+    if not INVALIDATION_TOKEN:
+        return web.json_response({"error": "INVALIDATION_TOKEN belum diatur"}, status=404)
+    if not _authorized(request.headers.get("Authorization", "")):
+        METRICS.inc("invalidation_requests_total", result="unauthorized")
+        return web.json_response({"error": "token tidak valid"}, status=401)
+    try:
+        payload = await request.json()
+    except ValueError:
+        payload = None
+    if not isinstance(payload, dict):
+        METRICS.inc("invalidation_requests_total", result="bad_request")
+        return web.json_response({"error": "body harus berupa objek JSON"}, status=400)
+    summary = await INVALIDATOR.apply(payload)
+    METRICS.inc("invalidation_requests_total", result="ok")
+    print(f"Invalidation: {json.dumps(summary)}")
+    return web.json_response(summary)
+
+
+# Memakai INVALIDATION_TOKEN sendiri agar backend tidak perlu token admin.
+action_admin_server.register_route("POST", "/invalidate", _handle_invalidate, protected=False)
+
@@ -0,0 +1,81 @@
+import urllib.parse
+from typing import Any, Dict, Optional, Text
+
+from .action_cache import normalize_search_term
+from .action_catalog import CATALOG
+from .action_catalog_snapshot import product_shop_id
+from .action_formatting import PRODUCT_REPLIES, by_rating, product_line, product_summary
+from .action_http import BackendResponse, get_json
+from .action_pipeline import (
+    Halt,
+    Pipeline,
+    PipelineAction,
+    PipelineContext,
+    bulleted,
+    each,
+    entity_or_slot,
+    expect,
+    sort_by,
+)
+
+
+async def _find_shop_backend(ctx: PipelineContext) -> Optional[Dict[Text, Any]]:
+    path = f"/shop?searchByShopName={urllib.parse.quote_plus(ctx.query)}"
+    print(f"{ctx.action_name}: GET {path}")
+    response = await get_json("shop_search", path, ctx.action_name)
+    if response.status != 200 or not response.data.get("success"):
+        return None
+    shops = (response.data.get("data") or {}).get("shops") or []
+    wanted = normalize_search_term(ctx.query)
+    exact = [s for s in shops if normalize_search_term(s.get("shopName") or "") == wanted]
+    return (exact or shops or [None])[0]
+
+
+async def _fetch_shop_products(ctx: PipelineContext, _: Any) -> BackendResponse:
+    """Produk satu toko dari join index snapshot; tanpa snapshot lewat /shop lalu /product."""
+    shop = CATALOG.find_shop(ctx.query)
+    products = CATALOG.products_of_shop(shop["_id"]) if shop and shop.get("_id") else None
+    if products is None:
+        shop = await _find_shop_backend(ctx)
+        if shop is None or shop.get("_id") is None:
+            raise Halt("shop_not_found")
+        print(f"{ctx.action_name}: GET /product")
+        response = await get_json("product_list", "/product", ctx.action_name)
+        listing = (response.data or {}).get("data") if response.status == 200 else None
+        if not (isinstance(listing, dict) and isinstance(listing.get("products"), list)):
+            return response
+        shop_id = str(shop["_id"])
+        products = [p for p in listing["products"] if product_shop_id(p) == shop_id]
+    else:
+        print(f"{ctx.action_name}: toko '{shop.get('shopName')}' ditemukan di snapshot katalog.")
+        ctx.data_time = CATALOG.current().created_at
+    ctx.fields["shop_name"] = shop.get("shopName") or ctx.query
+    return BackendResponse(200, {"success": True, "data": {"products": products}}, "")
+
+
+class ActionListShopProducts(PipelineAction):
+    def name(self) -> Text:
+        return "action_list_shop_products"
+
+    pipeline = Pipeline(
+        query=entity_or_slot("shop_name", "shop_name_slot"),
+        fetch=_fetch_shop_products,
+        detail_cache=True,
+        validate=expect("products"),
+        project=each(product_summary),
+        rank=sort_by(by_rating, reverse=True),
+        render=bulleted(
+            "Berikut produk dari toko **{shop_name}**:\n",
+            product_line(),
+            limit=10,
+            more="\n...dan {rest} produk lainnya."),
+        reset_slots=["shop_name_slot"],
+        replies=PRODUCT_REPLIES.but(
+            missing_query="Produk dari toko mana yang ingin Anda lihat?",
+            shop_not_found="Maaf, saya tidak menemukan toko dengan nama '{query}'.",
+            empty="Maaf, toko '{shop_name}' belum memiliki produk.",
+            server_error_default="Gagal mengambil produk toko '{query}'.",
+            format_error="Format respons API produk tidak sesuai.",
+            status_error="Maaf, gagal mengambil data produk toko dari server (status: {status}).",
+            unexpected_error="Maaf, terjadi kesalahan yang tidak terduga saat mengambil produk toko tersebut."),
+    )
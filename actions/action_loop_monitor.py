@@ -0,0 +1,163 @@
+import asyncio
+import json
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Text
+
+from . import action_admin_server
+from .action_constants import (
+    LOOP_LAG_INTERVAL_MS,
+    LOOP_LAG_STACK_LIMIT,
+    LOOP_LAG_STALL_REPORTS,
+    LOOP_LAG_THRESHOLD_MS,
+)
+from .action_metrics import METRICS
+from .action_profiler import running_task
+
+# Semua action berbagi satu event loop: kerja sinkron yang lama (sort besar,
+# decode JSON besar, build index) menahan seluruh percakapan lain.
+
+
+class LoopLagMonitor:
+    """Mengukur keterlambatan penjadwalan event loop dan menangkap stack saat loop macet.
+
+    Task ticker tidur LOOP_LAG_INTERVAL_MS lalu mencatat selisih waktu bangun
+    dengan yang dijadwalkan sebagai `event_loop_lag_seconds`. Thread watchdog
+    memeriksa detak ticker; jika loop tidak berdetak lebih lama dari
+    LOOP_LAG_THRESHOLD_MS, stack thread loop dibaca lewat `sys._current_frames()`;
+    task yang sedang berjalan dicari di `asyncio.all_tasks()` dari coroutine
+    di stack tersebut, lalu dilaporkan dengan nama action-nya. Laporan terakhir
+    tersedia di GET /loop.
+    """
+
+    def __init__(self, interval_ms: float, threshold_ms: float,
+                 max_reports: int, stack_limit: int) -> None:
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.stack_limit = stack_limit
+        self.reports: Deque[Dict[Text, Any]] = deque(maxlen=max(1, max_reports))
+        self.max_lag = 0.0
+        self._actions: Dict[asyncio.Task, Text] = {}
+        self._heartbeat = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._open_report: Optional[Dict[Text, Any]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0 and self.threshold > 0
+
+    def ensure_started(self) -> None:
+        """Memulai ticker dan watchdog di event loop yang sedang berjalan (idempoten)."""
+        if not self.enabled or self._loop is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._loop = loop
+        self._heartbeat = time.monotonic()
+        # Jadwal tick pertama dihitung sekarang: jika action yang memanggil ini
+        # langsung memblokir loop, lag tick pertama ikut mencakup macet tersebut.
+        loop.create_task(self._tick(self._heartbeat + self.interval), name="loop-lag-monitor")
+        threading.Thread(
+            target=self._watch, args=(threading.get_ident(), loop),
+            name="loop-lag-watchdog", daemon=True).start()
+        print(f"Loop monitor: interval {self.interval * 1000:.0f} ms, "
+              f"ambang macet {self.threshold * 1000:.0f} ms.")
+
+    def track(self, action_name: Text) -> Optional[asyncio.Task]:
+        self.ensure_started()
+        task = asyncio.current_task()
+        if task is not None:
+            self._actions[task] = action_name
+        return task
+
+    def untrack(self, task: Optional[asyncio.Task]) -> None:
+        if task is not None:
+            self._actions.pop(task, None)
+
+    async def _tick(self, expected: float) -> None:
+        while True:
+            await asyncio.sleep(max(0.0, expected - time.monotonic()))
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            expected = now + self.interval
+            self._heartbeat = now
+            self.max_lag = max(self.max_lag, lag)
+            METRICS.observe("event_loop_lag_seconds", lag)
+            METRICS.set_gauge("event_loop_lag_last_seconds", lag)
+            report = self._open_report
+            if report is not None:
+                # Loop kembali berjalan: catat lama macet sebenarnya.
+                self._open_report = None
+                report["lag_ms"] = round(lag * 1000, 1)
+                print(f"Loop monitor: loop macet {report['lag_ms']:.0f} ms "
+                      f"oleh {report['action']}.")
+
+    def _watch(self, thread_id: int, loop: asyncio.AbstractEventLoop) -> None:
+        poll = max(0.005, min(self.interval, self.threshold) / 2)
+        while not loop.is_closed():
+            time.sleep(poll)
+            heartbeat = self._heartbeat
+            stalled = time.monotonic() - heartbeat - self.interval
+            if stalled < self.threshold or self._open_report is not None:
+                continue
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+            task = running_task(loop, frame)
+            # Loop sempat berdetak lagi: stack yang terbaca bukan lagi penyebabnya.
+            if heartbeat != self._heartbeat:
+                continue
+            stack = traceback.format_stack(frame, limit=self.stack_limit or None)
+            del frame
+            self._report(task, stalled, stack)
+
+    def _report(self, task: Optional[asyncio.Task], stalled: float, stack: List[Text]) -> None:
+        if task is None:
+            action = "(idle)"
+        else:
+            action = self._actions.get(task) or f"(task {task.get_name()})"
+        report = {
+            "time": time.time(),
+            "action": action,
+            "stalled_ms": round(stalled * 1000, 1),
+            "lag_ms": None,
+            "stack": [line.rstrip() for line in stack],
+        }
+        self._open_report = report
+        self.reports.append(report)
+        METRICS.inc("event_loop_stalls_total", action=action)
+        print(f"Loop monitor: event loop tidak berdetak {report['stalled_ms']:.0f} ms "
+              f"saat menjalankan {action}:\n{''.join(stack)}", end="")
+
+
+LOOP_MONITOR = LoopLagMonitor(
+    LOOP_LAG_INTERVAL_MS, LOOP_LAG_THRESHOLD_MS, LOOP_LAG_STALL_REPORTS, LOOP_LAG_STACK_LIMIT)
+
+
+def _collect_loop_stats():
+    if LOOP_MONITOR.enabled and LOOP_MONITOR._loop is not None:
+        yield "event_loop_lag_max_seconds", {}, LOOP_MONITOR.max_lag
+        yield "event_loop_tracked_actions", {}, len(LOOP_MONITOR._actions)
+
+
+METRICS.register_collector(_collect_loop_stats)
+
+
+async def _handle_loop(request):
+    from aiohttp import web
+    body = {
+        "enabled": LOOP_MONITOR.enabled,
+        "interval_ms": LOOP_MONITOR.interval * 1000,
+        "threshold_ms": LOOP_MONITOR.threshold * 1000,
+        "max_lag_ms": round(LOOP_MONITOR.max_lag * 1000, 1),
+        "stalls": list(reversed(LOOP_MONITOR.reports)),
+    }
+    return web.Response(text=json.dumps(body, indent=2), content_type="application/json")
+
+
+action_admin_server.register_route("GET", "/loop", _handle_loop)
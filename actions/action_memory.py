@@ -0,0 +1,182 @@
+import json
+import os
+import sys
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, List, Optional, Text, Tuple
+
+from . import action_admin_server
+from .action_constants import ACTION_TRACEMALLOC, ACTION_TRACEMALLOC_FRAMES
+from .action_metrics import METRICS
+
+# Estimasi pemakaian memori cache in-process dan (opsional) alokasi per
+# Action.run lewat tracemalloc. Hasilnya diekspos di /metrics dan GET /memory.
+
+
+def estimate_size(obj: Any) -> int:
+    """Perkiraan ukuran objek beserta isinya (bytes), tiap objek dihitung sekali."""
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, type):
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, (str, bytes, bytearray, int, float, bool)) or item is None:
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, deque)):
+            stack.extend(item)
+        else:
+            attributes = getattr(item, "__dict__", None)
+            if attributes is not None:
+                stack.append(attributes)
+            for slot in getattr(type(item), "__slots__", ()):
+                if hasattr(item, slot):
+                    stack.append(getattr(item, slot))
+    return total
+
+
+class ByteBudget:
+    """Mencatat perkiraan ukuran per kunci cache dan total terhadap `max_bytes` (0 = tanpa batas)."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._sizes: Dict[Hashable, int] = {}
+
+    def charge(self, key: Hashable, *objects: Any) -> int:
+        self.release(key)
+        size = estimate_size(key) + sum(estimate_size(o) for o in objects)
+        self._sizes[key] = size
+        self.bytes += size
+        return size
+
+    def release(self, key: Hashable) -> None:
+        self.bytes -= self._sizes.pop(key, 0)
+
+    def clear(self) -> None:
+        self._sizes.clear()
+        self.bytes = 0
+
+    def exceeded(self) -> bool:
+        return self.max_bytes > 0 and self.bytes > self.max_bytes
+
+
+# Setiap cache mendaftarkan fungsi yang mengembalikan
+# {"entries": ..., "bytes": ..., "evictions": ...}.
+_caches: Dict[Text, Callable[[], Dict[Text, int]]] = {}
+
+
+def register_cache(name: Text, stats: Callable[[], Dict[Text, int]]) -> None:
+    _caches[name] = stats
+
+
+def cache_stats() -> Dict[Text, Dict[Text, int]]:
+    result = {}
+    for name, stats in _caches.items():
+        try:
+            result[name] = stats()
+        except Exception as e:
+            print(f"Memory: statistik cache {name} gagal: {e!r}")
+    return result
+
+
+def resident_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# --- tracemalloc per Action.run ----------------------------------------------
+
+_active_runs = 0
+
+
+def allocation_tracking_enabled() -> bool:
+    import tracemalloc
+    return tracemalloc.is_tracing()
+
+
+def start_allocation_tracking() -> Optional[Tuple[int, int]]:
+    """Dipanggil di awal Action.run; None jika tracemalloc tidak aktif."""
+    global _active_runs
+    if not ACTION_TRACEMALLOC:
+        return None
+    import tracemalloc
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(ACTION_TRACEMALLOC_FRAMES)
+    _active_runs += 1
+    current, _ = tracemalloc.get_traced_memory()
+    return current, _active_runs
+
+
+def finish_allocation_tracking(action_name: Text, token: Optional[Tuple[int, int]]) -> None:
+    global _active_runs
+    if token is None:
+        return
+    import tracemalloc
+    _active_runs -= 1
+    current, _ = tracemalloc.get_traced_memory()
+    started_at, runs_at_start = token
+    # tracemalloc menghitung seluruh proses: jika ada run lain yang berjalan
+    # bersamaan, selisihnya ikut memuat alokasi run tersebut.
+    overlapped = "1" if runs_at_start > 1 or _active_runs > 0 else "0"
+    METRICS.observe("action_alloc_net_bytes", current - started_at,
+                    action=action_name, overlapped=overlapped)
+
+
+def top_allocations(limit: int = 25) -> List[Dict[Text, Any]]:
+    import tracemalloc
+    if not tracemalloc.is_tracing():
+        return []
+    stats = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    )).statistics("lineno")
+    return [
+        {"site": str(stat.traceback[0]), "bytes": stat.size, "count": stat.count}
+        for stat in stats[:limit]
+    ]
+
+
+def _collect_memory_stats():
+    for name, stats in cache_stats().items():
+        labels = {"cache": name}
+        yield "cache_entries", labels, stats.get("entries", 0)
+        yield "cache_bytes", labels, stats.get("bytes", 0)
+        yield "cache_evictions", labels, stats.get("evictions", 0)
+    rss = resident_bytes()
+    if rss is not None:
+        yield "process_resident_memory_bytes", {}, rss
+    if ACTION_TRACEMALLOC and allocation_tracking_enabled():
+        import tracemalloc
+        current, peak = tracemalloc.get_traced_memory()
+        yield "tracemalloc_current_bytes", {}, current
+        yield "tracemalloc_peak_bytes", {}, peak
+
+
+METRICS.register_collector(_collect_memory_stats)
+
+
+async def _handle_memory(request):
+    from aiohttp import web
+    try:
+        limit = int(request.query.get("limit", "25"))
+    except ValueError:
+        return web.Response(status=400, text="limit harus berupa angka")
+    body = {
+        "resident_bytes": resident_bytes(),
+        "caches": cache_stats(),
+        "tracemalloc": ACTION_TRACEMALLOC and allocation_tracking_enabled(),
+        "top_allocations": top_allocations(limit),
+    }
+    return web.Response(text=json.dumps(body, indent=2), content_type="application/json")
+
+
+action_admin_server.register_route("GET", "/memory", _handle_memory)
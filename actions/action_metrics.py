@@ -0,0 +1,111 @@
+import json
+from typing import Any, Callable, Dict, Iterable, List, Text, Tuple
+
+from . import action_admin_server
+
+LabelKey = Tuple[Tuple[Text, Text], ...]
+
+
+def _label_key(labels: Dict[Text, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MetricsRegistry:
+    """Penampung metrik in-process yang diekspos lewat admin server."""
+
+    def __init__(self) -> None:
+        self._counters: Dict[Text, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[Text, Dict[LabelKey, float]] = {}
+        self._summaries: Dict[Text, Dict[LabelKey, List[float]]] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[Text, Dict[Text, Any], float]]]] = []
+
+    def inc(self, name: Text, value: float = 1.0, **labels: Any) -> None:
+        series = self._counters.setdefault(name, {})
+        key = _label_key(labels)
+        series[key] = series.get(key, 0.0) + value
+        action_admin_server.ensure_started()
+
+    def set_gauge(self, name: Text, value: float, **labels: Any) -> None:
+        self._gauges.setdefault(name, {})[_label_key(labels)] = value
+        action_admin_server.ensure_started()
+
+    def observe(self, name: Text, value: float, **labels: Any) -> None:
+        series = self._summaries.setdefault(name, {})
+        key = _label_key(labels)
+        summary = series.get(key)
+        if summary is None:
+            series[key] = [1.0, value, value]
+        else:
+            summary[0] += 1
+            summary[1] += value
+            if value > summary[2]:
+                summary[2] = value
+        action_admin_server.ensure_started()
+
+    def register_collector(
+        self, collector: Callable[[], Iterable[Tuple[Text, Dict[Text, Any], float]]]
+    ) -> None:
+        """`collector()` menghasilkan tuple (nama_gauge, labels, nilai) saat scrape."""
+        self._collectors.append(collector)
+
+    def snapshot(self) -> Dict[Text, Any]:
+        gauges = {name: {self._format_labels(k): v for k, v in series.items()}
+                  for name, series in self._gauges.items()}
+        for collector in self._collectors:
+            try:
+                for name, labels, value in collector():
+                    gauges.setdefault(name, {})[
+                        self._format_labels(_label_key(labels))] = value
+            except Exception as e:
+                print(f"Metrics: collector {collector!r} gagal: {e}")
+        return {
+            "counters": {name: {self._format_labels(k): v for k, v in series.items()}
+                         for name, series in self._counters.items()},
+            "gauges": gauges,
+            "summaries": {
+                name: {self._format_labels(k): {"count": s[0], "sum": s[1], "max": s[2]}
+                       for k, s in series.items()}
+                for name, series in self._summaries.items()
+            },
+        }
+
+    def render_prometheus(self) -> Text:
+        snap = self.snapshot()
+        lines = []
+        for name, series in snap["counters"].items():
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(f"{name}{labels} {value}" for labels, value in series.items())
+        for name, series in snap["gauges"].items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(f"{name}{labels} {value}" for labels, value in series.items())
+        for name, series in snap["summaries"].items():
+            lines.append(f"# TYPE {name} summary")
+            for labels, s in series.items():
+                lines.append(f"{name}_count{labels} {s['count']}")
+                lines.append(f"{name}_sum{labels} {s['sum']}")
+                lines.append(f"{name}_max{labels} {s['max']}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _format_labels(key: LabelKey) -> Text:
+        if not key:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in key) + "}"
+
+
+METRICS = MetricsRegistry()
+
+
+async def _handle_metrics(request):
+    from aiohttp import web
+    return web.Response(text=METRICS.render_prometheus(), content_type="text/plain")
+
+
+async def _handle_metrics_json(request):
+    from aiohttp import web
+    return web.Response(text=json.dumps(METRICS.snapshot(), indent=2),
+                        content_type="application/json")
+
+
+action_admin_server.register_route("GET", "/metrics", _handle_metrics, protected=False)
+action_admin_server.register_route("GET", "/metrics.json", _handle_metrics_json, protected=False)
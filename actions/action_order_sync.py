@@ -0,0 +1,208 @@
+import hashlib
+import time
+import urllib.parse
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Text
+
+from .action_constants import (
+    ORDER_SYNC_FULL_RESYNC_SECONDS,
+    ORDER_SYNC_MAX_BYTES,
+    ORDER_SYNC_MAX_USERS,
+    ORDER_SYNC_UPDATED_SINCE_PARAM,
+)
+from .action_http import BackendResponse, get_json
+from .action_memory import ByteBudget, register_cache
+from .action_metrics import METRICS
+from .action_prefetch import PREFETCH
+from .action_tracing import current_span
+
+
+def _order_key(order: Dict[Text, Any]) -> Optional[Text]:
+    return order.get("orderId") or order.get("_id")
+
+
+def _order_timestamp(order: Dict[Text, Any]) -> Text:
+    return order.get("updatedAt") or order.get("createdAt") or ""
+
+
+class OrderView:
+    """Salinan lokal riwayat pesanan satu pengguna beserta watermark-nya."""
+
+    def __init__(self) -> None:
+        self.orders: List[Dict[Text, Any]] = []
+        self.watermark = ""
+        self.full_synced_at = 0.0
+        self.fetched_at = 0.0
+        # Batas waktu salinan ini boleh langsung dipakai action pesanan berikutnya.
+        self.reusable_until = 0.0
+
+    def replace(self, orders: List[Dict[Text, Any]]) -> int:
+        previous = {_order_key(o): o for o in self.orders}
+        changed = sum(1 for o in orders if previous.get(_order_key(o)) != o)
+        self.orders = list(orders)
+        self.full_synced_at = time.monotonic()
+        self._update_watermark(orders)
+        return changed
+
+    def merge(self, changed_orders: List[Dict[Text, Any]]) -> int:
+        # Urutan backend dipertahankan; pesanan baru diletakkan paling depan.
+        positions = {_order_key(o): i for i, o in enumerate(self.orders)}
+        new_orders = []
+        for order in changed_orders:
+            index = positions.get(_order_key(order))
+            if index is None:
+                new_orders.append(order)
+            else:
+                self.orders[index] = order
+        self.orders = new_orders + self.orders
+        self._update_watermark(changed_orders)
+        return len(changed_orders)
+
+    def _update_watermark(self, orders: List[Dict[Text, Any]]) -> None:
+        for order in orders:
+            stamp = _order_timestamp(order)
+            if stamp > self.watermark:
+                self.watermark = stamp
+
+
+class OrderSync:
+    """Sinkronisasi inkremental /order/all per pengguna.
+
+    Jika ORDER_SYNC_UPDATED_SINCE_PARAM diatur, hanya pesanan yang berubah
+    sejak watermark yang diminta lalu digabung ke salinan lokal. Jika tidak,
+    riwayat penuh diambil dan dibandingkan dengan salinan lokal. Penghapusan
+    pesanan hanya terlihat saat sinkronisasi penuh, jadi sinkronisasi penuh
+    tetap dilakukan setiap ORDER_SYNC_FULL_RESYNC_SECONDS.
+    """
+
+    def __init__(self, max_users: int, updated_since_param: Text, full_resync_seconds: float,
+                 max_bytes: int = 0) -> None:
+        self.max_users = max_users
+        self.updated_since_param = updated_since_param
+        self.full_resync_seconds = full_resync_seconds
+        self.budget = ByteBudget(max_bytes)
+        self.evictions = 0
+        self._views: "OrderedDict[Text, OrderView]" = OrderedDict()
+
+    @staticmethod
+    def user_key(auth_token: Text) -> Text:
+        return hashlib.sha256(auth_token.encode("utf-8")).hexdigest()[:32]
+
+    def view(self, auth_token: Text) -> Optional[OrderView]:
+        return self._views.get(self.user_key(auth_token))
+
+    def forget(self, auth_token: Text) -> None:
+        key = self.user_key(auth_token)
+        self._views.pop(key, None)
+        self.budget.release(key)
+
+    async def sync(self, auth_token: Text, action_name: Text) -> BackendResponse:
+        """Respons berbentuk /order/all dengan `data` berisi riwayat lengkap hasil gabungan."""
+        key = self.user_key(auth_token)
+        view = self._views.get(key)
+        if view is not None and view.reusable_until:
+            fresh = view.reusable_until > time.monotonic()
+            view.reusable_until = 0.0
+            PREFETCH.record("order", "hit" if fresh else "wasted")
+            if fresh:
+                return BackendResponse(200, {"success": True, "data": list(view.orders)}, "")
+        incremental = (
+            bool(self.updated_since_param)
+            and view is not None
+            and bool(view.watermark)
+            and time.monotonic() - view.full_synced_at < self.full_resync_seconds
+        )
+        path = "/order/all"
+        if incremental:
+            path += "?" + urllib.parse.urlencode(
+                {self.updated_since_param: view.watermark})
+        headers = {"Authorization": f"Bearer {auth_token}"}
+
+        response = await get_json("order", path, action_name, headers=headers)
+        if response.status != 200:
+            if response.status in (401, 403):
+                self._views.pop(key, None)
+                self.budget.release(key)
+            return response
+        data = response.data
+        if not data.get("success"):
+            return response
+
+        orders = data.get("data") or []
+        if view is None:
+            view = OrderView()
+        view.fetched_at = time.monotonic()
+        if incremental:
+            changed = view.merge(orders)
+            METRICS.inc("order_sync_total", mode="incremental")
+        else:
+            changed = view.replace(orders)
+            METRICS.inc("order_sync_total", mode="full")
+        span = current_span()
+        if span is not None:
+            span.set(order_sync="incremental" if incremental else "full", changed_orders=changed)
+        METRICS.inc("order_sync_changed_orders_total", changed)
+        self._store(key, view)
+        return BackendResponse(response.status, dict(data, data=list(view.orders)), "")
+
+    def retain(self, auth_token: Text, seconds: float) -> None:
+        """Izinkan sync berikutnya memakai salinan lokal tanpa request.
+
+        Batasnya dihitung dari request terakhir ke backend, jadi pemakaian
+        ulang berturut-turut tidak membuat salinan basi lebih dari `seconds`.
+        """
+        view = self._views.get(self.user_key(auth_token))
+        if view is None or view.fetched_at + seconds <= time.monotonic():
+            return
+        view.reusable_until = view.fetched_at + seconds
+        PREFETCH.record("order", "issued")
+
+    def invalidate_orders(self, order_ids: Iterable[Text]) -> int:
+        """Salinan yang memuat pesanan berubah tidak dipakai ulang dan disinkron penuh berikutnya."""
+        order_ids = {str(order_id) for order_id in order_ids}
+        affected = 0
+        for view in self._views.values():
+            if any(str(_order_key(order)) in order_ids for order in view.orders):
+                view.reusable_until = 0.0
+                # Memaksa sinkronisasi penuh berikutnya, terlepas dari nilai jam monotonic.
+                view.full_synced_at = -self.full_resync_seconds
+                affected += 1
+        return affected
+
+    def _store(self, key: Text, view: OrderView) -> None:
+        self._views[key] = view
+        self._views.move_to_end(key)
+        self.budget.charge(key, view.orders)
+        # Salinan yang baru disimpan tidak ikut dibuang walau melebihi batas sendirian.
+        while len(self._views) > 1 and (len(self._views) > self.max_users or self.budget.exceeded()):
+            evicted, _ = self._views.popitem(last=False)
+            self.budget.release(evicted)
+            self.evictions += 1
+
+    def memory_stats(self) -> Dict[Text, int]:
+        return {"entries": len(self._views), "bytes": self.budget.bytes, "evictions": self.evictions}
+
+
+ORDER_SYNC = OrderSync(
+    ORDER_SYNC_MAX_USERS, ORDER_SYNC_UPDATED_SINCE_PARAM, ORDER_SYNC_FULL_RESYNC_SECONDS,
+    ORDER_SYNC_MAX_BYTES)
+
+register_cache("order_sync", ORDER_SYNC.memory_stats)
+
+
+async def fetch_order_history(ctx, _) -> BackendResponse:
+    """Stage fetch pipeline untuk action pesanan; `ctx.query` berisi authToken."""
+    print(f"{ctx.action_name}: sinkronisasi riwayat pesanan.")
+    return await ORDER_SYNC.sync(ctx.query, ctx.action_name)
+
+
+def retain_order_history(ctx, _) -> None:
+    """Hook `after` action pesanan: status pembayaran/pesanan sering ditanya berurutan."""
+    ORDER_SYNC.retain(ctx.query, PREFETCH.ttl_seconds if PREFETCH.enabled else 0)
+
+
+def _collect_order_sync_stats():
+    yield "order_sync_cached_users", {}, len(ORDER_SYNC._views)
+
+
+METRICS.register_collector(_collect_order_sync_stats)
@@ -0,0 +1,395 @@
+import asyncio
+import inspect
+import time
+import urllib.parse
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Sequence, Text, Union
+
+from rasa_sdk import Action, Tracker
+from rasa_sdk.events import SlotSet
+from rasa_sdk.executor import CollectingDispatcher
+from rasa_sdk.types import DomainDict
+
+from . import action_http
+from .action_admission import BackendOverloaded, reply_overloaded
+from .action_cache import (
+    LAST_REPLY_CACHE,
+    NEGATIVE_SEARCH_CACHE,
+    PRODUCT_DETAIL_CACHE,
+    RESPONSE_CACHE,
+    CachedResponse,
+    note_catalog_listing,
+)
+from .action_catalog import CATALOG, CATALOG_LISTINGS
+from .action_http import BackendResponse, get_json
+from .action_metrics import METRICS
+from .action_tracing import span, traced_run
+
+# Pipeline action: query -> fetch -> validate -> project -> rank -> render.
+# Setiap stage adalah callable `stage(ctx, value)` (boleh async) yang menerima
+# keluaran stage sebelumnya. Stage menghentikan pipeline dengan `raise Halt(...)`
+# yang dipetakan ke salah satu balasan di `Replies`. Caching (negative cache,
+# balasan terakhir), coalescing, timeout, tracing dan metrik diterapkan di sini
+# dan di action_http.get_json, bukan di masing-masing action.
+
+STAGES = ("fetch", "validate", "project", "rank", "render")
+AUTH_ERROR_MARKERS = ("Akses ditolak", "Token tidak disertakan")
+
+
+class Template:
+    """Balasan berupa response/template domain, bukan teks."""
+
+    def __init__(self, name: Text) -> None:
+        self.name = name
+
+
+Reply = Union[Text, Template]
+
+
+class Replies:
+    """Kumpulan balasan per kejadian (empty, status_error, connection_error, ...).
+
+    Teks diformat dengan field konteks, mis. `{query}`, `{status}`, `{message}`.
+    """
+
+    def __init__(self, **replies: Reply) -> None:
+        self.replies = replies
+
+    def but(self, **overrides: Reply) -> "Replies":
+        return Replies(**dict(self.replies, **overrides))
+
+    def get(self, key: Text, default: Optional[Reply] = None) -> Optional[Reply]:
+        return self.replies.get(key, default)
+
+    def utter(self, dispatcher: CollectingDispatcher, reply: Reply, fields: Dict[Text, Any]) -> Optional[Text]:
+        if isinstance(reply, Template):
+            dispatcher.utter_message(template=reply.name)
+            return None
+        text = reply.format(**fields)
+        dispatcher.utter_message(text=text)
+        return text
+
+
+class Halt(Exception):
+    """Menghentikan pipeline dan mengirim balasan `reply` dari `Replies`."""
+
+    def __init__(self, reply: Text, **fields: Any) -> None:
+        super().__init__(reply)
+        self.reply = reply
+        self.fields = fields
+
+
+class PipelineContext:
+    def __init__(self, action_name: Text, dispatcher: CollectingDispatcher,
+                 tracker: Tracker, replies: Replies) -> None:
+        self.action_name = action_name
+        self.dispatcher = dispatcher
+        self.tracker = tracker
+        self.replies = replies
+        self.query: Optional[Text] = None
+        self.fields: Dict[Text, Any] = {}
+        self.items: Any = None
+        # False jika balasan dibangun dari data yang sudah diketahui basi.
+        self.cacheable = True
+        # Waktu (time.time()) data diambil dari backend; None = baru saja.
+        self.data_time: Optional[float] = None
+
+
+Stage = Callable[[PipelineContext, Any], Any]
+
+
+class Pipeline:
+    def __init__(
+        self,
+        *,
+        fetch: Stage,
+        validate: Stage,
+        render: Stage,
+        replies: Replies,
+        project: Optional[Stage] = None,
+        rank: Optional[Stage] = None,
+        query: Optional[Callable[[PipelineContext], Optional[Text]]] = None,
+        negative_cache: Optional[Text] = None,
+        response_cache: Optional[Text] = None,
+        detail_cache: bool = False,
+        reset_slots: Sequence[Text] = (),
+        remember_reply: bool = True,
+        after: Optional[Stage] = None,
+    ) -> None:
+        self.fetch = fetch
+        self.validate = validate
+        self.project = project
+        self.rank = rank
+        self.render = render
+        self.replies = replies
+        self.query = query
+        self.negative_cache = negative_cache
+        # Kind katalog ("product"/"shop") untuk action anonim yang balasannya
+        # sama bagi semua pengguna sampai katalog berubah.
+        self.response_cache = response_cache
+        # Record produk lengkap hasil validate ikut mengisi PRODUCT_DETAIL_CACHE.
+        self.detail_cache = detail_cache
+        self.reset_slots = tuple(reset_slots)
+        self.remember_reply = remember_reply
+        self.after = after
+
+    async def run(self, action_name: Text, dispatcher: CollectingDispatcher,
+                  tracker: Tracker) -> List[Dict[Text, Any]]:
+        # Loop poll katalog juga menerapkan invalidasi yang diterima worker lain.
+        CATALOG.ensure_running()
+        ctx = PipelineContext(action_name, dispatcher, tracker, self.replies)
+        cache_key = None
+        if self.response_cache and RESPONSE_CACHE.enabled:
+            query = self.query(ctx) if self.query is not None else None
+            cache_key = RESPONSE_CACHE.key(action_name, self.response_cache, query)
+            cached = RESPONSE_CACHE.get(cache_key)
+            if cached is not None:
+                print(f"{action_name}: response cache hit, stage pipeline dilewati.")
+                ctx.query = query
+                dispatcher.messages.extend(cached.messages)
+                self._after(ctx, cached.items)
+                METRICS.inc("pipeline_runs_total", action=action_name, outcome="cached")
+                return cached.events
+        first_message = len(dispatcher.messages)
+        outcome = "ok"
+        try:
+            await self._run(ctx)
+        except Halt as halt:
+            outcome = halt.reply
+            print(f"{action_name}: {halt.reply} {halt.fields or ''}".rstrip())
+            self._reply(ctx, halt.reply, halt.fields)
+        except BackendOverloaded as e:
+            outcome = "overloaded"
+            print(f"{action_name}: request ditolak (overload): {e}")
+            reply_overloaded(dispatcher, action_name, ctx.query or "")
+        except action_http.ClientConnectorError as e:
+            outcome = "connection_error"
+            print(f"{action_name}: connection error: {e}")
+            self._reply(ctx, "connection_error")
+        except asyncio.TimeoutError as e:
+            outcome = "timeout"
+            print(f"{action_name}: backend timeout: {e!r}")
+            self._reply(ctx, "timeout" if self.replies.get("timeout") else "connection_error")
+        except (action_http.ContentTypeError, action_http.BadPayload) as e:
+            outcome = "content_error"
+            print(f"{action_name}: respons backend bukan JSON yang valid: {e}")
+            self._reply(ctx, "content_error")
+        except Exception as e:
+            outcome = "unexpected_error"
+            print(f"{action_name}: an unexpected error occurred: {e}")
+            self._reply(ctx, "unexpected_error")
+        METRICS.inc("pipeline_runs_total", action=action_name, outcome=outcome)
+        events = [SlotSet(slot, None) for slot in self.reset_slots]
+        # Hasil kosong pipeline ber-negative cache disimpan di NEGATIVE_SEARCH_CACHE
+        # saja, yang dibuang saat record dengan nama cocok muncul lewat invalidasi.
+        cacheable_outcomes = ("ok",) if self.negative_cache else ("ok", "empty")
+        if cache_key is not None and ctx.cacheable and outcome in cacheable_outcomes:
+            RESPONSE_CACHE.put(cache_key, CachedResponse(
+                dispatcher.messages[first_message:], events, ctx.items))
+        return events
+
+    async def _run(self, ctx: PipelineContext) -> None:
+        if self.query is not None:
+            ctx.query = self.query(ctx)
+            if not ctx.query:
+                raise Halt("missing_query")
+            ctx.fields["query"] = ctx.query
+
+        if self.negative_cache and NEGATIVE_SEARCH_CACHE.contains(self.negative_cache, ctx.query):
+            print(f"{ctx.action_name}: negative cache hit untuk '{ctx.query}', API tidak dipanggil.")
+            ctx.cacheable = False
+            self._reply(ctx, "empty")
+            return
+
+        preamble = self.replies.get("preamble")
+        if preamble is not None:
+            self.replies.utter(ctx.dispatcher, preamble, ctx.fields)
+
+        value: Any = None
+        try:
+            for stage_name in STAGES:
+                stage = getattr(self, stage_name)
+                if stage is None:
+                    continue
+                if stage_name == "render":
+                    ctx.items = value
+                started = time.perf_counter()
+                with span(stage_name):
+                    value = stage(ctx, value)
+                    if inspect.isawaitable(value):
+                        value = await value
+                METRICS.observe("pipeline_stage_seconds", time.perf_counter() - started,
+                                action=ctx.action_name, stage=stage_name)
+                if stage_name == "validate" and self.detail_cache:
+                    PRODUCT_DETAIL_CACHE.put_many(value, ctx.data_time)
+        except Halt as halt:
+            if halt.reply == "empty" and self.negative_cache:
+                NEGATIVE_SEARCH_CACHE.add(self.negative_cache, ctx.query)
+            raise
+
+        # Hasil render sudah berupa teks jadi; tidak diformat ulang.
+        for reply in value:
+            if isinstance(reply, Template):
+                ctx.dispatcher.utter_message(template=reply.name)
+            else:
+                ctx.dispatcher.utter_message(text=reply)
+        if self.remember_reply and len(value) == 1 and not isinstance(value[0], Template):
+            LAST_REPLY_CACHE.remember(ctx.action_name, ctx.query or "", value[0])
+
+        self._after(ctx, ctx.items)
+
+    def _after(self, ctx: PipelineContext, items: Any) -> None:
+        # Balasan kosong/error (juga dari response cache) tidak punya item untuk hook.
+        if self.after is not None and items is not None:
+            # Dijalankan setelah balasan dikirim (mis. prefetch); kegagalannya
+            # tidak boleh mengubah balasan.
+            try:
+                self.after(ctx, items)
+            except Exception as e:
+                print(f"{ctx.action_name}: hook after gagal: {e!r}")
+
+    def _reply(self, ctx: PipelineContext, key: Text, fields: Optional[Dict[Text, Any]] = None) -> None:
+        reply = self.replies.get(key)
+        if reply is None:
+            reply = self.replies.get("unexpected_error")
+        self.replies.utter(ctx.dispatcher, reply, dict(ctx.fields, **(fields or {})))
+
+
+class PipelineAction(Action, ABC):
+    """Action yang seluruh alurnya dideklarasikan lewat atribut `pipeline`."""
+
+    pipeline: Pipeline
+
+    @abstractmethod
+    def name(self) -> Text:
+        raise NotImplementedError
+
+    @traced_run
+    async def run(
+        self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: DomainDict
+    ) -> List[Dict[Text, Any]]:
+        return await self.pipeline.run(self.name(), dispatcher, tracker)
+
+
+# --- Stage query -------------------------------------------------------------
+
+def entity_or_slot(entity: Text, slot: Text) -> Callable[[PipelineContext], Optional[Text]]:
+    def query(ctx: PipelineContext) -> Optional[Text]:
+        return next(ctx.tracker.get_latest_entity_values(entity), None) or ctx.tracker.get_slot(slot)
+    return query
+
+
+def auth_token(ctx: PipelineContext) -> Optional[Text]:
+    metadata = ctx.tracker.latest_message.get("metadata") or {}
+    return metadata.get("authToken")
+
+
+# --- Stage fetch -------------------------------------------------------------
+
+def get(route: Text, path: Text) -> Stage:
+    """GET `path`; `{query}` di path diganti dengan query yang sudah di-encode."""
+    async def fetch(ctx: PipelineContext, _: Any) -> BackendResponse:
+        request_path = path.format(query=urllib.parse.quote_plus(ctx.query or ""))
+        print(f"{ctx.action_name}: GET {request_path}")
+        return await get_json(route, request_path, ctx.action_name)
+    return fetch
+
+
+def catalog_listing(kind: Text, route: Text, path: Text, key: Text) -> Stage:
+    """Daftar lengkap dari snapshot katalog bersama, atau dari backend jika belum ada."""
+    async def fetch(ctx: PipelineContext, _: Any) -> BackendResponse:
+        listing = CATALOG_LISTINGS[kind]
+        records = await listing.current()
+        if records is not None:
+            if listing.stale():
+                # Versi baru sedang dibangun di worker; jangan simpan balasan ini di response cache.
+                ctx.cacheable = False
+            ctx.data_time = CATALOG.current().created_at
+            print(f"{ctx.action_name}: memakai snapshot katalog v{CATALOG.current().version}.")
+            return BackendResponse(200, {"success": True, "data": {key: records}}, "")
+        print(f"{ctx.action_name}: GET {path}")
+        response = await get_json(route, path, ctx.action_name)
+        if response.status == 200 and response.data.get("success"):
+            records = (response.data.get("data") or {}).get(key)
+            if records is not None:
+                note_catalog_listing(kind, records)
+        return response
+    return fetch
+
+
+# --- Stage validate ----------------------------------------------------------
+
+def expect(key: Optional[Text] = None, auth: bool = False) -> Stage:
+    """Memeriksa status, `success` dan bentuk `data`; mengembalikan payload."""
+    def validate(ctx: PipelineContext, response: BackendResponse) -> Any:
+        if auth and response.status in (401, 403):
+            raise Halt("auth_error", status=response.status)
+        if response.status != 200:
+            print(f"{ctx.action_name}: backend status {response.status}, response: {response.text}")
+            raise Halt("status_error", status=response.status)
+        data = response.data
+        if not data.get("success"):
+            default = ctx.replies.get("server_error_default", "")
+            message = data.get("message", default.format(**ctx.fields))
+            if auth and any(marker in message for marker in AUTH_ERROR_MARKERS):
+                raise Halt("auth_error")
+            raise Halt("server_error", message=message)
+        if "data" not in data:
+            raise Halt("format_error")
+        payload = data["data"]
+        if key is not None:
+            if not isinstance(payload, dict) or key not in payload:
+                raise Halt("format_error")
+            payload = payload[key]
+        if not payload:
+            raise Halt("empty")
+        return payload
+    return validate
+
+
+# --- Stage project / rank ----------------------------------------------------
+
+def each(projection: Callable[[Dict[Text, Any]], Dict[Text, Any]]) -> Stage:
+    def project(ctx: PipelineContext, records: List[Dict[Text, Any]]) -> List[Dict[Text, Any]]:
+        return [projection(record) for record in records]
+    return project
+
+
+def one(projection: Callable[[Dict[Text, Any]], Dict[Text, Any]]) -> Stage:
+    def project(ctx: PipelineContext, record: Dict[Text, Any]) -> Dict[Text, Any]:
+        return projection(record)
+    return project
+
+
+def sort_by(key: Callable[[Dict[Text, Any]], Any], reverse: bool = False) -> Stage:
+    def rank(ctx: PipelineContext, items: List[Dict[Text, Any]]) -> List[Dict[Text, Any]]:
+        return sorted(items, key=key, reverse=reverse)
+    return rank
+
+
+# --- Stage render ------------------------------------------------------------
+
+def bulleted(intro: Text, line: Callable[[Dict[Text, Any]], Text],
+             limit: Optional[int] = None, more: Optional[Text] = None) -> Stage:
+    """Satu pesan: intro, satu baris per item (maks `limit`), lalu sisa item."""
+    def render(ctx: PipelineContext, items: List[Dict[Text, Any]]) -> List[Reply]:
+        shown = items[:limit] if limit else items
+        parts = [intro.format(**ctx.fields)]
+        parts.extend(line(item) for item in shown)
+        if more and limit and len(items) > limit:
+            parts.append(more.format(rest=len(items) - limit))
+        return ["".join(parts)]
+    return render
+
+
+def messages(intro: Reply, line: Callable[[Dict[Text, Any]], Text], limit: int) -> Stage:
+    """Intro lalu satu pesan terpisah per item."""
+    def render(ctx: PipelineContext, items: List[Dict[Text, Any]]) -> List[Reply]:
+        return [intro] + [line(item) for item in items[:limit]]
+    return render
+
+
+def single(message: Callable[[Dict[Text, Any]], Text]) -> Stage:
+    def render(ctx: PipelineContext, item: Dict[Text, Any]) -> List[Reply]:
+        return [message(item)]
+    return render
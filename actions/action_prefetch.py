@@ -0,0 +1,185 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Text, Tuple
+
+from .action_admission import ADMISSION
+from .action_cache import PRODUCT_DETAIL_CACHE, normalize_search_term
+from .action_catalog import CATALOG
+from .action_constants import (
+    PREFETCH_MAX_BYTES,
+    PREFETCH_MAX_ENTRIES,
+    PREFETCH_MAX_INFLIGHT,
+    PREFETCH_TOP_N,
+    PREFETCH_TTL_SECONDS,
+)
+from .action_http import BackendResponse, get_json
+from .action_memory import ByteBudget, register_cache
+from .action_metrics import METRICS
+from .action_tracing import detach_context
+
+PrefetchKey = Tuple[Text, Text]
+
+
+class Prefetcher:
+    """Mengambil data yang kemungkinan diminta di giliran berikutnya.
+
+    Setelah balasan terkirim, request GET publik dijadwalkan di latar
+    belakang (prioritas admission terendah, dilewati bila route sedang
+    antre atau jumlah prefetch berjalan sudah PREFETCH_MAX_INFLIGHT).
+    Hasilnya disimpan sampai PREFETCH_TTL_SECONDS dan hanya dipakai sekali.
+    """
+
+    def __init__(self, top_n: int, ttl_seconds: float, max_inflight: int, max_entries: int,
+                 max_bytes: int = 0) -> None:
+        self.top_n = top_n
+        self.ttl_seconds = ttl_seconds
+        self.max_inflight = max_inflight
+        self.max_entries = max_entries
+        self.budget = ByteBudget(max_bytes)
+        self.evictions = 0
+        self._entries: "OrderedDict[PrefetchKey, Tuple[float, Text, BackendResponse]]" = OrderedDict()
+        self._inflight: Set[PrefetchKey] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        # Nama produk dari hasil pencarian terakhir -> id, untuk detail produk.
+        self._product_ids: "OrderedDict[Text, Text]" = OrderedDict()
+        self._catalog_version: Optional[int] = None
+        self.stats: Dict[Text, Dict[Text, int]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.top_n > 0 and self.ttl_seconds > 0
+
+    def record(self, kind: Text, event: Text) -> None:
+        """event: issued, hit, inflight_hit, miss, wasted, skipped."""
+        counters = self.stats.setdefault(kind, {})
+        counters[event] = counters.get(event, 0) + 1
+        METRICS.inc("prefetch_events_total", kind=kind, event=event)
+
+    def schedule(self, kind: Text, route: Text, path: Text) -> None:
+        key = (route, path)
+        if not self.enabled or key in self._inflight or key in self._entries:
+            return
+        limiter = ADMISSION.limiter(route)
+        if len(self._inflight) >= self.max_inflight or limiter.queued \
+                or limiter.active >= limiter.max_concurrency:
+            self.record(kind, "skipped")
+            return
+        self._inflight.add(key)
+        task = asyncio.get_running_loop().create_task(self._fetch(kind, route, path))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self.record(kind, "issued")
+
+    async def _fetch(self, kind: Text, route: Text, path: Text) -> None:
+        detach_context()
+        key = (route, path)
+        try:
+            response = await get_json(route, path, "prefetch")
+        except Exception as e:
+            print(f"Prefetch {path} gagal: {e!r}")
+            METRICS.inc("prefetch_errors_total", kind=kind)
+            return
+        finally:
+            self._inflight.discard(key)
+        if response.status == 200 and response.data.get("success"):
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, kind, response)
+            self._entries.move_to_end(key)
+            self.budget.charge(key, response.data)
+            while len(self._entries) > self.max_entries or self.budget.exceeded():
+                evicted, (_, evicted_kind, _) = self._entries.popitem(last=False)
+                self.budget.release(evicted)
+                self.evictions += 1
+                self.record(evicted_kind, "wasted")
+
+    async def get_json(self, kind: Text, route: Text, path: Text, action_name: Text) -> BackendResponse:
+        """Seperti action_http.get_json, tetapi memakai hasil prefetch bila ada."""
+        key = (route, path)
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.budget.release(key)
+            if entry[0] > time.monotonic():
+                self.record(kind, "hit")
+                return entry[2]
+            self.record(kind, "wasted")
+        if key in self._inflight:
+            # Request prefetch masih berjalan; get_json akan bergabung dengannya.
+            self.record(kind, "inflight_hit")
+        elif self.enabled:
+            self.record(kind, "miss")
+        return await get_json(route, path, action_name)
+
+    def discard(self, route: Text, path: Text) -> bool:
+        key = (route, path)
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self.budget.release(key)
+        return True
+
+    def note_products(self, products: List[Dict[Text, Any]]) -> None:
+        for product in products:
+            if product.get("id") and product.get("name"):
+                name = normalize_search_term(product["name"])
+                self._product_ids[name] = product["id"]
+                self._product_ids.move_to_end(name)
+        while len(self._product_ids) > self.max_entries:
+            self._product_ids.popitem(last=False)
+
+    def product_id(self, name: Text) -> Optional[Text]:
+        return self._product_ids.get(normalize_search_term(name))
+
+    def forget_products(self, product_ids: Optional[List[Text]] = None) -> int:
+        """Membuang pemetaan nama -> id untuk produk `product_ids` (None = semua)."""
+        if product_ids is None:
+            forgotten = len(self._product_ids)
+            self._product_ids.clear()
+            return forgotten
+        wanted = {str(product_id) for product_id in product_ids}
+        stale = [name for name, product_id in self._product_ids.items() if str(product_id) in wanted]
+        for name in stale:
+            del self._product_ids[name]
+        return len(stale)
+
+    def memory_stats(self) -> Dict[Text, int]:
+        return {"entries": len(self._entries), "bytes": self.budget.bytes, "evictions": self.evictions}
+
+
+PREFETCH = Prefetcher(PREFETCH_TOP_N, PREFETCH_TTL_SECONDS, PREFETCH_MAX_INFLIGHT,
+                      PREFETCH_MAX_ENTRIES, PREFETCH_MAX_BYTES)
+
+register_cache("prefetch", PREFETCH.memory_stats)
+
+
+def _forget_on_new_snapshot() -> None:
+    # Snapshot baru bisa mengganti nama atau menghapus produk mana pun; patch per
+    # record ditangani Invalidator.
+    generation = CATALOG.generation()
+    version = generation[0] if generation is not None else None
+    if version != PREFETCH._catalog_version:
+        PREFETCH._catalog_version = version
+        PREFETCH.forget_products()
+
+
+CATALOG.on_change(_forget_on_new_snapshot)
+
+
+def prefetch_product_details(ctx, products: List[Dict[Text, Any]]) -> None:
+    """Hook `after` pencarian produk: detail produk teratas kemungkinan diminta berikutnya."""
+    PREFETCH.note_products(products)
+    for product in products[:PREFETCH.top_n]:
+        # Detail yang sudah ada di cache detail tidak perlu di-prefetch.
+        if product.get("id") and not PRODUCT_DETAIL_CACHE.contains(product["id"]):
+            PREFETCH.schedule("product_detail", "product_detail", f"/product/{product['id']}")
+
+
+def _collect_prefetch_stats():
+    yield "prefetch_cached_entries", {}, len(PREFETCH._entries)
+    for kind, counters in PREFETCH.stats.items():
+        issued = counters.get("issued", 0)
+        used = counters.get("hit", 0) + counters.get("inflight_hit", 0)
+        if issued:
+            yield "prefetch_hit_ratio", {"kind": kind}, used / issued
+
+
+METRICS.register_collector(_collect_prefetch_stats)
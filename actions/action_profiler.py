@@ -0,0 +1,231 @@
+import asyncio
+import inspect
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Text
+
+from . import action_admin_server
+from .action_constants import (
+    ACTION_PROFILE_DIR,
+    ACTION_PROFILE_INTERVAL_MS,
+    ACTION_PROFILE_ON_START,
+    ACTION_PROFILE_SECONDS,
+    ACTION_PROFILE_SIGNAL,
+)
+
+# Nama task asyncio selama Action.run berjalan saat profiler aktif; dipakai
+# thread sampler untuk mengelompokkan stack per action.
+TASK_PREFIX = "action:"
+IDLE = "(idle)"
+OTHER = "(other)"
+# Frame teratas sampel dari task action yang sedang menunggu (await), bukan memakai CPU.
+AWAIT = "(await)"
+# Batas satu jendela profiling; sampler yang tidak berhenti menumpuk stack tanpa batas.
+MAX_PROFILE_SECONDS = 300.0
+
+
+def _frame_label(frame) -> Text:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(frame) -> Text:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def running_task(loop: asyncio.AbstractEventLoop, frame) -> Optional[asyncio.Task]:
+    """Task milik `loop` yang coroutine-nya ada di stack `frame` (dibaca dari thread lain).
+
+    Coroutine terluar sebuah task berjalan di stack thread loop selama task itu
+    aktif; None berarti loop sedang idle atau menjalankan callback biasa.
+    """
+    frames = set()
+    while frame is not None:
+        if frame.f_code.co_flags & inspect.CO_COROUTINE:
+            frames.add(id(frame))
+        frame = frame.f_back
+    if not frames:
+        return None
+    for task in asyncio.all_tasks(loop):
+        coroutine_frame = getattr(task.get_coro(), "cr_frame", None)
+        if coroutine_frame is not None and id(coroutine_frame) in frames:
+            return task
+    return None
+
+
+def _action_of(task: asyncio.Task) -> Optional[Text]:
+    name = task.get_name()
+    return name[len(TASK_PREFIX):] if name.startswith(TASK_PREFIX) else None
+
+
+class SamplingProfiler:
+    """Sampling profiler untuk thread event loop action server.
+
+    Thread terpisah membaca stack thread loop lewat `sys._current_frames()`
+    setiap ACTION_PROFILE_INTERVAL_MS dan mencari task pemiliknya di
+    `asyncio.all_tasks()`. Task action lain yang sedang menunggu I/O tidak ada
+    di stack itu; rantai await-nya dibaca dengan `task.get_stack()` dan dicatat
+    di bawah frame "(await)". Sampel dikelompokkan per action berdasarkan nama
+    task, lalu ditulis sebagai collapsed stacks (format flamegraph.pl / speedscope).
+    """
+
+    def __init__(self, output_dir: Text, interval_ms: float) -> None:
+        self.output_dir = output_dir
+        self.interval = max(0.001, interval_ms / 1000)
+        self.running = False
+        self.last_outputs: List[Text] = []
+        self._lock = threading.Lock()
+
+    def start(self, seconds: float, loop: Optional[asyncio.AbstractEventLoop] = None) -> bool:
+        """Mulai satu jendela profiling; harus dipanggil dari thread event loop."""
+        if not 0 < seconds <= MAX_PROFILE_SECONDS:
+            raise ValueError(f"durasi profiling harus di antara 0 dan {MAX_PROFILE_SECONDS:.0f} detik")
+        with self._lock:
+            if self.running:
+                return False
+            self.running = True
+        if loop is None:
+            loop = asyncio._get_running_loop()
+        thread = threading.Thread(
+            target=self._sample, args=(threading.get_ident(), loop, seconds),
+            name="action-profiler", daemon=True)
+        thread.start()
+        print(f"Profiler: sampling {seconds:.0f} detik setiap {self.interval * 1000:.1f} ms.")
+        return True
+
+    def _sample(self, thread_id: int, loop, seconds: float) -> None:
+        stacks: Dict[Text, Counter] = {}
+        samples = 0
+        deadline = time.monotonic() + seconds
+        try:
+            while time.monotonic() < deadline:
+                frame = sys._current_frames().get(thread_id)
+                if frame is None:
+                    break
+                task = running_task(loop, frame)
+                if task is None:
+                    action = IDLE
+                else:
+                    action = _action_of(task) or OTHER
+                stacks.setdefault(action, Counter())[_collapse(frame)] += 1
+                del frame
+                self._sample_suspended(loop, task, stacks)
+                samples += 1
+                time.sleep(self.interval)
+        finally:
+            self.last_outputs = self._write(stacks)
+            self.running = False
+            print(f"Profiler: {samples} sampel ditulis ke {', '.join(self.last_outputs) or '-'}")
+
+    @staticmethod
+    def _sample_suspended(loop, running: Optional[asyncio.Task], stacks: Dict[Text, Counter]) -> None:
+        for task in asyncio.all_tasks(loop):
+            action = _action_of(task)
+            if action is None or task is running:
+                continue
+            labels = [_frame_label(frame) for frame in task.get_stack()]
+            if labels:
+                stacks.setdefault(action, Counter())[";".join([AWAIT] + labels)] += 1
+
+    def _write(self, stacks: Dict[Text, Counter]) -> List[Text]:
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(
+            self.output_dir, f"profile-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}")
+        outputs = []
+        # File gabungan: nama action menjadi frame paling atas.
+        with open(f"{prefix}-all.collapsed", "w", encoding="utf-8") as f:
+            for action, counter in stacks.items():
+                for stack, count in counter.items():
+                    f.write(f"{action};{stack} {count}\n")
+        outputs.append(f"{prefix}-all.collapsed")
+        for action, counter in stacks.items():
+            if action in (IDLE, OTHER):
+                continue
+            path = f"{prefix}-{action}.collapsed"
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in counter.items():
+                    f.write(f"{stack} {count}\n")
+            outputs.append(path)
+        return outputs
+
+
+PROFILER = SamplingProfiler(
+    ACTION_PROFILE_DIR or os.path.join(tempfile.gettempdir(), "action-profiles"),
+    ACTION_PROFILE_INTERVAL_MS,
+)
+_start_pending = ACTION_PROFILE_ON_START
+
+
+def _start_default() -> None:
+    try:
+        PROFILER.start(ACTION_PROFILE_SECONDS)
+    except ValueError as e:
+        print(f"Profiler: ACTION_PROFILE_SECONDS tidak valid: {e}")
+
+
+def enter_action(action_name: Text) -> Optional[Text]:
+    """Menandai task yang menjalankan action; mengembalikan nama lama untuk dipulihkan."""
+    global _start_pending
+    if _start_pending:
+        _start_pending = False
+        _start_default()
+    if not PROFILER.running:
+        return None
+    task = asyncio.current_task()
+    if task is None:
+        return None
+    previous = task.get_name()
+    task.set_name(f"{TASK_PREFIX}{action_name}")
+    return previous
+
+
+def exit_action(previous: Optional[Text]) -> None:
+    if previous is None:
+        return
+    task = asyncio.current_task()
+    if task is not None:
+        task.set_name(previous)
+
+
+def _on_sigusr1(signum, frame) -> None:
+    # Handler sinyal berjalan di main thread, yaitu thread event loop Rasa SDK.
+    if asyncio._get_running_loop() is None:
+        print("Profiler: SIGUSR1 diterima tetapi event loop belum berjalan.")
+        return
+    _start_default()
+
+
+def install_signal_handler() -> None:
+    """Memasang handler SIGUSR1; hanya dipanggil saat ACTION_PROFILE_SIGNAL=1."""
+    if not hasattr(signal, "SIGUSR1") or threading.current_thread() is not threading.main_thread():
+        return
+    signal.signal(signal.SIGUSR1, _on_sigusr1)
+
+
+async def _handle_profile(request):
+    from aiohttp import web
+    try:
+        seconds = float(request.query.get("seconds", ACTION_PROFILE_SECONDS))
+        started = PROFILER.start(seconds)
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    return web.json_response({
+        "started": started,
+        "seconds": seconds,
+        "output_dir": PROFILER.output_dir,
+        "last_outputs": PROFILER.last_outputs,
+    }, status=202 if started else 409)
+
+
+action_admin_server.register_route("POST", "/profile", _handle_profile)
+if ACTION_PROFILE_SIGNAL:
+    install_signal_handler()
@@ -0,0 +1,93 @@
+import importlib
+import multiprocessing
+import threading
+import time
+from typing import Callable, Dict, List, Text, Tuple, Type
+
+from .action_constants import ACTION_WARMUP
+
+# Daftar deklaratif semua custom action: nama action -> (modul, kelas).
+# Action baru cukup ditambahkan di sini agar ikut diekspor dan di-warm-up.
+ACTION_REGISTRY: Dict[Text, Tuple[Text, Text]] = {
+    "action_search_product_api": ("action_search_product_api", "ActionSearchProductAPI"),
+    "action_search_shop_api": ("action_search_shop_api", "ActionSearchShopAPI"),
+    "action_search_product_filtered": ("action_search_product_filtered", "ActionSearchProductFiltered"),
+    "action_recommend_products": ("action_recommend_products", "ActionRecommendProducts"),
+    "action_show_product_detail": ("action_show_product_detail", "ActionShowProductDetail"),
+    "action_default_fallback": ("action_default_fallback", "ActionDefaultFallback"),
+    "action_list_products_api": ("action_list_products_api", "ActionListProductsAPI"),
+    "action_list_shops_api": ("action_list_shop_api", "ActionListShopsAPI"),
+    "action_list_shop_products": ("action_list_shop_products", "ActionListShopProducts"),
+    "action_check_order_status": ("action_check_order_status", "ActionCheckOrderStatus"),
+    "action_check_payment_status": ("action_check_payment_status", "ActionCheckPaymentStatus"),
+}
+
+_CLASS_MODULES: Dict[Text, Text] = {
+    class_name: module for module, class_name in ACTION_REGISTRY.values()}
+
+_warm_up_hooks: List[Tuple[Text, Callable[[], None]]] = [
+    ("aiohttp", lambda: importlib.import_module("aiohttp")),
+]
+_warm_up_lock = threading.Lock()
+_warm_up_done = False
+
+
+def action_class_names() -> List[Text]:
+    return list(_CLASS_MODULES)
+
+
+def load_action_class(class_name: Text) -> Type:
+    module = importlib.import_module(f"{__package__}.{_CLASS_MODULES[class_name]}")
+    return getattr(module, class_name)
+
+
+def register_warm_up(label: Text, hook: Callable[[], None]) -> None:
+    """Mendaftarkan inisialisasi berat (import, build index) yang ditunda sampai warm-up."""
+    with _warm_up_lock:
+        _warm_up_hooks.append((label, hook))
+        if not _warm_up_done:
+            return
+    threading.Thread(target=hook, name=f"action-warm-up-{label}", daemon=True).start()
+
+
+def verify_registry() -> Dict[Text, float]:
+    """Memuat setiap action terdaftar, memastikan name() cocok; mengembalikan waktu import per modul."""
+    timings: Dict[Text, float] = {}
+    for action_name, (module, class_name) in ACTION_REGISTRY.items():
+        started = time.perf_counter()
+        action_class = load_action_class(class_name)
+        timings[f"{__package__}.{module}"] = time.perf_counter() - started
+        registered_name = action_class().name()
+        if registered_name != action_name:
+            print(
+                f"WARNING: {class_name}.name() = '{registered_name}', "
+                f"tetapi terdaftar sebagai '{action_name}' di ACTION_REGISTRY.")
+    return timings
+
+
+def warm_up() -> Dict[Text, float]:
+    """Menjalankan semua hook warm-up sekali; mengembalikan durasi per hook."""
+    global _warm_up_done
+    timings: Dict[Text, float] = {}
+    with _warm_up_lock:
+        if _warm_up_done:
+            return timings
+        for label, hook in _warm_up_hooks:
+            started = time.perf_counter()
+            try:
+                hook()
+            except Exception as e:
+                print(f"Warm-up '{label}' gagal: {e}")
+            timings[label] = time.perf_counter() - started
+        _warm_up_done = True
+    return timings
+
+
+def start_background_warm_up() -> None:
+    """Warm-up di thread terpisah agar server sudah listen sebelum import berat selesai."""
+    # Proses pool worker (forkserver/spawn) ikut meng-import paket ini.
+    if not ACTION_WARMUP or multiprocessing.parent_process() is not None:
+        return
+    thread = threading.Thread(
+        target=warm_up, name="action-warm-up", daemon=True)
+    thread.start()
@@ -0,0 +1,210 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Text, Tuple
+
+from . import action_http
+from .action_constants import (
+    API_ROOT_URLS,
+    HEDGE_ENABLED,
+    HEDGE_MAX_RATIO,
+    HEDGE_MIN_DELAY_MS,
+    REPLICA_COOLDOWN_SECONDS,
+    REPLICA_DECAY_SECONDS,
+    REPLICA_EWMA_ALPHA,
+)
+from .action_metrics import METRICS
+
+# Jumlah sampel latensi per route yang dipakai menghitung p95 untuk delay hedge.
+LATENCY_WINDOW = 200
+MIN_SAMPLES_FOR_HEDGE = 20
+
+
+class Replica:
+    def __init__(self, url: Text) -> None:
+        self.url = url
+        self.ewma: Optional[float] = None
+        self.observed_at = 0.0
+        self.inflight = 0
+        self.down_until = 0.0
+
+    def observe(self, seconds: float, alpha: float) -> None:
+        self.ewma = seconds if self.ewma is None else alpha * seconds + (1 - alpha) * self.ewma
+        self.observed_at = time.monotonic()
+
+    def score(self, now: float, decay_seconds: float) -> float:
+        # Replica yang belum pernah diukur diberi skor 0 agar segera dicoba.
+        # EWMA meluruh (half-life `decay_seconds`) selama tidak ada sampel baru,
+        # sehingga replica yang pernah lambat akhirnya dicoba lagi.
+        ewma = self.ewma or 0.0
+        if decay_seconds > 0 and ewma:
+            ewma *= 0.5 ** ((now - self.observed_at) / decay_seconds)
+        return ewma * (self.inflight + 1)
+
+    def available(self, now: float) -> bool:
+        return self.down_until <= now
+
+
+class ReplicaSet:
+    """Memilih replica backend per request dan mengirim hedged GET.
+
+    Pemilihan memakai power-of-two-choices atas skor EWMA latensi x request
+    yang sedang berjalan; EWMA meluruh selama replica tidak dipakai
+    (REPLICA_DECAY_SECONDS) agar replica yang pernah lambat dicoba lagi.
+    Replica yang gagal dihubungi dilewati selama
+    REPLICA_COOLDOWN_SECONDS. Jika respons belum datang setelah p95 latensi
+    route (minimal HEDGE_MIN_DELAY_MS), GET yang sama dikirim ke replica lain
+    dan request yang kalah dibatalkan.
+    """
+
+    def __init__(self, urls: List[Text], alpha: float, cooldown_seconds: float,
+                 hedge_enabled: bool, hedge_min_delay: float, hedge_max_ratio: float,
+                 decay_seconds: float = 0.0) -> None:
+        self.replicas = [Replica(url) for url in urls]
+        self.alpha = alpha
+        self.decay_seconds = decay_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.hedge_enabled = hedge_enabled
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_ratio = hedge_max_ratio
+        self.requests = 0
+        self.hedges = 0
+        self._latencies: Dict[Text, Deque[float]] = {}
+
+    def pick(self, exclude: Optional[Set[Replica]] = None) -> Optional[Replica]:
+        now = time.monotonic()
+        candidates = [r for r in self.replicas if not exclude or r not in exclude]
+        healthy = [r for r in candidates if r.available(now)] or candidates
+        if not healthy:
+            return None
+        if len(healthy) == 1:
+            return healthy[0]
+        a, b = random.sample(healthy, 2)
+        return a if a.score(now, self.decay_seconds) <= b.score(now, self.decay_seconds) else b
+
+    def hedge_delay(self, route: Text) -> Optional[float]:
+        samples = self._latencies.get(route)
+        if not samples or len(samples) < MIN_SAMPLES_FOR_HEDGE:
+            return None
+        ordered = sorted(samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return max(self.hedge_min_delay, p95)
+
+    def _may_hedge(self) -> bool:
+        return (self.hedge_enabled and len(self.replicas) > 1
+                and self.hedges < self.hedge_max_ratio * self.requests)
+
+    async def get(self, route: Text, path: Text,
+                  headers: Optional[Dict[Text, Text]]) -> Tuple[int, bytes]:
+        """GET idempoten ke salah satu replica; mengembalikan (status, body)."""
+        self.requests += 1
+        primary = self.pick()
+        if primary is None:
+            raise RuntimeError("API_ROOT_URL/API_ROOT_URLS belum diatur")
+        first = asyncio.ensure_future(self._attempt(route, primary, path, headers))
+        tasks = {first: primary}
+        hedge = None
+        try:
+            delay = self.hedge_delay(route) if self._may_hedge() else None
+            if delay is not None:
+                done, _ = await asyncio.wait({first}, timeout=delay)
+                if not done:
+                    secondary = self.pick(exclude={primary})
+                    if secondary is not None:
+                        self.hedges += 1
+                        METRICS.inc("backend_hedges_total", route=route)
+                        hedge = asyncio.ensure_future(
+                            self._attempt(route, secondary, path, headers))
+                        tasks[hedge] = secondary
+            winner = await self._first_success(route, tasks, path, headers)
+            if hedge is not None:
+                METRICS.inc("backend_hedge_wins_total", route=route,
+                            winner="hedge" if winner is hedge else "primary")
+            return winner.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _first_success(self, route, tasks, path, headers) -> asyncio.Future:
+        pending = set(tasks)
+        tried = set(tasks.values())
+        last_error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = None
+            connect_failed = False
+            for task in done:
+                # Exception setiap task yang selesai diambil, termasuk yang kalah,
+                # agar tidak muncul "Task exception was never retrieved".
+                error = asyncio.CancelledError() if task.cancelled() else task.exception()
+                if error is None:
+                    winner = winner or task
+                    continue
+                last_error = error
+                connect_failed = connect_failed or isinstance(error, action_http.ClientConnectorError)
+            if winner is not None:
+                for task in pending:
+                    task.cancel()
+                return winner
+            # Gagal konek: coba sekali lagi di replica lain (GET aman diulang).
+            if connect_failed and not pending:
+                fallback = self.pick(exclude=tried)
+                if fallback is not None:
+                    tried.add(fallback)
+                    retry = asyncio.ensure_future(self._attempt(route, fallback, path, headers))
+                    tasks[retry] = fallback
+                    pending.add(retry)
+        raise last_error
+
+    async def _attempt(self, route: Text, replica: Replica, path: Text,
+                       headers: Optional[Dict[Text, Text]]) -> Tuple[int, bytes]:
+        replica.inflight += 1
+        started = time.monotonic()
+        try:
+            async with action_http.shared_session().get(
+                    f"{replica.url}{path}", headers=headers) as response:
+                body = await response.read()
+                status = response.status
+        except action_http.ClientConnectorError:
+            replica.down_until = time.monotonic() + self.cooldown_seconds
+            METRICS.inc("backend_replica_errors_total", replica=replica.url)
+            raise
+        except asyncio.CancelledError:
+            # Kalah hedge: latensi sebenarnya minimal selama ini. Dicatat hanya jika
+            # lebih buruk dari perkiraan, agar replica lambat tidak tampak cepat.
+            elapsed = time.monotonic() - started
+            if replica.ewma is None or elapsed > replica.ewma:
+                replica.observe(elapsed, self.alpha)
+            raise
+        finally:
+            replica.inflight -= 1
+        elapsed = time.monotonic() - started
+        replica.observe(elapsed, self.alpha)
+        self._latencies.setdefault(route, deque(maxlen=LATENCY_WINDOW)).append(elapsed)
+        return status, body
+
+
+REPLICAS = ReplicaSet(
+    API_ROOT_URLS,
+    REPLICA_EWMA_ALPHA,
+    REPLICA_COOLDOWN_SECONDS,
+    HEDGE_ENABLED,
+    HEDGE_MIN_DELAY_MS / 1000,
+    HEDGE_MAX_RATIO,
+    REPLICA_DECAY_SECONDS,
+)
+
+
+def _collect_replica_stats():
+    now = time.monotonic()
+    for replica in REPLICAS.replicas:
+        labels = {"replica": replica.url}
+        if replica.ewma is not None:
+            yield "backend_replica_ewma_seconds", labels, replica.ewma
+        yield "backend_replica_inflight", labels, replica.inflight
+        yield "backend_replica_down", labels, 0 if replica.available(now) else 1
+
+
+METRICS.register_collector(_collect_replica_stats)
@@ -1,137 +1,35 @@
-import aiohttp
-import urllib.parse
-from typing import Any, Text, Dict, List
+from typing import Text
 
-from rasa_sdk import Action, Tracker
-from rasa_sdk.executor import CollectingDispatcher
-from rasa_sdk.events import SlotSet
-from rasa_sdk.types import DomainDict
+from .action_formatting import PRODUCT_REPLIES, by_rating, product_line, product_with_shop
+from .action_pipeline import Pipeline, PipelineAction, bulleted, each, entity_or_slot, expect, get, sort_by
+from .action_prefetch import prefetch_product_details
 
-from .action_constants import API_ROOT_URL  
 
-
-class ActionSearchProductAPI(Action): 
+class ActionSearchProductAPI(PipelineAction):
     def name(self) -> Text:
-        return "action_search_product_api"  
-
-    async def run(
-        self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: DomainDict
-    ) -> List[Dict[Text, Any]]:
-
-        product_search_term = next(
-            tracker.get_latest_entity_values("product_name"), None)
-        if not product_search_term:
-            product_search_term = tracker.get_slot("product_name_slot")
-
-        if not product_search_term:
-            dispatcher.utter_message(text="Produk apa yang ingin Anda cari?")
-            return [SlotSet("product_name_slot", None)]
-
-        encoded_search_term = urllib.parse.quote_plus(product_search_term)
-        request_url = f"{API_ROOT_URL}/product?searchByName={encoded_search_term}"
-
-        print(f"Requesting product data from URL: {request_url}")
-
-        found_products_details = []
-
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(request_url) as response:
-                    if response.status == 200:
-                        response_data = await response.json()
-                        if response_data.get("success") and "data" in response_data and "products" in response_data["data"]:
-                            api_products = response_data["data"]["products"]
-                            if not api_products:
-                                dispatcher.utter_message(
-                                    text=f"Maaf, saya tidak menemukan produk dengan nama yang mirip '{product_search_term}'.")
-                                return [SlotSet("product_name_slot", None)]
-
-                            for product in api_products:
-                                found_products_details.append({
-                                    "id": product.get("_id"),
-                                    "name": product.get("name", "Nama tidak tersedia"),
-                                    "price": product.get("price", "Harga tidak tersedia"),
-                                    "description": product.get("description", ""),
-                                    "stock": product.get("stock", "Tidak diketahui"),
-                                    "category": product.get("category", "Tidak diketahui"),
-                                    "image_url": product.get("productImageURL"),
-                                    "average_rating": product.get("averageRating", 0.0),
-                                    "rating_count": product.get("ratingCount", 0)
-                                })
-
-                            if found_products_details:
-                                found_products_details.sort(
-                                    key=lambda x: (
-                                        x.get('average_rating', 0.0), x.get('rating_count', 0)),
-                                    reverse=True
-                                )
-                        elif not response_data.get("success"):
-                            api_message = response_data.get(
-                                "message", "Gagal memproses permintaan produk di server.")
-                            print(
-                                f"API product reported an error for search term '{product_search_term}': {api_message}")
-                            dispatcher.utter_message(
-                                text=f"Info dari server: {api_message}") 
-                            return [SlotSet("product_name_slot", None)]
-                        else:
-                            print(
-                                f"API product response format issue for search term '{product_search_term}': {response_data}")
-                            dispatcher.utter_message(
-                                text="Format respons API produk tidak sesuai.")
-                            return [SlotSet("product_name_slot", None)]
-                    else:
-                        print(
-                            f"API product request failed for search term '{product_search_term}' with status: {response.status}")
-                        error_text = await response.text()
-                        print(f"API product error response: {error_text}")
-                        dispatcher.utter_message(
-                            text=f"Maaf, gagal mengambil data produk dari server (status: {response.status})."
-                        )
-                        return [SlotSet("product_name_slot", None)]
-        except aiohttp.ClientConnectorError as e:
-            print(
-                f"Connection Error calling product API for search term '{product_search_term}': {e}")
-            dispatcher.utter_message(
-                text="Maaf, tidak dapat terhubung ke layanan produk. Periksa koneksi Anda.") 
-            return [SlotSet("product_name_slot", None)]
-        except aiohttp.ContentTypeError as e:
-            print(
-                f"Content Type Error from product API for search term '{product_search_term}' (not JSON?): {e}")
-            dispatcher.utter_message(
-                text="Maaf, ada masalah dengan format data dari layanan produk.")  
-            return [SlotSet("product_name_slot", None)]
-        except Exception as e:
-            print(
-                f"An unexpected error occurred for product search term '{product_search_term}': {e}")
-            dispatcher.utter_message(
-                text="Maaf, terjadi kesalahan yang tidak terduga saat memproses permintaan produk Anda.") 
-            return [SlotSet("product_name_slot", None)]
-
-        if found_products_details:
-            products_to_display = found_products_details[:5]
-            message_parts = [
-                f"Berikut produk yang kami temukan untuk '{product_search_term}':\n"] 
-
-            for product_detail in products_to_display:
-                part = f"\n- **{product_detail['name']}**"
-                avg_rating = product_detail.get('average_rating', 0.0)
-                rating_count = product_detail.get('rating_count', 0)
-                if rating_count > 0:
-                    part += f" (⭐ {avg_rating:.1f}/5 dari {rating_count} ulasan)"
-                part += "\n"
-                part += f"  Harga: Rp {product_detail['price']}\n"
-                part += f"  Kategori: {product_detail['category']}\n"
-                part += f"  Stok: {product_detail['stock']}\n"
-                if product_detail['image_url']:
-                    part += f"  Foto: {product_detail['image_url']}\n"
-                if avg_rating >= 4.5 and rating_count >= 3:
-                    part += "  ✨ *Menu ini sangat direkomendasikan!*\n"
-                elif avg_rating >= 4.0 and rating_count >= 1:
-                    part += "  👍 *Rating menu ini bagus!*\n"
-                message_parts.append(part)
-
-            if len(found_products_details) > 5:
-                message_parts.append(
-                    f"\nDan {len(found_products_details) - 5} produk lainnya.") 
-            dispatcher.utter_message(text="".join(message_parts))
-        return [SlotSet("product_name_slot", None)]
+        return "action_search_product_api"
+
+    pipeline = Pipeline(
+        query=entity_or_slot("product_name", "product_name_slot"),
+        negative_cache="product",
+        response_cache="product",
+        detail_cache=True,
+        fetch=get("product_search", "/product?searchByName={query}"),
+        validate=expect("products"),
+        project=each(product_with_shop),
+        rank=sort_by(by_rating, reverse=True),
+        render=bulleted(
+            "Berikut produk yang kami temukan untuk '{query}':\n",
+            product_line(show_stock=True),
+            limit=5,
+            more="\nDan {rest} produk lainnya."),
+        after=prefetch_product_details,
+        reset_slots=["product_name_slot"],
+        replies=PRODUCT_REPLIES.but(
+            missing_query="Produk apa yang ingin Anda cari?",
+            empty="Maaf, saya tidak menemukan produk dengan nama yang mirip '{query}'.",
+            server_error_default="Gagal memproses permintaan produk di server.",
+            format_error="Format respons API produk tidak sesuai.",
+            status_error="Maaf, gagal mengambil data produk dari server (status: {status}).",
+            unexpected_error="Maaf, terjadi kesalahan yang tidak terduga saat memproses permintaan produk Anda."),
+    )
@@ -0,0 +1,103 @@
+from typing import Any, Optional, Text
+
+from .action_catalog import CATALOG
+from .action_catalog_index import FACET_INDEX, PRICE_ASC, PRICE_DESC, RATING, ProductFacetIndex, parse_price
+from .action_formatting import PRODUCT_REPLIES, product_line, product_with_shop
+from .action_http import BackendResponse, get_json
+from .action_pipeline import Halt, Pipeline, PipelineAction, PipelineContext, bulleted, each, expect
+
+LIMIT = 5
+
+
+def _entity(ctx: PipelineContext, name: Text) -> Optional[Text]:
+    return next(ctx.tracker.get_latest_entity_values(name), None)
+
+
+def _rupiah(value: float) -> Text:
+    return "Rp " + f"{value:,.0f}".replace(",", ".")
+
+
+def _order(value: Optional[Text]) -> Text:
+    value = (value or "").lower()
+    if "murah" in value:
+        return PRICE_ASC
+    if "mahal" in value:
+        return PRICE_DESC
+    return RATING
+
+
+def _facets(ctx: PipelineContext) -> Optional[Text]:
+    """Membaca entity kategori/harga/urutan; mengembalikan deskripsi filter untuk balasan."""
+    category = _entity(ctx, "product_category")
+    min_price = parse_price(_entity(ctx, "min_price"))
+    max_price = parse_price(_entity(ctx, "max_price"))
+    order = _order(_entity(ctx, "product_sort"))
+    if min_price is not None and max_price is not None and min_price > max_price:
+        min_price, max_price = max_price, min_price
+    ctx.fields["facets"] = {
+        "category": category, "min_price": min_price, "max_price": max_price, "order": order}
+
+    parts = []
+    if category:
+        parts.append(f"kategori {category}")
+    if min_price is not None and max_price is not None:
+        parts.append(f"harga {_rupiah(min_price)} - {_rupiah(max_price)}")
+    elif max_price is not None:
+        parts.append(f"di bawah {_rupiah(max_price)}")
+    elif min_price is not None:
+        parts.append(f"di atas {_rupiah(min_price)}")
+    if order == PRICE_ASC:
+        parts.append("termurah")
+    elif order == PRICE_DESC:
+        parts.append("termahal")
+    return ", ".join(parts) or None
+
+
+async def _facet_search(ctx: PipelineContext, _: Any) -> BackendResponse:
+    index = await FACET_INDEX.current()
+    if index is None:
+        # Tanpa snapshot katalog, index dibangun sekali pakai dari /product.
+        print(f"{ctx.action_name}: snapshot katalog belum ada, GET /product")
+        response = await get_json("product_list", "/product", ctx.action_name)
+        products = (response.data or {}).get("data") if response.status == 200 else None
+        if not (isinstance(products, dict) and isinstance(products.get("products"), list)):
+            return response
+        index = ProductFacetIndex(products["products"])
+    else:
+        ctx.data_time = CATALOG.current().created_at
+
+    facets = ctx.fields["facets"]
+    categories = None
+    if facets["category"]:
+        categories = index.match_categories(facets["category"])
+        if not categories:
+            raise Halt("unknown_category", category=facets["category"],
+                       categories=", ".join(index.categories()))
+    total, products = index.query(
+        categories, facets["min_price"], facets["max_price"], facets["order"], k=LIMIT)
+    ctx.fields.update(total=total, shown=len(products))
+    return BackendResponse(200, {"success": True, "data": {"products": products}}, "")
+
+
+class ActionSearchProductFiltered(PipelineAction):
+    def name(self) -> Text:
+        return "action_search_product_filtered"
+
+    pipeline = Pipeline(
+        query=_facets,
+        fetch=_facet_search,
+        detail_cache=True,
+        validate=expect("products"),
+        project=each(product_with_shop),
+        render=bulleted(
+            "Berikut {shown} dari {total} produk ({query}):\n",
+            product_line(show_stock=True)),
+        replies=PRODUCT_REPLIES.but(
+            missing_query="Kategori atau kisaran harga apa yang Anda cari? Contoh: minuman di bawah 15 ribu.",
+            empty="Maaf, tidak ada produk yang cocok ({query}).",
+            unknown_category="Maaf, kategori '{category}' tidak ditemukan. Kategori yang tersedia: {categories}.",
+            server_error_default="Gagal memproses permintaan produk di server.",
+            format_error="Format respons API produk tidak sesuai.",
+            status_error="Maaf, gagal mengambil data produk dari server (status: {status}).",
+            unexpected_error="Maaf, terjadi kesalahan yang tidak terduga saat mencari produk dengan filter tersebut."),
+    )
@@ -1,138 +1,112 @@
-import aiohttp
 import urllib.parse
-from typing import Any, Text, Dict, List
-from rasa_sdk import Action, Tracker
-from rasa_sdk.executor import CollectingDispatcher
-from rasa_sdk.events import SlotSet
-from rasa_sdk.types import DomainDict
-from .action_constants import API_ROOT_URL
+from typing import Any, Dict, Text
 
+from .action_cache import PRODUCT_DETAIL_CACHE
+from .action_catalog import CATALOG
+from .action_formatting import PRODUCT_REPLIES, shop_fields
+from .action_http import BackendResponse, get_json
+from .action_pipeline import Halt, Pipeline, PipelineAction, PipelineContext, entity_or_slot, expect, one, single
+from .action_prefetch import PREFETCH
 
-class ActionShowProductDetail(Action):
-    def name(self) -> Text:
-        return "action_show_product_detail"
 
-    async def run(
-        self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: DomainDict
-    ) -> List[Dict[Text, Any]]:
+async def _fetch_product_detail(ctx: PipelineContext, _: Any) -> BackendResponse:
+    """Cari ID produk (hasil pencarian terakhir, snapshot katalog, lalu backend), kemudian ambil
+    detailnya (cache detail, hasil prefetch, lalu backend)."""
+    product_name = ctx.query
+    product_id = PREFETCH.product_id(product_name)
+    snapshot = CATALOG.current() if product_id is None else None
+    cached_product = snapshot.product_by_name(product_name) if snapshot is not None else None
+    if product_id:
+        print(f"ID produk '{product_name}' ditemukan dari hasil pencarian sebelumnya.")
+    elif cached_product and cached_product.get("_id"):
+        product_id = cached_product["_id"]
+        print(f"ID produk '{product_name}' ditemukan di snapshot katalog v{snapshot.version}.")
+    else:
+        search_path = f"/product?searchByName={urllib.parse.quote_plus(product_name)}"
+        print(f"Mencari ID produk dengan path: {search_path}")
+        search = await get_json("product_search", search_path, ctx.action_name)
+        api_products = None
+        if search.status == 200 and search.data.get("success"):
+            api_products = (search.data.get("data") or {}).get("products")
+        if api_products:
+            exact = [p for p in api_products if p.get("name", "").lower() == product_name.lower()]
+            product_id = (exact or api_products)[0].get("_id")
+        elif api_products is not None:
+            raise Halt("empty")
+        else:
+            print(f"Pencarian ID produk gagal (status {search.status}): {search.data or search.text}")
 
-        product_name_to_detail = tracker.get_slot("product_name_slot")
-        latest_product_entity = next(
-            tracker.get_latest_entity_values("product_name"), None)
-        if latest_product_entity:
-            product_name_to_detail = latest_product_entity
+    if not product_id:
+        raise Halt("not_found")
+    cached_detail = PRODUCT_DETAIL_CACHE.get(product_id)
+    if cached_detail is not None:
+        print(f"Detail produk {product_id} diambil dari cache detail.")
+        return BackendResponse(200, {"success": True, "data": cached_detail}, "")
+    response = await PREFETCH.get_json(
+        "product_detail", "product_detail", f"/product/{product_id}", ctx.action_name)
+    if response.status == 200 and response.data.get("success") and isinstance(response.data.get("data"), dict):
+        PRODUCT_DETAIL_CACHE.put(response.data["data"])
+    return response
 
-        print(
-            f"Action 'action_show_product_detail' dipanggil untuk produk: {product_name_to_detail}")
 
-        if not product_name_to_detail:
-            dispatcher.utter_message(
-                text="Produk mana yang ingin Anda lihat detailnya? Mohon sebutkan namanya.")
-            return []
+def _detail_fields(product: Dict[Text, Any]) -> Dict[Text, Any]:
+    return {
+        "name": product.get("name", "Nama tidak tersedia"),
+        "description": product.get("description", "Tidak ada deskripsi."),
+        "price": product.get("price", "Harga tidak tersedia"),
+        "category": product.get("category", "Kategori tidak diketahui"),
+        "stock": product.get("stock", "Stok tidak diketahui"),
+        "image_url": product.get("productImageURL"),
+        "average_rating": product.get("averageRating", 0.0),
+        "rating_count": product.get("ratingCount", 0),
+        **shop_fields(product),
+    }
 
-        product_id_found = None
-        try:
-            encoded_search_term = urllib.parse.quote_plus(
-                product_name_to_detail)
-            search_url = f"{API_ROOT_URL}/product?searchByName={encoded_search_term}"
-            print(f"Mencari ID produk dengan URL: {search_url}")
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(search_url) as search_response:
-                    if search_response.status == 200:
-                        search_data = await search_response.json()
-                        if search_data.get("success") and "data" in search_data and "products" in search_data["data"]:
-                            api_products = search_data["data"]["products"]
-                            if api_products:
-                                for prod in api_products:
-                                    if prod.get("name", "").lower() == product_name_to_detail.lower():
-                                        product_id_found = prod.get("_id")
-                                        break
-                                if not product_id_found:
-                                    product_id_found = api_products[0].get(
-                                        "_id")
+def _detail_message(product: Dict[Text, Any]) -> Text:
+    message = f"Berikut detail untuk **{product['name']}**:\n"
+    description = product["description"]
+    if description and description.lower() != "tidak ada deskripsi.":
+        message += f"- Deskripsi: {description}\n"
+    message += f"- Harga: Rp {product['price']}\n"
+    message += f"- Kategori: {product['category']}\n"
+    if product["shop_name"]:
+        message += f"- Toko: {product['shop_name']}\n"
+        if product["shop_address"]:
+            message += f"- Alamat toko: {product['shop_address']}\n"
+    message += f"- Stok: {product['stock']}\n"
+    if product["rating_count"] > 0:
+        message += f"- Rating: ⭐ {product['average_rating']:.1f}/5 ({product['rating_count']} ulasan)\n"
+    else:
+        message += f"- Rating: Belum ada ulasan\n"
+    if product["image_url"]:
+        message += f"- Foto: {product['image_url']}\n"
+    return message
 
-                                if not product_id_found:
-                                    print(
-                                        f"Tidak ditemukan ID untuk produk '{product_name_to_detail}' dari hasil pencarian.")
-                            else:
-                                print(
-                                    f"Array produk kosong saat mencari ID untuk '{product_name_to_detail}'.")
-                        else:
-                            print(
-                                f"Format API pencarian tidak sesuai atau success=false saat mencari ID. Data: {search_data}")
-                    else:
-                        print(
-                            f"Pencarian ID produk gagal dengan status: {search_response.status}")
 
-            if not product_id_found:
-                dispatcher.utter_message(
-                    text=f"Maaf, saya tidak bisa menemukan detail untuk produk '{product_name_to_detail}'. Mungkin nama produknya kurang spesifik atau tidak ada?")
-                return [SlotSet("product_name_slot", None)]
+NOT_FOUND_REPLY = ("Maaf, saya tidak bisa menemukan detail untuk produk '{query}'. "
+                   "Mungkin nama produknya kurang spesifik atau tidak ada?")
 
-            detail_url = f"{API_ROOT_URL}/product/{product_id_found}"
-            print(f"Mengambil detail produk dari URL: {detail_url}")
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(detail_url) as detail_response:
-                    if detail_response.status == 200:
-                        detail_data = await detail_response.json()
-                        if detail_data.get("success") and "data" in detail_data:
-                            product_detail = detail_data["data"]
-                            name = product_detail.get(
-                                "name", "Nama tidak tersedia")
-                            description = product_detail.get(
-                                "description", "Tidak ada deskripsi.")
-                            price = product_detail.get(
-                                "price", "Harga tidak tersedia")
-                            category = product_detail.get(
-                                "category", "Kategori tidak diketahui")
-                            stock = product_detail.get(
-                                "stock", "Stok tidak diketahui")
-                            image_url = product_detail.get("productImageURL")
-                            avg_rating = product_detail.get(
-                                "averageRating", 0.0)
-                            rating_count = product_detail.get("ratingCount", 0)
+class ActionShowProductDetail(PipelineAction):
+    def name(self) -> Text:
+        return "action_show_product_detail"
 
-                            message = f"Berikut detail untuk **{name}**:\n"
-                            if description and description.lower() != "tidak ada deskripsi.":
-                                message += f"- Deskripsi: {description}\n"
-                            message += f"- Harga: Rp {price}\n"
-                            message += f"- Kategori: {category}\n"
-                            message += f"- Stok: {stock}\n"
-                            if rating_count > 0:
-                                message += f"- Rating: ⭐ {avg_rating:.1f}/5 ({rating_count} ulasan)\n"
-                            else:
-                                message += f"- Rating: Belum ada ulasan\n"
-                            if image_url:
-                                message += f"- Foto: {image_url}\n"
-                            dispatcher.utter_message(text=message)
-                        elif not detail_data.get("success"):
-                            api_message = detail_data.get(
-                                "message", "Gagal mengambil detail produk.")
-                            dispatcher.utter_message(
-                                text=f"Info dari server: {api_message}")
-                        else:
-                            dispatcher.utter_message(
-                                text="Format respons API detail produk tidak sesuai.")
-                    else:
-                        error_text = await detail_response.text()
-                        print(
-                            f"API detail product request failed with status: {detail_response.status}, response: {error_text}")
-                        dispatcher.utter_message(
-                            text=f"Maaf, gagal mengambil detail produk dari server (status: {detail_response.status}).")
-        except aiohttp.ClientConnectorError as e:
-            print(f"Connection Error in ActionShowProductDetail: {e}")
-            dispatcher.utter_message(
-                text="Maaf, tidak dapat terhubung ke layanan produk.")
-        except aiohttp.ContentTypeError as e:
-            print(
-                f"Content Type Error in ActionShowProductDetail (not JSON?): {e}")
-            dispatcher.utter_message(
-                text="Maaf, ada masalah dengan format data dari layanan produk.")
-        except Exception as e:
-            print(
-                f"An unexpected error occurred in ActionShowProductDetail: {e}")
-            dispatcher.utter_message(
-                text="Maaf, terjadi kesalahan yang tidak terduga saat memproses permintaan Anda.")
-        return [SlotSet("product_name_slot", None)]
+    pipeline = Pipeline(
+        query=entity_or_slot("product_name", "product_name_slot"),
+        negative_cache="product",
+        fetch=_fetch_product_detail,
+        validate=expect(),
+        project=one(_detail_fields),
+        render=single(_detail_message),
+        reset_slots=["product_name_slot"],
+        replies=PRODUCT_REPLIES.but(
+            missing_query="Produk mana yang ingin Anda lihat detailnya? Mohon sebutkan namanya.",
+            empty=NOT_FOUND_REPLY,
+            not_found=NOT_FOUND_REPLY,
+            server_error_default="Gagal mengambil detail produk.",
+            format_error="Format respons API detail produk tidak sesuai.",
+            status_error="Maaf, gagal mengambil detail produk dari server (status: {status}).",
+            connection_error="Maaf, tidak dapat terhubung ke layanan produk.",
+            unexpected_error="Maaf, terjadi kesalahan yang tidak terduga saat memproses permintaan Anda."),
+    )
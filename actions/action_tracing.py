@@ -0,0 +1,225 @@
+import contextvars
+import functools
+import json
+import os
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, List, Optional, Text
+
+from . import action_admin_server
+from .action_constants import TRACE_BUFFER_SIZE, TRACE_EXPORT_PATH, TRACE_SAMPLE_RATE
+from .action_loop_monitor import LOOP_MONITOR
+from .action_memory import finish_allocation_tracking, start_allocation_tracking
+from .action_profiler import enter_action, exit_action
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("action_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attributes",
+                 "start", "duration", "status")
+
+    def __init__(self, trace_id: Text, parent_id: Optional[Text], name: Text,
+                 attributes: Dict[Text, Any]) -> None:
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start = time.time()
+        self.duration: Optional[float] = None
+        self.status = "ok"
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def end(self, status: Optional[Text] = None) -> None:
+        if self.duration is not None:
+            return
+        self.duration = time.time() - self.start
+        if status:
+            self.status = status
+        EXPORTER.export(self)
+
+    def child(self, name: Text, **attributes: Any) -> "Span":
+        return Span(self.trace_id, self.span_id, name, attributes)
+
+    def traceparent(self) -> Text:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> Dict[Text, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Dipakai untuk percakapan yang tidak disampling; semua operasi kosong."""
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def end(self, status: Optional[Text] = None) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter:
+    """Ring buffer in-memory (untuk /traces) dan, opsional, file JSONL."""
+
+    def __init__(self, buffer_size: int, export_path: Text) -> None:
+        self.spans: Deque[Span] = deque(maxlen=max(1, buffer_size))
+        self.export_path = export_path
+        self._file = None
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+        if not self.export_path:
+            return
+        try:
+            if self._file is None:
+                self._file = open(self.export_path, "a", buffering=1, encoding="utf-8")
+            self._file.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            print(f"Tracing: gagal menulis ke {self.export_path}: {e}")
+            self.export_path = ""
+
+    def traces(self, sender_id: Optional[Text] = None, limit: int = 50) -> List[Dict[Text, Any]]:
+        spans = list(self.spans)
+        roots = [s for s in spans if s.parent_id is None
+                 and (sender_id is None or s.attributes.get("sender_id") == sender_id)]
+        wanted = {s.trace_id for s in roots[-limit:]}
+        by_trace: Dict[Text, List[Dict[Text, Any]]] = {}
+        for s in spans:
+            if s.trace_id in wanted:
+                by_trace.setdefault(s.trace_id, []).append(s.to_dict())
+        return [{"trace_id": trace_id, "spans": items} for trace_id, items in by_trace.items()]
+
+
+EXPORTER = SpanExporter(TRACE_BUFFER_SIZE, TRACE_EXPORT_PATH)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_span(name: Text, **attributes: Any):
+    """Span anak dari span aktif; diakhiri manual dengan `.end()`."""
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return parent.child(name, **attributes)
+
+
+@contextmanager
+def span(name: Text, **attributes: Any):
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+    child = parent.child(name, **attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException:
+        child.status = "error"
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+
+def detach_context() -> None:
+    """Dipanggil di awal task latar belakang agar tidak menempel ke span pemicunya."""
+    _current_span.set(None)
+
+
+async def _traced(run, action, dispatcher, tracker, domain):
+    root = Span(os.urandom(16).hex(), None, "action.run",
+                {"action": action.name(), "sender_id": tracker.sender_id})
+    token = _current_span.set(root)
+    try:
+        events = await run(action, dispatcher, tracker, domain)
+        root.set(messages=len(dispatcher.messages), events=len(events or []))
+        return events
+    except BaseException:
+        root.status = "error"
+        raise
+    finally:
+        _current_span.reset(token)
+        root.end()
+
+
+def traced_run(run):
+    """Decorator untuk `Action.run`: root span (jika disampling), label task untuk profiler
+    dan monitor lag loop, serta atribusi alokasi tracemalloc (jika ACTION_TRACEMALLOC aktif)."""
+
+    @functools.wraps(run)
+    async def wrapper(self, dispatcher, tracker, domain):
+        previous_task_name = enter_action(self.name())
+        monitored_task = LOOP_MONITOR.track(self.name())
+        allocations = start_allocation_tracking()
+        try:
+            if TRACE_SAMPLE_RATE <= 0 or random.random() >= TRACE_SAMPLE_RATE:
+                return await run(self, dispatcher, tracker, domain)
+            return await _traced(run, self, dispatcher, tracker, domain)
+        finally:
+            finish_allocation_tracking(self.name(), allocations)
+            LOOP_MONITOR.untrack(monitored_task)
+            exit_action(previous_task_name)
+
+    return wrapper
+
+
+def http_trace_config():
+    """TraceConfig aiohttp: span per request backend + header `traceparent`."""
+    import aiohttp
+
+    async def on_request_start(session, context, params):
+        parent = _current_span.get()
+        context.span = None
+        if parent is None:
+            return
+        context.span = parent.child(
+            "http.client", method=params.method, url=str(params.url))
+        params.headers["traceparent"] = context.span.traceparent()
+
+    async def on_request_end(session, context, params):
+        if context.span is not None:
+            context.span.set(status_code=params.response.status)
+            context.span.end()
+
+    async def on_request_exception(session, context, params):
+        if context.span is not None:
+            context.span.set(error=repr(params.exception))
+            context.span.end("error")
+
+    config = aiohttp.TraceConfig()
+    config.on_request_start.append(on_request_start)
+    config.on_request_end.append(on_request_end)
+    config.on_request_exception.append(on_request_exception)
+    return config
+
+
+async def _handle_traces(request):
+    from aiohttp import web
+    sender_id = request.query.get("sender_id")
+    try:
+        limit = int(request.query.get("limit", "50"))
+    except ValueError:
+        limit = 50
+    return web.json_response(EXPORTER.traces(sender_id, limit))
+
+
+action_admin_server.register_route("GET", "/traces", _handle_traces)
@@ -0,0 +1,77 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Text
+
+from .action_constants import WORKER_PROCESSES, WORKER_THREADS
+from .action_metrics import METRICS
+
+# Pool untuk kerja CPU (tulis snapshot, decode katalog, build index) agar
+# tidak berjalan di event loop yang dipakai bersama semua percakapan.
+#
+# - pool "process": kerja yang hasilnya tidak perlu dikirim balik sebagai
+#   objek Python (mis. snapshot ditulis ke file lalu di-mmap), sehingga
+#   tidak ada biaya pickle hasil. WORKER_PROCESSES=0 memakai pool thread.
+# - pool "thread": kerja yang hasilnya struktur immutable besar; hasil
+#   diserahkan sebagai referensi tanpa salinan.
+#
+# Proses worker dibuat lewat forkserver (spawn jika tidak tersedia), bukan
+# fork: fork dari proses yang sudah punya thread (pool thread, profiler,
+# watchdog loop) bisa mewarisi lock yang sedang dipegang dan macet.
+
+_threads: Optional[ThreadPoolExecutor] = None
+_processes: Optional[ProcessPoolExecutor] = None
+
+
+def _thread_pool() -> ThreadPoolExecutor:
+    global _threads
+    if _threads is None:
+        _threads = ThreadPoolExecutor(max_workers=max(1, WORKER_THREADS), thread_name_prefix="action-worker")
+    return _threads
+
+
+def _process_pool() -> Optional[ProcessPoolExecutor]:
+    global _processes
+    if _processes is None and WORKER_PROCESSES > 0:
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _processes = ProcessPoolExecutor(
+            max_workers=WORKER_PROCESSES, mp_context=multiprocessing.get_context(method))
+    return _processes
+
+
+async def run_in_worker(job: Text, fn: Callable[..., Any], *args: Any, process: bool = False) -> Any:
+    """Menjalankan `fn(*args)` di pool worker dan menunggu hasilnya tanpa memblokir loop.
+
+    Tanpa event loop yang berjalan (skrip/CLI), `fn` dipanggil langsung.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return fn(*args)
+    executor: Executor = (_process_pool() if process else None) or _thread_pool()
+    pool = "process" if isinstance(executor, ProcessPoolExecutor) else "thread"
+    started = time.monotonic()
+    try:
+        result = await loop.run_in_executor(executor, fn, *args)
+    except BrokenProcessPool:
+        # Proses worker mati (mis. OOM); pool dibuat ulang pada pemanggilan berikutnya.
+        _discard_process_pool()
+        METRICS.inc("worker_jobs_total", job=job, pool=pool, result="broken")
+        print(f"Workers: pool proses rusak saat menjalankan {job}, diulang di thread.")
+        return await run_in_worker(job, fn, *args)
+    except Exception:
+        METRICS.inc("worker_jobs_total", job=job, pool=pool, result="error")
+        raise
+    METRICS.inc("worker_jobs_total", job=job, pool=pool, result="ok")
+    METRICS.observe("worker_job_seconds", time.monotonic() - started, job=job, pool=pool)
+    return result
+
+
+def _discard_process_pool() -> None:
+    global _processes
+    if _processes is not None:
+        _processes.shutdown(wait=False, cancel_futures=True)
+    _processes = None
+
@@ -0,0 +1,61 @@
+"""Publisher pengganti backend untuk menguji POST /invalidate secara lokal.
+
+Jalankan dari root proyek, mis. setelah stok produk p1 habis:
+
+    python -m scripts.invalidation_publisher --product p1
+    python -m scripts.invalidation_publisher --record 'product={"_id": "p1", "stock": 0}'
+    python -m scripts.invalidation_publisher --deleted shop=s1 --order o1
+
+--record boleh hanya memuat field yang berubah: field lain diambil dari
+record yang sudah diketahui action server, atau dari backend jika belum ada.
+
+Token diambil dari INVALIDATION_TOKEN (atau --token), alamat dari ACTION_ADMIN_PORT (atau --url).
+"""
+import argparse
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+
+
+def build_payload(args):
+    payload = {"products": list(args.product), "shops": list(args.shop), "orders": list(args.order)}
+    for spec in args.record:
+        kind, _, raw = spec.partition("=")
+        payload[f"{kind}s"].append(json.loads(raw))
+    for spec in args.deleted:
+        kind, _, record_id = spec.partition("=")
+        payload[f"{kind}s"].append({"_id": record_id, "deleted": True})
+    return payload
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kirim POST /invalidate ke admin server action.")
+    parser.add_argument("--url", default=f"http://127.0.0.1:{os.getenv('ACTION_ADMIN_PORT', '5056')}")
+    parser.add_argument("--token", default=os.getenv("INVALIDATION_TOKEN", ""))
+    parser.add_argument("--product", action="append", default=[], help="id produk (boleh berulang)")
+    parser.add_argument("--shop", action="append", default=[], help="id toko (boleh berulang)")
+    parser.add_argument("--order", action="append", default=[], help="id pesanan (boleh berulang)")
+    parser.add_argument("--record", action="append", default=[], metavar="KIND=JSON",
+                        help="record terbaru (boleh hanya field yang berubah); KIND: product atau shop")
+    parser.add_argument("--deleted", action="append", default=[], metavar="KIND=ID",
+                        help="record yang dihapus; KIND: product atau shop")
+    args = parser.parse_args(argv)
+
+    request = urllib.request.Request(
+        f"{args.url.rstrip('/')}/invalidate",
+        data=json.dumps(build_payload(args)).encode("utf-8"),
+        headers={"Content-Type": "application/json", "Authorization": f"Bearer {args.token}"},
+        method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            print(response.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        print(f"HTTP {e.code}: {e.read().decode('utf-8', errors='replace')}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
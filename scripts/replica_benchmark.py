@@ -0,0 +1,128 @@
+"""Uji load balancing replica dan hedged GET dengan beberapa stub server lokal.
+
+Jalankan dari root proyek:
+
+    python -m scripts.replica_benchmark --latency 10,500 --requests 200
+    python -m scripts.replica_benchmark --latency 10,40 --tail 0.05:400 --swap-after 100
+
+Setiap nilai --latency (ms) menjadi satu stub server di port acak. --tail
+menambah latensi ekstra pada sebagian request (ekor lambat), --swap-after
+membalik latensi antar replica di tengah uji untuk melihat apakah replica
+yang sebelumnya lambat dicoba lagi.
+"""
+import asyncio
+import random
+import statistics
+import time
+
+
+class _StubReplica:
+    def __init__(self, latency_ms, tail_ratio, tail_ms):
+        self.latency_ms = latency_ms
+        self.tail_ratio = tail_ratio
+        self.tail_ms = tail_ms
+        self.requests = 0
+        self.url = None
+        self._runner = None
+
+    async def _handle(self, request):
+        from aiohttp import web
+        self.requests += 1
+        delay = self.latency_ms
+        if self.tail_ratio and random.random() < self.tail_ratio:
+            delay += self.tail_ms
+        await asyncio.sleep(delay / 1000)
+        return web.json_response({"success": True, "data": {"products": []}})
+
+    async def start(self):
+        from aiohttp import web
+        app = web.Application()
+        app.router.add_get("/product", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+async def _run(args):
+    from actions import action_http
+    from actions.action_constants import HEDGE_MIN_DELAY_MS, HEDGE_MAX_RATIO, REPLICA_COOLDOWN_SECONDS, REPLICA_EWMA_ALPHA
+    from actions.action_replicas import ReplicaSet
+
+    tail_ratio, tail_ms = 0.0, 0.0
+    if args.tail:
+        ratio, extra = args.tail.split(":")
+        tail_ratio, tail_ms = float(ratio), float(extra)
+    stubs = [_StubReplica(float(ms), tail_ratio, tail_ms) for ms in args.latency.split(",")]
+    for stub in stubs:
+        await stub.start()
+    replicas = ReplicaSet(
+        [stub.url for stub in stubs], REPLICA_EWMA_ALPHA, REPLICA_COOLDOWN_SECONDS,
+        not args.no_hedge, HEDGE_MIN_DELAY_MS / 1000, HEDGE_MAX_RATIO, args.decay)
+
+    latencies = []
+    sent = 0
+    semaphore = asyncio.Semaphore(max(1, args.concurrency))
+
+    async def one():
+        nonlocal sent
+        async with semaphore:
+            sent += 1
+            if args.swap_after and sent == args.swap_after:
+                latencies_ms = [stub.latency_ms for stub in stubs]
+                for stub, latency_ms in zip(stubs, reversed(latencies_ms)):
+                    stub.latency_ms = latency_ms
+                print(f"Latensi replica dibalik setelah {sent} request.")
+            started = time.monotonic()
+            await replicas.get("benchmark", "/product", None)
+            latencies.append(time.monotonic() - started)
+            if args.interval_ms:
+                await asyncio.sleep(args.interval_ms / 1000)
+
+    try:
+        await asyncio.gather(*(one() for _ in range(args.requests)))
+    finally:
+        await action_http.close_shared_session()
+        for stub in stubs:
+            await stub.stop()
+
+    print(f"Request: {len(latencies)}, hedge: {replicas.hedges}")
+    print(f"Latensi ms  p50 {statistics.median(latencies) * 1000:7.1f}  "
+          f"p95 {_percentile(latencies, 0.95) * 1000:7.1f}  p99 {_percentile(latencies, 0.99) * 1000:7.1f}")
+    print("Replica                         latensi  request  ewma ms")
+    for stub, replica in zip(stubs, replicas.replicas):
+        ewma = f"{replica.ewma * 1000:7.1f}" if replica.ewma is not None else "      -"
+        print(f"  {stub.url:<30} {stub.latency_ms:7.0f} {stub.requests:8d}  {ewma}")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", default="10,500", help="latensi tiap stub replica (ms), dipisah koma")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--interval-ms", type=float, default=20.0, help="jeda antar request per worker")
+    parser.add_argument("--tail", default="", help="RASIO:MS latensi tambahan acak, mis. 0.05:300")
+    parser.add_argument("--swap-after", type=int, default=0, help="balik latensi replica setelah N request")
+    parser.add_argument("--decay", type=float, default=None, help="half-life EWMA (detik)")
+    parser.add_argument("--no-hedge", action="store_true")
+    args = parser.parse_args(argv)
+    if args.decay is None:
+        from actions.action_constants import REPLICA_DECAY_SECONDS
+        args.decay = REPLICA_DECAY_SECONDS
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark startup action server: waktu import per modul dan waktu warm-up.
+
+Jalankan dari root proyek:
+
+    python -m scripts.startup_benchmark --runs 5 --top 15
+
+Setiap run memakai proses Python baru dengan `-X importtime`, lalu meniru
+registrasi yang dilakukan `rasa run actions` (ActionExecutor.register_package).
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+_PROBE = """
+import time
+t0 = time.perf_counter()
+from rasa_sdk.executor import ActionExecutor
+t1 = time.perf_counter()
+# __import__ (bukan importlib) agar tiap modul tercatat oleh -X importtime.
+import pkgutil
+import actions
+for module_info in pkgutil.walk_packages(actions.__path__, "actions."):
+    __import__(module_info.name)
+executor = ActionExecutor()
+executor.register_package("actions")
+t2 = time.perf_counter()
+from actions.action_registry import warm_up
+warm_up()
+t3 = time.perf_counter()
+print(f"PHASES {t1 - t0:.6f} {t2 - t1:.6f} {t3 - t2:.6f} {len(executor.actions)}")
+"""
+
+
+def _parse_importtime(stderr):
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def _run_probe(project_root):
+    env = dict(os.environ, ACTION_WARMUP="0", ACTION_ADMIN_PORT="0")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        cwd=project_root, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+    phases = None
+    for line in proc.stdout.splitlines():
+        if line.startswith("PHASES "):
+            rasa_sdk_s, register_s, warm_up_s, action_count = line.split()[1:]
+            phases = (float(rasa_sdk_s), float(register_s), float(warm_up_s), int(action_count))
+    return _parse_importtime(proc.stderr), phases
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10,
+                        help="jumlah import pihak ketiga terberat yang ditampilkan")
+    args = parser.parse_args(argv)
+
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    runs = [_run_probe(project_root) for _ in range(max(1, args.runs))]
+
+    def median(values):
+        return statistics.median(values) if values else 0.0
+
+    phases = [phase for _, phase in runs if phase]
+    if phases:
+        print(f"Action terdaftar          : {phases[0][3]}")
+        print(f"Import rasa_sdk.executor  : {median([p[0] for p in phases]) * 1000:8.1f} ms")
+        print(f"register_package(actions) : {median([p[1] for p in phases]) * 1000:8.1f} ms")
+        print(f"warm_up()                 : {median([p[2] for p in phases]) * 1000:8.1f} ms")
+
+    names = set()
+    for modules, _ in runs:
+        names.update(modules)
+
+    def stat(name, index):
+        return median([modules[name][index] for modules, _ in runs if name in modules]) / 1000
+
+    own = sorted((n for n in names if n == "actions" or n.startswith("actions.")),
+                 key=lambda n: -stat(n, 1))
+    print("\nModul actions (median ms)      self   kumulatif")
+    for name in own:
+        print(f"  {name:<40} {stat(name, 0):8.1f} {stat(name, 1):10.1f}")
+
+    own_set = set(own)
+    third_party = sorted(
+        (n for n in names
+         if "." not in n and n not in own_set and n not in sys.stdlib_module_names
+         and not n.startswith("_")),
+        key=lambda n: -stat(n, 1))[:args.top]
+    print(f"\nTop {args.top} import pihak ketiga (median ms kumulatif)")
+    for name in third_party:
+        print(f"  {name:<40} {stat(name, 1):10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+# Konfigurasi diatur sebelum paket actions di-import: tanpa backend, admin
+# server, warm-up, tracing, monitor loop maupun pool proses.
+os.environ.update(
+    API_ROOT_URL="http://127.0.0.1:9",
+    API_ROOT_URLS="",
+    ACTION_ADMIN_PORT="0",
+    ACTION_WARMUP="0",
+    CATALOG_ROLE="off",
+    CATALOG_SNAPSHOT_DIR=tempfile.mkdtemp(prefix="catalog-test-"),
+    TRACE_SAMPLE_RATE="0",
+    LOOP_LAG_INTERVAL_MS="0",
+    PREFETCH_TOP_N="0",
+    WORKER_PROCESSES="0",
+)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest  # noqa: E402
+from rasa_sdk import Tracker  # noqa: E402
+from rasa_sdk.executor import CollectingDispatcher  # noqa: E402
+
+from actions.action_cache import NEGATIVE_SEARCH_CACHE, PRODUCT_DETAIL_CACHE, RESPONSE_CACHE  # noqa: E402
+from actions.action_catalog import CATALOG, CATALOG_LISTINGS  # noqa: E402
+from actions.action_catalog_index import FACET_INDEX  # noqa: E402
+from actions.action_catalog_snapshot import MappedSnapshot, write_snapshot  # noqa: E402
+
+PRODUCTS = [
+    {"_id": "p1", "name": "Ayam Bakar Madu", "price": 25000, "description": "Manis gurih",
+     "category": "Makanan", "stock": 10, "averageRating": 4.8, "ratingCount": 5, "shopId": "s1"},
+    {"_id": "p2", "name": "Es Teh Manis", "price": 5000, "description": "Segar",
+     "category": "Minuman", "stock": 50, "averageRating": 4.1, "ratingCount": 2, "shopId": "s1"},
+    {"_id": "p3", "name": "Paket Ayam Hemat", "price": 18000, "description": "Nasi + ayam",
+     "category": "Paket", "stock": 3, "averageRating": 3.9, "ratingCount": 8, "shopId": "s2"},
+    {"_id": "p4", "name": "Jus Alpukat", "price": 14000, "description": "",
+     "category": "Minuman", "stock": 0, "averageRating": 4.6, "ratingCount": 4, "shopId": "s2"},
+]
+SHOPS = [
+    {"_id": "s1", "shopName": "Toko Nusantara", "shopAddress": "Jl. Merdeka 1"},
+    {"_id": "s2", "shopName": "Ayam Bakar Pak Joko", "shopAddress": "Jl. Sudirman 2"},
+]
+
+
+def clear_caches():
+    RESPONSE_CACHE.invalidate()
+    NEGATIVE_SEARCH_CACHE.invalidate()
+    PRODUCT_DETAIL_CACHE.evict(list(PRODUCT_DETAIL_CACHE._entries))
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    """CATALOG dengan snapshot PRODUCTS/SHOPS yang sudah dimuat, tanpa patch."""
+    path = str(tmp_path / "catalog-v1.snap")
+    write_snapshot(path, 1, PRODUCTS, SHOPS)
+    CATALOG._snapshot = MappedSnapshot(path)
+    CATALOG._patches = {}
+    CATALOG._patch_generation = 0
+    CATALOG._patch_keys = []
+    for view in (*CATALOG_LISTINGS.values(), FACET_INDEX):
+        view._generation, view._value, view._task = None, None, None
+    clear_caches()
+    yield CATALOG
+    CATALOG._snapshot.close()
+    CATALOG._snapshot = None
+    CATALOG._patches = {}
+    clear_caches()
+
+
+def tracker(entities=None, slots=None, sender="u1"):
+    message = {"text": "", "entities": entities or [], "metadata": {}, "intent": {}}
+    return Tracker(sender, slots or {}, message, [], False, None, {}, "")
+
+
+def run_action(action_cls, **tracker_kwargs):
+    """Menjalankan action dan mengembalikan (teks pesan, event)."""
+    dispatcher = CollectingDispatcher()
+    events = asyncio.run(action_cls().run(dispatcher, tracker(**tracker_kwargs), {}))
+    return [m.get("text") or m.get("template") or m.get("response") for m in dispatcher.messages], events
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from actions.action_admission import BackendOverloaded, RouteLimiter
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def _queue(limiter, priorities, granted):
+    async def waiter(priority, label):
+        await limiter.acquire(priority)
+        granted.append(label)
+
+    tasks = []
+    for label, priority in priorities:
+        tasks.append(asyncio.create_task(waiter(priority, label)))
+        await asyncio.sleep(0)
+    return tasks
+
+
+def test_waiters_are_granted_by_priority_then_arrival():
+    async def main():
+        limiter = RouteLimiter("product_list", 1, 10, 5.0)
+        await limiter.acquire(0)
+        granted = []
+        tasks = await _queue(limiter, [("list", 3), ("order", 0), ("search-a", 1), ("search-b", 1)], granted)
+        assert limiter.queued == 4
+        for _ in tasks:
+            limiter.release()
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        assert granted == ["order", "search-a", "search-b", "list"]
+        assert limiter.active == 1 and limiter.queued == 0
+
+    run(main())
+
+
+def test_full_queue_sheds_lower_priority_and_displaces_worst_waiter():
+    async def main():
+        limiter = RouteLimiter("product_list", 1, 2, 5.0)
+        await limiter.acquire(0)
+        granted = []
+        queued = await _queue(limiter, [("list", 3), ("search", 1)], granted)
+
+        with pytest.raises(BackendOverloaded) as shed:
+            await limiter.acquire(3)
+        assert shed.value.reason == "queue_full"
+
+        urgent = await _queue(limiter, [("order", 0)], granted)
+        with pytest.raises(BackendOverloaded) as displaced:
+            await queued[0]
+        assert displaced.value.reason == "displaced"
+        assert limiter.queued == 2
+
+        limiter.release()
+        limiter.release()
+        await asyncio.gather(queued[1], *urgent)
+        assert granted == ["order", "search"]
+
+    run(main())
+
+
+def test_waiter_times_out():
+    async def main():
+        limiter = RouteLimiter("product_list", 1, 10, 0.02)
+        await limiter.acquire(0)
+        with pytest.raises(BackendOverloaded) as timeout:
+            await limiter.acquire(1)
+        assert timeout.value.reason == "timeout"
+        assert limiter.queued == 0
+        limiter.release()
+        assert limiter.active == 0
+
+    run(main())
+
+
+def test_cancelled_waiter_leaves_queue():
+    async def main():
+        limiter = RouteLimiter("product_list", 1, 10, 5.0)
+        await limiter.acquire(0)
+        granted = []
+        first, second = await _queue(limiter, [("first", 1), ("second", 1)], granted)
+        first.cancel()
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+
+        limiter.release()
+        await second
+        assert granted == ["second"]
+        assert limiter.active == 1 and limiter.queued == 0
+
+    run(main())
+
+
+def test_waiter_cancelled_after_grant_passes_slot_on():
+    async def main():
+        limiter = RouteLimiter("product_list", 1, 10, 5.0)
+        await limiter.acquire(0)
+        granted = []
+        first, second = await _queue(limiter, [("first", 1), ("second", 1)], granted)
+        # Slot diberikan ke `first`, tetapi task dibatalkan sebelum sempat berjalan.
+        limiter.release()
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        await second
+        assert granted == ["second"]
+        assert limiter.active == 1 and limiter.queued == 0
+        limiter.release()
+        assert limiter.active == 0
+
+    run(main())
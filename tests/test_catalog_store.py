@@ -0,0 +1,78 @@
+import asyncio
+import json
+import os
+
+from actions.action_catalog import CURRENT_FILE, KEEP_SNAPSHOTS, LOCK_FILE, CatalogStore
+from conftest import PRODUCTS, SHOPS
+
+
+def store(directory, role="auto"):
+    return CatalogStore(str(directory), role, 300.0, 2.0)
+
+
+def serve(store, products=PRODUCTS, shops=SHOPS):
+    bodies = {"/product": {"products": products}, "/shop": {"shops": shops}}
+
+    async def fetch_body(path, route):
+        return json.dumps({"success": True, "data": bodies[path]}).encode()
+    store._fetch_body = fetch_body
+
+
+def test_only_one_process_holds_the_refresher_lock(tmp_path):
+    first, second = store(tmp_path), store(tmp_path)
+
+    assert first._try_become_refresher()
+    assert not second._try_become_refresher()
+    assert os.path.exists(tmp_path / LOCK_FILE)
+
+    # Pemegang lock berhenti: proses lain mengambil alih.
+    os.close(first._lock_fd)
+    assert second._try_become_refresher()
+    os.close(second._lock_fd)
+
+
+def test_fixed_roles_skip_the_lock(tmp_path):
+    assert not store(tmp_path, "reader")._try_become_refresher()
+    assert store(tmp_path, "refresher")._try_become_refresher()
+    assert not os.path.exists(tmp_path / LOCK_FILE)
+
+
+def test_refresh_publishes_current_and_readers_follow_it(tmp_path):
+    refresher, reader = store(tmp_path, "refresher"), store(tmp_path, "reader")
+    serve(refresher)
+
+    async def main():
+        await refresher.refresh()
+        assert (tmp_path / CURRENT_FILE).read_text() == "catalog-v1.snap"
+        await reader.load_current()
+        assert reader.current().version == 1
+        assert reader.record("product", "p1")["name"] == "Ayam Bakar Madu"
+
+        serve(refresher, PRODUCTS[1:])
+        await refresher.refresh()
+        assert (tmp_path / CURRENT_FILE).read_text() == "catalog-v2.snap"
+        before = reader.current()
+        await reader.load_current()
+        assert reader.current().version == 2 and reader.current() is not before
+        assert reader.record("product", "p1") is None
+        # CURRENT tidak berubah: snapshot yang sama tidak dimuat ulang.
+        current = reader.current()
+        await reader.load_current()
+        assert reader.current() is current
+
+    asyncio.run(main())
+    assert not [name for name in os.listdir(tmp_path) if ".tmp-" in name]
+
+
+def test_refresh_keeps_only_recent_snapshots(tmp_path):
+    refresher = store(tmp_path, "refresher")
+    serve(refresher)
+
+    async def main():
+        for _ in range(KEEP_SNAPSHOTS + 2):
+            await refresher.refresh()
+
+    asyncio.run(main())
+    snapshots = sorted(name for name in os.listdir(tmp_path) if name.endswith(".snap"))
+    assert snapshots == [f"catalog-v{v}.snap" for v in range(3, KEEP_SNAPSHOTS + 3)]
+    assert refresher._published_version() == KEEP_SNAPSHOTS + 2
@@ -0,0 +1,85 @@
+import asyncio
+
+from actions.action_catalog import CATALOG_LISTINGS
+from actions.action_catalog_index import FACET_INDEX, PRICE_ASC, RATING, ProductFacetIndex
+
+
+def current(view):
+    return asyncio.run(view.current())
+
+
+def forbid_snapshot_decode(catalog, monkeypatch):
+    def fail():
+        raise AssertionError("snapshot di-decode ulang")
+    monkeypatch.setattr(catalog._snapshot, "products", fail)
+    monkeypatch.setattr(catalog._snapshot, "shops", fail)
+
+
+def test_patch_updates_listing_without_rebuild(catalog, monkeypatch):
+    listing = CATALOG_LISTINGS["product"]
+    before = current(listing)
+    forbid_snapshot_decode(catalog, monkeypatch)
+
+    catalog.patch("product", "p2", dict(before[2], averageRating=5.0))
+    catalog.patch("product", "p4", None)
+    catalog.patch("product", "p9", {"_id": "p9", "name": "Sate", "averageRating": 1.0})
+
+    after = listing._value
+    assert not listing.stale()
+    assert [p["_id"] for p in after] == ["p2", "p1", "p3", "p9"]
+    # Versi lama yang mungkin masih dibaca request lain tidak berubah.
+    assert [p["_id"] for p in before] == ["p1", "p4", "p2", "p3"]
+
+
+def test_patched_facet_index_matches_full_build(catalog, monkeypatch):
+    index = current(FACET_INDEX)
+    forbid_snapshot_decode(catalog, monkeypatch)
+
+    catalog.patch("product", "p1", dict(index.products[0], price=4000, category="Minuman"))
+    catalog.patch("product", "p3", None)
+    catalog.patch("product", "p9", {"_id": "p9", "name": "Kopi", "price": "12rb",
+                                    "category": "Minuman", "averageRating": 4.9})
+
+    patched = FACET_INDEX._value
+    monkeypatch.undo()
+    rebuilt = ProductFacetIndex(catalog.records("product"))
+    assert patched.categories() == rebuilt.categories() == ["minuman"]
+    for categories in (None, ["minuman"], ["paket"], ["makanan"]):
+        for order in (RATING, PRICE_ASC):
+            for low, high in ((None, None), (4000, 14000)):
+                assert patched.query(categories, low, high, order, k=10) == \
+                    rebuilt.query(categories, low, high, order, k=10)
+    # Index lama tetap utuh.
+    assert index.query(["paket"])[0] == 1
+
+
+def test_changes_since(catalog):
+    generation = catalog.generation()
+    catalog.patch("product", "p1", None)
+    catalog.patch("shop", "s1", {"_id": "s1", "shopName": "Baru"})
+    catalog.patch("product", "p1", {"_id": "p1", "name": "Lagi"})
+
+    assert catalog.changes_since(generation) == {
+        ("product", "p1"): {"_id": "p1", "name": "Lagi"},
+        ("shop", "s1"): {"_id": "s1", "shopName": "Baru"},
+    }
+    assert catalog.changes_since(catalog.generation()) == {}
+    # Versi snapshot lain: struktur turunan harus dibangun ulang.
+    assert catalog.changes_since((generation[0] - 1, generation[1])) is None
+
+
+def test_patch_in_running_loop_swaps_after_worker_update(catalog, monkeypatch):
+    listing = CATALOG_LISTINGS["product"]
+
+    async def scenario():
+        before = await listing.current()
+        forbid_snapshot_decode(catalog, monkeypatch)
+        catalog.patch("product", "p3", None)
+        # Pembaca tetap memakai versi lama sampai update di worker selesai.
+        assert await listing.current() is before and listing.stale()
+        await listing._task
+        return before, await listing.current()
+
+    before, after = asyncio.run(scenario())
+    assert [p["_id"] for p in after] == ["p1", "p4", "p2"]
+    assert len(before) == 4
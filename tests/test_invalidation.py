@@ -0,0 +1,80 @@
+import asyncio
+
+from actions.action_cache import PRODUCT_DETAIL_CACHE
+from actions.action_invalidation import INVALIDATOR
+from actions.action_show_product_detail import ActionShowProductDetail
+from conftest import PRODUCTS, run_action
+
+
+def invalidate(payload):
+    return asyncio.run(INVALIDATOR.apply(payload))
+
+
+def test_partial_record_is_merged_into_snapshot_record(catalog):
+    summary = invalidate({"products": [{"_id": "p1", "stock": 0}]})
+
+    assert summary["updated"] == ["product:p1"]
+    record = catalog.record("product", "p1")
+    assert record["stock"] == 0
+    assert record["name"] == "Ayam Bakar Madu"
+    assert record["shopId"] == "s1"
+    assert "p1" in [p["_id"] for p in catalog.products_of_shop("s1")]
+
+
+def test_partial_record_keeps_detail_reply_complete(catalog):
+    PRODUCT_DETAIL_CACHE.put(dict(PRODUCTS[0]))
+    invalidate({"products": [{"_id": "p1", "stock": 0}]})
+
+    assert PRODUCT_DETAIL_CACHE.peek("p1")["name"] == "Ayam Bakar Madu"
+    texts, _ = run_action(ActionShowProductDetail,
+                          entities=[{"entity": "product_name", "value": "Ayam Bakar Madu"}])
+    assert "**Ayam Bakar Madu**" in texts[0]
+    assert "Harga: Rp 25000" in texts[0]
+    assert "Stok: 0" in texts[0]
+    assert "Toko: Toko Nusantara" in texts[0]
+
+
+def test_partial_record_of_unknown_product_is_fetched(catalog, monkeypatch):
+    fetched = []
+
+    async def fetch(product_id):
+        fetched.append(product_id)
+        return {"_id": product_id, "name": "Sate Ayam", "price": 20000, "description": "",
+                "category": "Makanan", "stock": 5, "shopId": "s1"}, True
+    monkeypatch.setattr(INVALIDATOR, "_fetch_product", fetch)
+
+    invalidate({"products": [{"_id": "p9", "stock": 1}]})
+
+    assert fetched == ["p9"]
+    record = catalog.record("product", "p9")
+    assert record["name"] == "Sate Ayam" and record["stock"] == 1
+
+
+def test_partial_record_of_unknown_product_stays_unresolved_when_fetch_fails(catalog, monkeypatch):
+    async def fetch(product_id):
+        return None, False
+    monkeypatch.setattr(INVALIDATOR, "_fetch_product", fetch)
+
+    summary = invalidate({"products": [{"_id": "p9", "stock": 1}]})
+
+    assert summary["unresolved"] == ["product:p9"]
+    assert catalog.record("product", "p9") is None
+
+
+def test_named_new_product_is_used_when_backend_does_not_know_it(catalog, monkeypatch):
+    async def fetch(product_id):
+        return None, True
+    monkeypatch.setattr(INVALIDATOR, "_fetch_product", fetch)
+
+    summary = invalidate({"products": [{"_id": "p9", "name": "Ayam Geprek", "price": 1}]})
+
+    assert summary["updated"] == ["product:p9"]
+    assert catalog.record("product", "p9")["name"] == "Ayam Geprek"
+    assert PRODUCT_DETAIL_CACHE.peek("p9") is None
+
+
+def test_deleted_record_is_removed(catalog):
+    invalidate({"products": [{"_id": "p2", "deleted": True}]})
+
+    assert catalog.record("product", "p2") is None
+    assert "p2" not in [p["_id"] for p in catalog.records("product")]
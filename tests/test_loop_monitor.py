@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+from actions.action_loop_monitor import LoopLagMonitor
+
+
+def _block(seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+
+
+async def _slow_action(monitor):
+    task = monitor.track("action_slow")
+    try:
+        await asyncio.sleep(0.05)
+        _block(0.25)
+    finally:
+        monitor.untrack(task)
+
+
+async def _slow_background():
+    await asyncio.sleep(0.05)
+    _block(0.25)
+
+
+def _stalls(*coroutines):
+    monitor = LoopLagMonitor(10, 80, 5, 20)
+
+    async def main():
+        monitor.ensure_started()
+        await asyncio.gather(*(coroutine(monitor) for coroutine in coroutines))
+        await asyncio.sleep(0.05)
+
+    asyncio.run(main())
+    return list(monitor.reports)
+
+
+def test_stall_is_attributed_to_running_action():
+    reports = _stalls(_slow_action)
+
+    assert [report["action"] for report in reports] == ["action_slow"]
+    assert any("_block" in line for line in reports[0]["stack"])
+    assert reports[0]["lag_ms"] >= 200
+
+
+def test_stall_in_untracked_task_reports_task_name():
+    async def background(monitor):
+        await asyncio.create_task(_slow_background(), name="refresher")
+
+    reports = _stalls(background)
+
+    assert [report["action"] for report in reports] == ["(task refresher)"]
@@ -0,0 +1,105 @@
+import time
+
+from actions.action_cache import DETAIL_FILL_LIMIT, ProductDetailCache
+from actions.action_memory import ByteBudget, estimate_size
+from conftest import PRODUCTS
+
+
+def product(product_id, **fields):
+    return dict(PRODUCTS[0], _id=product_id, **fields)
+
+
+def test_estimate_size_counts_shared_objects_once():
+    text = "x" * 1000
+    single = estimate_size([text])
+
+    assert estimate_size([text, text]) < single + 100
+    assert estimate_size([text, "y" * 1000]) > single + 900
+
+
+def test_byte_budget_tracks_charges_per_key():
+    budget = ByteBudget(0)
+    first = budget.charge("a", "x" * 100)
+    assert budget.bytes == first
+
+    # Charge ulang kunci yang sama menggantikan ukuran lama.
+    second = budget.charge("a", "x" * 1000)
+    assert budget.bytes == second > first
+    budget.charge("b", "y")
+    budget.release("a")
+    budget.release("missing")
+    assert budget.bytes == estimate_size("b") + estimate_size("y")
+    assert not budget.exceeded()
+
+    budget.max_bytes = 1
+    assert budget.exceeded()
+    budget.clear()
+    assert budget.bytes == 0 and not budget.exceeded()
+
+
+def _cache_for(records):
+    probe = ByteBudget(0)
+    size = max(probe.charge(record["_id"], record) for record in records)
+    return ProductDetailCache(60.0, size * 2 + size // 2)
+
+
+def test_detail_cache_evicts_least_recently_used_within_budget():
+    records = [product(f"p{i}") for i in range(3)]
+    cache = _cache_for(records)
+    cache.put(records[0])
+    cache.put(records[1])
+    assert cache.get("p0") is records[0]
+    cache.put(records[2])
+
+    assert cache.peek("p1") is None
+    assert cache.peek("p0") is records[0] and cache.peek("p2") is records[2]
+    assert cache.evictions == 1
+    assert cache.budget.bytes <= cache.budget.max_bytes
+
+
+def test_detail_cache_keeps_a_single_oversized_record():
+    cache = ProductDetailCache(60.0, 1)
+    cache.put(product("p1"))
+    cache.put(product("p2"))
+
+    assert cache.stats()["entries"] == 1 and cache.peek("p2") is not None
+
+
+def test_peek_does_not_change_lru_order():
+    records = [product(f"p{i}") for i in range(3)]
+    cache = _cache_for(records)
+    cache.put(records[0])
+    cache.put(records[1])
+    cache.peek("p0")
+    cache.put(records[2])
+
+    assert cache.peek("p0") is None
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_detail_cache_respects_fetch_time():
+    cache = ProductDetailCache(60.0, 0)
+    now = time.time()
+    assert not cache.put(product("p1"), now - 61)
+    assert cache.put(product("p1", stock=1), now)
+    # Data snapshot yang lebih lama tidak menimpa data yang lebih baru.
+    assert not cache.put(product("p1", stock=9), now - 5)
+    assert cache.get("p1")["stock"] == 1
+
+
+def test_put_many_stores_complete_records_only():
+    cache = ProductDetailCache(60.0, 0)
+    partial = {"_id": "x", "name": "Tanpa harga"}
+    records = [partial] + [product(f"p{i}") for i in range(DETAIL_FILL_LIMIT + 5)]
+
+    assert cache.put_many(records) == DETAIL_FILL_LIMIT - 1
+    assert cache.peek("x") is None
+
+
+def test_evict_releases_bytes():
+    cache = ProductDetailCache(60.0, 0)
+    cache.put(product("p1"))
+    cache.put(product("p2"))
+
+    assert cache.evict(["p1", "missing"]) == 1
+    assert cache.budget.bytes == ByteBudget(0).charge("p2", cache.peek("p2"))
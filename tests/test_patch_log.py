@@ -0,0 +1,60 @@
+import json
+import os
+import time
+
+from actions import action_catalog
+from actions.action_catalog import PATCH_LOG_FILE, CatalogStore
+
+
+def worker(directory):
+    store = CatalogStore(str(directory), "off", 300.0, 2.0)
+    received = []
+    store.on_remote_patches(received.extend)
+    return store, received
+
+
+def test_entries_reach_other_workers_once(tmp_path):
+    (publisher, own), (reader, received) = worker(tmp_path), worker(tmp_path)
+
+    publisher.publish_patches([{"kind": "product", "id": "p1"}])
+    assert reader.sync_patch_log() == 1
+    assert reader.sync_patch_log() == 0
+    publisher.publish_patches([{"kind": "shop", "id": "s1"}])
+    assert reader.sync_patch_log() == 1
+
+    assert [(entry["kind"], entry["id"]) for entry in received] == [("product", "p1"), ("shop", "s1")]
+    # Entri tulisan sendiri tidak diterapkan ulang.
+    assert publisher.sync_patch_log() == 0 and own == []
+
+
+def test_incomplete_last_line_is_read_next_cycle(tmp_path):
+    reader, received = worker(tmp_path)
+    line = json.dumps({"kind": "product", "id": "p1", "time": time.time(), "origin": "other"})
+    path = tmp_path / PATCH_LOG_FILE
+    path.write_text(line[:10])
+    assert reader.sync_patch_log() == 0
+
+    path.write_text(line + "\n")
+    assert reader.sync_patch_log() == 1
+    assert received[0]["id"] == "p1"
+
+
+def test_compaction_drops_old_entries_and_readers_restart(tmp_path, monkeypatch):
+    (publisher, _), (reader, received) = worker(tmp_path), worker(tmp_path)
+    path = tmp_path / PATCH_LOG_FILE
+    old = time.time() - 3 * 300.0 - action_catalog.PATCH_OVERLAP_SECONDS - 10
+    path.write_text("".join(
+        json.dumps({"kind": "product", "id": f"old{i}", "time": old, "origin": "other"}) + "\n"
+        for i in range(3)))
+    assert reader.sync_patch_log() == 3
+    inode = os.stat(path).st_ino
+
+    monkeypatch.setattr(action_catalog, "PATCH_LOG_MAX_BYTES", 1)
+    publisher.publish_patches([{"kind": "product", "id": "p1"}])
+
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["p1"]
+    assert os.stat(path).st_ino != inode
+    # File baru: pembaca mulai dari awal dan tidak melewatkan entri baru.
+    assert reader.sync_patch_log() == 1
+    assert received[-1]["id"] == "p1"
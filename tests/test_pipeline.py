@@ -0,0 +1,102 @@
+import asyncio
+import types
+
+import aiohttp
+import pytest
+from rasa_sdk.executor import CollectingDispatcher
+
+from actions.action_admission import OVERLOADED_REPLY, BackendOverloaded
+from actions.action_http import BackendResponse, BadPayload
+from actions.action_pipeline import Halt, Pipeline, Replies, expect
+from conftest import clear_caches, tracker
+
+REPLIES = Replies(
+    missing_query="Produk apa yang dicari?",
+    empty="Tidak ada hasil untuk {query}.",
+    status_error="Status {status}.",
+    server_error="Server: {message}",
+    server_error_default="Gagal mencari {query}.",
+    auth_error="Silakan login dulu.",
+    format_error="Format salah.",
+    connection_error="Tidak terhubung.",
+    content_error="Bukan JSON.",
+    unexpected_error="Kesalahan tak terduga.",
+    unknown_category="Kategori {category} tidak ada.",
+)
+
+
+def ok(data):
+    return BackendResponse(200, {"success": True, "data": data}, "")
+
+
+def pipeline(result, query="ayam", replies=REPLIES, **kwargs):
+    calls = []
+
+    async def fetch(ctx, _):
+        calls.append(ctx.query)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    return calls, Pipeline(
+        query=lambda ctx: query,
+        fetch=fetch,
+        validate=expect("products", auth=True),
+        render=lambda ctx, items: [f"{len(items)} produk"],
+        replies=replies,
+        remember_reply=False,
+        **kwargs)
+
+
+def texts(pipeline, action_name="action_pipeline_test"):
+    dispatcher = CollectingDispatcher()
+    asyncio.run(pipeline.run(action_name, dispatcher, tracker()))
+    return [message["text"] for message in dispatcher.messages]
+
+
+def _refused():
+    return aiohttp.ClientConnectorError(
+        types.SimpleNamespace(host="backend", port=80, ssl=None), OSError(111, "Connection refused"))
+
+
+@pytest.mark.parametrize("result, reply", [
+    (ok({"products": [{"_id": "p1"}]}), "1 produk"),
+    (ok({"products": []}), "Tidak ada hasil untuk ayam."),
+    (BackendResponse(500, {}, "boom"), "Status 500."),
+    (BackendResponse(401, {}, ""), "Silakan login dulu."),
+    (BackendResponse(200, {"success": False, "message": "Akses ditolak"}, ""), "Silakan login dulu."),
+    (BackendResponse(200, {"success": False, "message": "Database sibuk"}, ""), "Server: Database sibuk"),
+    (BackendResponse(200, {"success": False}, ""), "Server: Gagal mencari ayam."),
+    (BackendResponse(200, {"success": True}, ""), "Format salah."),
+    (ok({"shops": []}), "Format salah."),
+    (_refused(), "Tidak terhubung."),
+    (asyncio.TimeoutError(), "Tidak terhubung."),
+    (BadPayload("not json"), "Bukan JSON."),
+    (BackendOverloaded("product_search", "queue_full"), OVERLOADED_REPLY),
+    (Halt("unknown_category", category="sepatu"), "Kategori sepatu tidak ada."),
+    (Halt("no_such_reply"), "Kesalahan tak terduga."),
+    (KeyError("products"), "Kesalahan tak terduga."),
+])
+def test_outcome_is_mapped_to_reply(result, reply):
+    _, stages = pipeline(result)
+    assert texts(stages) == [reply]
+
+
+def test_timeout_uses_its_own_reply_when_defined():
+    _, stages = pipeline(asyncio.TimeoutError(), replies=REPLIES.but(timeout="Backend lambat."))
+    assert texts(stages) == ["Backend lambat."]
+
+
+def test_missing_query_halts_before_fetch():
+    calls, stages = pipeline(ok({"products": []}), query=None)
+    assert texts(stages) == ["Produk apa yang dicari?"]
+    assert calls == []
+
+
+def test_empty_result_is_negative_cached():
+    clear_caches()
+    calls, stages = pipeline(ok({"products": []}), query="sepatu kulit", negative_cache="product")
+    assert texts(stages) == ["Tidak ada hasil untuk sepatu kulit."]
+    assert texts(stages) == ["Tidak ada hasil untuk sepatu kulit."]
+    assert calls == ["sepatu kulit"]
+    clear_caches()
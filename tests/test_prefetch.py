@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from actions.action_catalog_snapshot import MappedSnapshot, write_snapshot
+from actions.action_invalidation import INVALIDATOR
+from actions.action_prefetch import PREFETCH
+from conftest import PRODUCTS, SHOPS
+
+
+@pytest.fixture
+def product_ids(catalog):
+    PREFETCH.forget_products()
+    PREFETCH._catalog_version = 1
+    PREFETCH.note_products([{"id": "p1", "name": "Ayam Bakar Madu"}, {"id": "p2", "name": "Es Teh Manis"}])
+    yield PREFETCH
+    PREFETCH.forget_products()
+
+
+def test_renamed_product_forgets_old_name(product_ids):
+    summary = asyncio.run(INVALIDATOR.apply({"products": [{"_id": "p1", "name": "Ayam Bakar Spesial"}]}))
+
+    assert product_ids.product_id("Ayam Bakar Madu") is None
+    assert product_ids.product_id("Es Teh Manis") == "p2"
+    assert summary["evicted"]["prefetch_product_ids"] == 1
+
+
+def test_deleted_product_forgets_its_name(product_ids):
+    asyncio.run(INVALIDATOR.apply({"products": [{"_id": "p2", "deleted": True}]}))
+
+    assert product_ids.product_id("Es Teh Manis") is None
+    assert product_ids.product_id("Ayam Bakar Madu") == "p1"
+
+
+def test_new_snapshot_forgets_all_names(product_ids, catalog, tmp_path):
+    catalog._notify()
+    assert product_ids.product_id("Ayam Bakar Madu") == "p1"
+
+    old = catalog._snapshot
+    path = str(tmp_path / "catalog-v2.snap")
+    write_snapshot(path, 2, PRODUCTS[2:], SHOPS)
+    catalog._snapshot = MappedSnapshot(path)
+    old.close()
+    catalog._notify()
+
+    assert product_ids.product_id("Ayam Bakar Madu") is None
+    assert product_ids.product_id("Es Teh Manis") is None
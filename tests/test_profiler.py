@@ -0,0 +1,46 @@
+import asyncio
+import signal
+import time
+
+from actions.action_profiler import AWAIT, TASK_PREFIX, SamplingProfiler
+
+
+def test_import_does_not_install_sigusr1_handler():
+    assert signal.getsignal(signal.SIGUSR1) is signal.SIG_DFL
+
+
+async def _waiting_for_backend():
+    await asyncio.sleep(0.3)
+
+
+def _blocking_work():
+    deadline = time.monotonic() + 0.1
+    while time.monotonic() < deadline:
+        pass
+
+
+async def _busy_action():
+    await asyncio.sleep(0.05)
+    _blocking_work()
+
+
+def test_samples_running_and_suspended_action_tasks(tmp_path):
+    profiler = SamplingProfiler(str(tmp_path), 2)
+
+    async def main():
+        waiting = asyncio.create_task(_waiting_for_backend(), name=f"{TASK_PREFIX}action_waiting")
+        busy = asyncio.create_task(_busy_action(), name=f"{TASK_PREFIX}action_busy")
+        assert profiler.start(0.25)
+        await asyncio.gather(waiting, busy)
+        while profiler.running:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+
+    files = {path.rsplit("-", 1)[-1]: open(path).read() for path in profiler.last_outputs}
+    waiting = files["action_waiting.collapsed"]
+    assert f"{AWAIT};_waiting_for_backend" in waiting
+    busy = files["action_busy.collapsed"]
+    on_cpu = [line for line in busy.splitlines() if not line.startswith(AWAIT)]
+    assert any("_busy_action" in line and "_blocking_work" in line for line in on_cpu)
+
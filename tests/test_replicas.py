@@ -0,0 +1,45 @@
+import asyncio
+import gc
+
+import pytest
+
+from actions.action_replicas import ReplicaSet
+
+
+def _replicas():
+    return ReplicaSet(["http://a", "http://b", "http://c"], 0.3, 5.0, True, 0.01, 0.1)
+
+
+def test_first_success_retrieves_loser_errors_and_cancels_pending():
+    replicas = _replicas()
+    unhandled = []
+
+    async def main():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: unhandled.append(context))
+        loop = asyncio.get_running_loop()
+        failed, won, slow = loop.create_future(), loop.create_future(), loop.create_future()
+        failed.set_exception(ConnectionResetError("reset"))
+        won.set_result((200, b"{}"))
+        tasks = dict(zip((failed, won, slow), replicas.replicas))
+        winner = await replicas._first_success("product_list", tasks, "/product", None)
+        assert winner is won
+        assert slow.cancelled()
+
+    asyncio.run(main())
+    gc.collect()
+    assert unhandled == []
+
+
+def test_first_success_raises_last_error_when_every_attempt_fails():
+    replicas = _replicas()
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        first, second = loop.create_future(), loop.create_future()
+        first.set_exception(ConnectionResetError("reset"))
+        loop.call_later(0.01, second.set_exception, TimeoutError("timeout"))
+        tasks = dict(zip((first, second), replicas.replicas))
+        with pytest.raises(TimeoutError):
+            await replicas._first_success("product_list", tasks, "/product", None)
+
+    asyncio.run(main())
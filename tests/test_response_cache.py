@@ -0,0 +1,117 @@
+import time
+
+from actions.action_cache import (
+    RESPONSE_CACHE,
+    CachedResponse,
+    ResponseCache,
+    bump_catalog_version,
+    catalog_version,
+)
+
+
+def response(text, items=None):
+    return CachedResponse([{"text": text}], [{"event": "slot", "name": "product_name_slot", "value": None}],
+                          items)
+
+
+def test_key_normalizes_query_and_carries_catalog_version():
+    cache = ResponseCache(8, 60.0)
+    key = cache.key("action_search_product_api", "product", "  Ayam  BAKAR ")
+
+    assert key == cache.key("action_search_product_api", "product", "ayam bakar")
+    assert key[3] == catalog_version("product")
+    cache.put(key, response("ayam"))
+
+    bump_catalog_version("product")
+    fresh = cache.key("action_search_product_api", "product", "ayam bakar")
+    assert fresh != key
+    assert cache.get(fresh) is None
+    # Versi toko tidak memengaruhi kunci produk.
+    bump_catalog_version("shop")
+    assert cache.key("action_search_product_api", "product", "ayam bakar") == fresh
+
+
+def test_put_is_dropped_when_catalog_changed_during_the_action():
+    cache = ResponseCache(8, 60.0)
+    key = cache.key("action_list_products_api", "product", None)
+    bump_catalog_version("product")
+
+    cache.put(key, response("lama"))
+    assert cache.stats()["entries"] == 0
+
+
+def test_catalog_refresh_drops_entries_of_that_kind():
+    RESPONSE_CACHE.invalidate()
+    product_key = RESPONSE_CACHE.key("action_list_products_api", "product", None)
+    shop_key = RESPONSE_CACHE.key("action_list_shops_api", "shop", None)
+    RESPONSE_CACHE.put(product_key, response("produk"))
+    RESPONSE_CACHE.put(shop_key, response("toko"))
+
+    bump_catalog_version("product")
+    assert RESPONSE_CACHE.stats()["entries"] == 1
+    # Balasan produk memuat nama toko, jadi perubahan toko membuang keduanya.
+    RESPONSE_CACHE.put(RESPONSE_CACHE.key("action_list_products_api", "product", None), response("produk"))
+    bump_catalog_version("shop")
+    assert RESPONSE_CACHE.stats()["entries"] == 0
+
+
+def test_hit_returns_a_copy():
+    cache = ResponseCache(8, 60.0)
+    key = cache.key("action_list_products_api", "product", None)
+    cache.put(key, response("daftar"))
+
+    first = cache.get(key)
+    first.messages[0]["text"] = "diubah"
+    assert cache.get(key).messages == [{"text": "daftar"}]
+    assert (cache.hits, cache.misses) == (2, 0)
+
+
+def test_expired_entry_misses():
+    cache = ResponseCache(8, 0.01)
+    key = cache.key("action_list_products_api", "product", None)
+    cache.put(key, response("daftar"))
+    time.sleep(0.02)
+
+    assert cache.get(key) is None
+    assert cache.stats() == {"entries": 0, "bytes": 0, "evictions": 0}
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = ResponseCache(2, 60.0)
+    a, b, c = (cache.key("action_search_product_api", "product", q) for q in ("a", "b", "c"))
+    cache.put(a, response("a"))
+    cache.put(b, response("b"))
+    cache.get(a)
+    cache.put(c, response("c"))
+
+    assert cache.get(b) is None
+    assert cache.get(a) is not None and cache.get(c) is not None
+    assert cache.evictions == 1
+
+
+def test_byte_budget_evicts_oldest_entries():
+    probe = ResponseCache(8, 60.0)
+    probe.put(probe.key("action_search_product_api", "product", "q0"), response("x" * 100))
+    entry_bytes = probe.budget.bytes
+
+    cache = ResponseCache(8, 60.0, max_bytes=entry_bytes * 2 + entry_bytes // 2)
+    keys = [cache.key("action_search_product_api", "product", f"q{i}") for i in range(3)]
+    for key in keys:
+        cache.put(key, response("x" * 100))
+
+    assert cache.get(keys[0]) is None
+    assert cache.stats()["entries"] == 2 and cache.budget.bytes <= cache.budget.max_bytes
+
+
+def test_evict_records_by_item_id_and_new_name():
+    cache = ResponseCache(8, 60.0)
+    listing = cache.key("action_list_products_api", "product", None)
+    search = cache.key("action_search_product_api", "product", "sate")
+    other = cache.key("action_search_product_api", "product", "jus")
+    cache.put(listing, response("daftar", [{"id": "p1"}, {"id": "p2"}]))
+    cache.put(search, response("kosong", []))
+    cache.put(other, response("jus", [{"id": "p4"}]))
+
+    assert cache.evict_records("product", ["p2"], ["Sate Ayam Madura"]) == 2
+    assert cache.get(listing) is None and cache.get(search) is None
+    assert cache.get(other) is not None